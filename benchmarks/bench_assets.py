@@ -0,0 +1,43 @@
+"""
+Construction cost of fighters and fireballs with the shared AssetManager: the first fighter
+pays for decoding and processing, later fighters only hit the cache and fireballs
+need no image work at all.
+
+    python -m benchmarks.bench_assets
+"""
+import time
+
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+
+def run():
+    pg.display.set_mode((1280, 720))
+
+    def build_fighter():
+        player = main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, main.Direction.RIGHT)
+        return player, main.FighterSprites(player)
+
+    start = time.perf_counter()
+    player, _ = build_fighter()
+    first = (time.perf_counter() - start) * 1000
+    cold = main.assets.stats()
+
+    second = measure(build_fighter, 100)
+    projectiles = main.Projectiles(player.fireball_animation, capacity=1000)
+    fireball = measure(lambda: projectiles.spawn(600, 390, main.Direction.RIGHT, 0), 1000)
+
+    print(f'first fighter   {first:10.3f} ms')
+    print(f'next fighter    {second:10.3f} ms')
+    print(f'fireball spawn  {fireball:10.4f} ms')
+    print(f'after first fighter: {cold}')
+    print(f'after all spawns:    {main.assets.stats()}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,95 @@
+"""
+Cold and warm startup with the SpriteAtlas: each launch is a fresh process on a copy of the assets, timed from
+interpreter start until the GameManager is built. Launches without the atlas, building it, and loading it are
+compared, the processed pixels of all three checked to be identical; then a touched, a changed asset and a
+different scale factor show when the cache is reused and when it is rebuilt.
+
+    python -m benchmarks.bench_atlas
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, setup_headless
+
+setup_headless()
+
+import main  # noqa: E402
+
+LAUNCHES = 3
+LAUNCH = '''
+import time
+start = time.perf_counter()
+import hashlib, json, sys
+import pygame as pg
+import main
+gm = main.GameManager(fps=0, atlas_dir=sys.argv[1] or None)
+gm.poll_assets(block=True)
+startup_ms = (time.perf_counter() - start) * 1000
+digest = hashlib.sha256()
+for key in sorted(main.assets.frames, key=repr):
+    for sprite in main.assets.frames[key]:
+        digest.update(pg.image.tobytes(sprite, 'RGB'))
+for key in sorted(main.assets.scaled, key=repr):
+    digest.update(pg.image.tobytes(main.assets.scaled[key], 'RGB'))
+print(json.dumps({'startup_ms': startup_ms, 'sprites_ms': gm.startup.phases['assets'], 'warm': gm.atlas_warm,
+                  'pixels': digest.hexdigest()}))
+'''
+
+
+def launch(directory: str, atlas_dir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', LAUNCH, atlas_dir], cwd=directory, env=env, check=True,
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def report(name: str, launches: list[dict]):
+    outcome = {None: 'processed', True: 'loaded', False: 'built'}[launches[-1]['warm']]
+    print(f'{name:<28}{statistics.median(run["startup_ms"] for run in launches):>10.1f}'
+          f'{statistics.median(run["sprites_ms"] for run in launches):>10.1f}  {outcome}')
+
+
+def run():
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copytree(os.path.join(ROOT, 'assets'), os.path.join(directory, 'assets'))
+        atlas_dir = os.path.join(directory, 'atlas')
+
+        print(f'{"launch":<28}{"startup":>10}{"sprites":>10}  ms, median of {LAUNCHES}')
+        off = [launch(directory, '') for _ in range(LAUNCHES)]
+        report('without the atlas', off)
+        cold = []
+        for _ in range(LAUNCHES):
+            shutil.rmtree(atlas_dir, ignore_errors=True)
+            cold.append(launch(directory, atlas_dir))
+        report('cold, building it', cold)
+        warm = [launch(directory, atlas_dir) for _ in range(LAUNCHES)]
+        report('warm, loading it', warm)
+        assert len({run['pixels'] for run in off + cold + warm}) == 1, 'the atlas changed the processed pixels'
+        size = sum(os.path.getsize(os.path.join(atlas_dir, name)) for name in os.listdir(atlas_dir))
+        print(f'identical pixels in all three, atlas file {size / 2 ** 20:.1f} MiB')
+
+        sheet = os.path.join(directory, main.RYU_SPRITES_PATH)
+        os.utime(sheet)
+        report('sheet touched', [launch(directory, atlas_dir)])
+        with open(sheet, 'ab') as file:
+            # bytes past the end of the PNG change its hash but not its pixels
+            file.write(b'\0')
+        report('sheet changed', [launch(directory, atlas_dir)])
+        report('sheet changed, next launch', [launch(directory, atlas_dir)])
+        print(f'atlas files kept: {len(os.listdir(atlas_dir))}')
+
+    player = main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, main.Direction.RIGHT)
+    frames = list(main.FighterSprites.animation_keys(player).values())
+    rescaled = [(path, rects, 3.0, costume) for path, rects, _, costume in frames]
+    atlas = main.SpriteAtlas()
+    print(f'a 3.0 scale factor {"changes" if atlas.key(frames, []) != atlas.key(rescaled, []) else "keeps"} '
+          f'the atlas key')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,71 @@
+"""
+Trigger-to-output latency of the AudioEngine under the SDL dummy audio driver, which mixes in real time, for
+several mixer buffer sizes; then a fast exchange of punches with a hadouken thrown every so often, played through
+the old unreserved Sound.play() on pygame's default channels and through the engine's reserved channels.
+
+    python -m benchmarks.bench_audio
+"""
+import statistics
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+BUFFERS = (256, 512, 1024, 2048)
+PROBES = 40
+# one punch every 20 ms and a hadouken every 8th trigger, for 2 seconds
+EXCHANGE = ['hadouken' if i % 8 == 0 else 'punch' for i in range(100)]
+INTERVAL = 0.02
+
+
+def exchange(play) -> dict[str, int]:
+    """
+    :param play: starts the named sound and returns whether it plays
+    :return: triggers that were not heard, by sound
+    """
+    dropped = {'punch': 0, 'hadouken': 0}
+    for name in EXCHANGE:
+        if not play(name):
+            dropped[name] += 1
+        time.sleep(INTERVAL)
+    pg.mixer.stop()
+    return dropped
+
+
+def run():
+    print(f'{"buffer":>8}{"period ms":>11}{"p50 ms":>9}{"p95 ms":>9}{"max ms":>9}')
+    for buffer in BUFFERS:
+        pg.mixer.quit()
+        engine = main.AudioEngine(buffer=buffer)
+        engine.open()
+        latencies = sorted(engine.measure_latency(PROBES))
+        print(f'{buffer:>8}{buffer / engine.frequency * 1000:>11.1f}{statistics.median(latencies):>9.2f}'
+              f'{latencies[len(latencies) * 95 // 100]:>9.2f}{latencies[-1]:>9.2f}')
+
+    pg.mixer.quit()
+    pg.mixer.init()
+    # pygame's defaults, the channel count outlives the mixer
+    pg.mixer.set_num_channels(8)
+    pg.mixer.set_reserved(0)
+    sounds = {name: main.assets.get_sound(path) for name, (_, path) in main.SOUND_EFFECTS.items()}
+    legacy = exchange(lambda name: sounds[name].play() is not None)
+    channels = pg.mixer.get_num_channels()
+
+    pg.mixer.quit()
+    engine = main.AudioEngine()
+    engine.open()
+    engine_dropped = exchange(engine.play)
+    print(f'\n{len(EXCHANGE)} triggers {INTERVAL * 1000:.0f} ms apart, '
+          f'{EXCHANGE.count("hadouken")} of them hadoukens')
+    print(f'unreserved Sound.play(), {channels} channels: dropped {legacy}')
+    print(f'reserved channels {[tuple(category) for category in main.SOUND_CATEGORIES]}: dropped {engine_dropped}, '
+          f'{engine.stats()}')
+
+
+if __name__ == '__main__':
+    run()
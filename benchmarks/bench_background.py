@@ -0,0 +1,39 @@
+"""
+Per-frame cost of drawing the stage background: rescaling the raw GIF frame every frame
+(the old GameManager.update path) against blitting the pre-scaled, display-format frame.
+
+    python -m benchmarks.bench_background
+"""
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+FRAMES = 2000
+
+
+def run():
+    screen = pg.display.set_mode((1280, 720))
+    bg = main.BackgroundSprite(main.KEN_STAGE_PATHS, screen.get_size())
+
+    def legacy_frame():
+        bg.get_sprite(1 / 144)
+        screen.blit(pg.transform.scale(main.assets.get_image(bg.paths[bg.index]), screen.get_size()), (0, 0))
+
+    def cached_frame():
+        bg.resize(screen.get_size())
+        screen.blit(bg.get_sprite(1 / 144), (0, 0))
+
+    legacy = measure(legacy_frame, FRAMES)
+    cached = measure(cached_frame, FRAMES)
+    print(f'{"path":<10}{"ms/frame":>12}')
+    print(f'{"scale":<10}{legacy:>12.4f}')
+    print(f'{"cached":<10}{cached:>12.4f}')
+    print(f'saved {legacy - cached:.4f} ms/frame ({(legacy - cached) / (1000 / 144) * 100:.1f}% of a 144 fps budget)')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,141 @@
+"""
+Game speed at different frame and tick rates. The stage background is played at 60, 144 and 240 fps against the
+delays stored in its GIFs, next to the old rule of one stage frame per 30 rendered frames. A match rendered at
+those rates must reach the same state after the same seconds. A jump, a walk, a punch and a fireball are timed
+at several simulation tick rates. Finally the CPU share of holding each frame cap in real time.
+
+    python -m benchmarks.bench_clock
+"""
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+FPS = (60, 144, 240)
+TICK_RATES = (60, 120, 144, 240)
+SECONDS = 10
+MATCH_SECONDS = 8
+CPU_SECONDS = 2
+
+
+def stage_timing(fps: int) -> list[float]:
+    """
+    :return: seconds each stage frame was shown on average, rendering ``SECONDS`` seconds at ``fps``
+    """
+    stage = main.BackgroundSprite(main.KEN_STAGE_PATHS, (1280, 720))
+    shown = [0.0] * len(stage.paths)
+    cycles = [0] * len(stage.paths)
+    previous = None
+    for _ in range(SECONDS * fps):
+        stage.get_sprite(1 / fps)
+        shown[stage.index] += 1 / fps
+        if stage.index != previous:
+            cycles[stage.index] += 1
+            previous = stage.index
+    return [seconds / max(count, 1) for seconds, count in zip(shown, cycles)]
+
+
+def match_state(fps: int) -> tuple[int, int]:
+    """
+    :return: state hash and stage frame after ``MATCH_SECONDS`` of the AI playing an idle player at ``fps``
+    """
+    gm = main.GameManager(fps=0)
+    gm.poll_assets(block=True)
+    gm.menu = False
+    gm.simulation.reset(seed=3)
+    for _ in range(MATCH_SECONDS * fps):
+        gm.update(gm.advance(1 / fps, main.PlayerInput()), 1 / fps)
+    return gm.simulation.state_hash(), gm.bg_sprite.index
+
+
+def moves(tick_rate: int) -> dict[str, float]:
+    """
+    :return: duration and reach of each move at ``tick_rate``, in seconds and pixels
+    """
+    simulation = main.Simulation(tick_rate=tick_rate, seed=0)
+    player = simulation.players[0]
+    ticks = 0
+    apex = 0.0
+    simulation.step([main.PlayerInput(jump=True), main.PlayerInput()])
+    while player.state == main.State.JUMP:
+        apex = max(apex, 620 - player.ground_y)
+        simulation.step([main.PlayerInput(), main.PlayerInput()])
+        ticks += 1
+    result = {'jump s': (ticks + 1) / tick_rate, 'jump px': apex}
+
+    simulation.reset(seed=0)
+    x = player.x
+    for _ in range(tick_rate):
+        simulation.step([main.PlayerInput(right=True), main.PlayerInput()])
+    result['walk px/s'] = player.x - x
+
+    simulation.reset(seed=0)
+    simulation.step([main.PlayerInput(attack=True), main.PlayerInput()])
+    ticks = 1
+    while player.current_animation is player.attack_animation:
+        simulation.step([main.PlayerInput(), main.PlayerInput()])
+        ticks += 1
+    result['punch s'] = ticks / tick_rate
+
+    projectiles = simulation.projectiles
+    projectiles.clear()
+    projectiles.spawn(400, 500, main.Direction.RIGHT, 0)
+    x = projectiles.x[projectiles.alive][0]
+    for _ in range(tick_rate // 2):
+        projectiles.step([])
+    result['fireball px/s'] = (projectiles.x[projectiles.alive][0] - x) * 2
+    return result
+
+
+def cpu_share(fps: int) -> tuple[float, float]:
+    """
+    :return: frames rendered per second and process CPU time per wall second, holding ``fps`` in real time
+    """
+    gm = main.GameManager(fps=fps)
+    gm.poll_assets(block=True)
+    gm.menu = False
+    gm.clock.tick()
+    start, cpu = time.perf_counter(), time.process_time()
+    previous = start
+    frames = 0
+    while time.perf_counter() - start < CPU_SECONDS:
+        now = time.perf_counter()
+        gm.frame(now - previous)
+        previous = now
+        gm.clock.tick(gm.fps)
+        frames += 1
+    wall = time.perf_counter() - start
+    return frames / wall, (time.process_time() - cpu) / wall
+
+
+def run():
+    delays = [main.gif_delay(path) for path in main.KEN_STAGE_PATHS]
+    print(f'stage frame delays stored in the GIFs: {", ".join(f"{delay:.2f}" for delay in delays)} s')
+    print(f'{"fps":>6}{"shown s per stage frame":>40}{"old rule":>10}')
+    for fps in FPS:
+        print(f'{fps:>6}{"":>10}' + ''.join(f'{seconds:>6.3f}' for seconds in stage_timing(fps)) +
+              f'{30 / fps:>10.3f}')
+
+    states = {fps: match_state(fps) for fps in FPS}
+    same = len(set(states.values())) == 1
+    print(f'\nafter {MATCH_SECONDS} s of a match at {", ".join(map(str, FPS))} fps: '
+          f'{"identical" if same else "DIFFERENT"} state and stage frame {states}')
+
+    print(f'\n{"tick rate":>10}' + ''.join(f'{name:>15}' for name in moves(144)))
+    for tick_rate in TICK_RATES:
+        print(f'{tick_rate:>10}' + ''.join(f'{value:>15.3f}' for value in moves(tick_rate).values()))
+
+    print(f'\n{"fps cap":>8}{"frames/s":>10}{"CPU":>8}')
+    for fps in FPS:
+        rate, cpu = cpu_share(fps)
+        print(f'{fps:>8}{rate:>10.1f}{cpu:>8.0%}')
+    pg.quit()
+
+
+if __name__ == '__main__':
+    run()
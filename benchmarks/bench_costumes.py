@@ -0,0 +1,78 @@
+"""
+Recolouring the fighter: the old pipeline, which multiplied every scaled frame of every animation by the P2 colour
+on a new surface, against one pass over the frames of the sheet per costume. The P2 frames of both are checked to
+look the same, then every costume is built cold and once more from the cache.
+
+    python -m benchmarks.bench_costumes
+"""
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import numpy as np  # noqa: E402
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+ANIMATIONS = [name for name in main.RYU_FRAMES if name != 'fireball']
+
+
+def legacy_change_color(image: pg.Surface, color) -> pg.Surface:
+    coloured_image = pg.Surface(image.get_size())
+    coloured_image.fill(color)
+    final_image = image.copy()
+    final_image.blit(coloured_image, (0, 0), special_flags=pg.BLEND_MULT)
+    final_image.set_colorkey((0, 0, 0), pg.RLEACCEL)
+    return final_image
+
+
+def legacy_frames(sheet: pg.Surface, name: str) -> list[pg.Surface]:
+    sprites = [sheet.subsurface(pg.Rect(rect)) for rect in main.RYU_FRAMES[name]]
+    for sprite in sprites:
+        sprite.set_colorkey(main.BLUE, pg.RLEACCEL)
+    return [legacy_change_color(sprite, main.P2) for sprite in main.scale_sprite(sprites, 2.5)]
+
+
+def composited(sprite: pg.Surface) -> np.ndarray:
+    background = pg.Surface(sprite.get_size())
+    background.fill((50, 60, 70))
+    background.blit(sprite, (0, 0))
+    return pg.surfarray.array3d(background)
+
+
+def run():
+    pg.display.set_mode((1280, 720))
+    sheet = main.assets.get_image(main.RYU_SPRITES_PATH)
+
+    start = time.perf_counter()
+    legacy = {name: legacy_frames(sheet, name) for name in ANIMATIONS}
+    legacy_ms = (time.perf_counter() - start) * 1000
+    print(f'per-frame tint, every P2 animation   {legacy_ms:8.2f} ms')
+
+    print(f'\n{"costume":<10}{"sheet pass":>12}{"cold fighter":>14}{"cached fighter":>16}')
+    player = main.Player(main.RYU_SPRITES_PATH, 400, 620, 500, True, main.Direction.LEFT)
+    for costume in main.COSTUMES:
+        start = time.perf_counter()
+        main.assets.get_sheet(main.RYU_SPRITES_PATH, costume)
+        sheet_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        main.FighterSprites(player, costume)
+        cold_ms = (time.perf_counter() - start) * 1000 + sheet_ms
+        start = time.perf_counter()
+        main.FighterSprites(player, costume)
+        cached_ms = (time.perf_counter() - start) * 1000
+        print(f'{costume:<10}{sheet_ms:>12.2f}{cold_ms:>14.2f}{cached_ms:>16.3f}')
+
+    differing = 0
+    for name in ANIMATIONS:
+        frames = main.assets.get_frames(main.RYU_SPRITES_PATH, main.RYU_FRAMES[name], 2.5, 'p2')
+        for old, new in zip(legacy[name], frames):
+            differing += int(np.any(composited(old) != composited(new), axis=2).sum())
+    print(f'\nP2 frames differing from the per-frame tint: {differing} pixels')
+    print(f'asset cache: {main.assets.stats()}')
+
+
+if __name__ == '__main__':
+    run()
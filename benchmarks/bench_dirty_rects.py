@@ -0,0 +1,65 @@
+"""
+Per-frame cost and presented pixels of an AI-vs-AI fight drawn with full redraws against the dirty-rect
+renderer. Every dirty-rect frame is checked pixel for pixel against a full redraw of the same state.
+
+    python -m benchmarks.bench_dirty_rects
+"""
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+FRAMES = 2000
+
+
+def full_redraw(gm: main.GameManager, alpha: float) -> bytes:
+    """
+    :return: pixels of the current state drawn from scratch onto an off-screen surface
+    """
+    screen = gm.screen
+    gm.screen = gm.shown_background.copy()
+    gm.draw_top_bar()
+    gm.draw_fighters(alpha)
+    pixels = pg.image.tobytes(gm.screen, 'RGB')
+    gm.screen = screen
+    return pixels
+
+
+def verify(debug: bool):
+    gm = main.GameManager(debug, fps=0, dirty_rects=True)
+    gm.menu = False
+    for _ in range(FRAMES):
+        alpha = gm.advance(1 / 144, main.PlayerInput())
+        gm.update(alpha, 1 / 144)
+        if gm.simulation.winner:
+            gm.reset()
+            gm.menu = False
+            continue
+        assert pg.image.tobytes(gm.screen, 'RGB') == full_redraw(gm, alpha), 'dirty-rect frame differs'
+
+
+def run():
+    for debug in (False, True):
+        verify(debug)
+    print(f'dirty-rect frames match full redraws over {FRAMES} frames (with and without debug boxes)')
+
+    print(f'{"path":<10}{"ms/frame":>12}{"full":>8}{"px/frame":>12}{"of screen":>12}')
+    for name, dirty_rects in (('full', False), ('dirty', True)):
+        gm = main.GameManager(fps=0, dirty_rects=dirty_rects)
+        gm.menu = False
+
+        def frame():
+            gm.update(gm.advance(1 / 144, main.PlayerInput()), 1 / 144)
+
+        ms = measure(frame, FRAMES)
+        stats = gm.render_stats()
+        share = stats['presented_pixels_per_frame'] / stats['screen_pixels'] * 100
+        print(f'{name:<10}{ms:>12.4f}{stats["full_redraws"]:>8}{stats["presented_pixels_per_frame"]:>12.0f}'
+              f'{share:>11.1f}%')
+
+
+if __name__ == '__main__':
+    run()
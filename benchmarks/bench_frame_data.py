@@ -0,0 +1,180 @@
+"""
+Hurt/hit box queries through the compiled FrameData tables against the old get_hurt_box /
+get_hit_boxs_and_damage, which measured the scaled frames of the sprite sheet on every call.
+Before timing, every animation, frame and facing is checked to give exactly the boxes of the old path,
+rebuilt from the real frames and the original arithmetic rather than from Animation or the geometry functions.
+
+    python -m benchmarks.bench_frame_data
+"""
+import random
+
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+from pygame import Surface  # noqa: E402
+
+import main  # noqa: E402
+from main import Direction, State  # noqa: E402
+
+RUNS = 20000
+SCALER = 2.5
+
+# the frames the old Player cut from the sheet, by the name of the animation that replaced each list
+LEGACY_RECTS = {
+    'idle': [(0, 10, 70, 95), (70, 10, 70, 95), (140, 10, 70, 95), (205, 10, 70, 95), (270, 10, 70, 95)],
+    'move_forward': [(70, 130, 70, 90), (145, 130, 70, 90), (220, 130, 70, 90)],
+    'move_backward': [(295, 125, 70, 90), (365, 125, 65, 90), (425, 125, 65, 90), (490, 125, 65, 90)],
+    'attack': [
+        (0, 465, 70, 95), (80, 465, 70, 95), (160, 465, 125, 95),
+        (620, 465, 80, 95), (710, 465, 80, 95), (800, 465, 80, 95), (895, 460, 95, 105), (1000, 465, 95, 95),
+        (1105, 465, 110, 95), (1225, 470, 110, 90),
+        (290, 680, 70, 95), (370, 680, 95, 95), (475, 660, 85, 120),
+    ],
+    'guard': [(275, 355, 70, 100)],
+    'jump': [(0, 250, 65, 110), (65, 240, 65, 110), (130, 230, 65, 95), (190, 230, 65, 85), (255, 235, 60, 80),
+             (310, 235, 65, 90), (370, 250, 65, 105)],
+    'kick': [(10, 915, 65, 110), (85, 920, 70, 100), (160, 920, 120, 100), (280, 920, 70, 100),
+             (350, 920, 60, 100), (415, 920, 90, 100), (350, 920, 60, 100)],
+    'shoot_fireball': [(15, 1415, 80, 95), (110, 1415, 85, 95), (205, 1425, 95, 85), (310, 1430, 110, 80),
+                       (430, 1430, 130, 80)],
+}
+
+STATE_ANIMATIONS = {
+    State.IDLE: 'idle',
+    State.MOVE: 'move_forward',
+    State.GUARD: 'guard',
+    State.JUMP: 'jump',
+    State.ATTACK: 'attack',
+    State.KICK: 'kick',
+    State.SHOOT_FIREBALL: 'shoot_fireball',
+}
+
+
+def legacy_sprites() -> dict[str, list[Surface]]:
+    """
+    :return: the scaled frames of every animation, cut and scaled the way the old Player did
+    """
+    sheet = pg.image.load(main.RYU_SPRITES_PATH)
+    sprites = {}
+    for name, rects in LEGACY_RECTS.items():
+        frames = [sheet.subsurface(pg.Rect(rect)) for rect in rects]
+        sprites[name] = [
+            pg.transform.scale(sprite, (sprite.get_width() * SCALER, sprite.get_height() * SCALER))
+            for sprite in frames
+        ]
+    return sprites
+
+
+def legacy_hurt_box(player: main.Player, sprites: dict[str, list[Surface]]) -> pg.Rect:
+    current_sprites = sprites[player.current_animation.name]
+    new_idx = player.index % len(current_sprites)
+    w = current_sprites[new_idx].get_width()
+    h = current_sprites[new_idx].get_height()
+    d = current_sprites[new_idx].get_width() - sprites['idle'][0].get_width()
+    if player.direction == Direction.LEFT and d > 0:
+        return pg.Rect(player.x - int(d * 0.4), player.ground_y - h, int(w * 0.6), h - 25).move(0, 25)
+    return pg.Rect(player.x, player.ground_y - h, int(w * 0.6), h - 25).move(30, 25)
+
+
+def legacy_hit_boxes_and_damage(player: main.Player, sprites: dict[str, list[Surface]]) -> tuple[list[pg.Rect], int]:
+    current_sprites = sprites[player.current_animation.name]
+    h = current_sprites[player.index % len(current_sprites)].get_height()
+    left = player.direction == Direction.LEFT
+    origin = (player.x, player.ground_y - h)
+    match player.state, player.index:
+        case State.ATTACK, 2:
+            offset_x = 180
+            boxes = [pg.Rect(-140 if left else offset_x, 40, current_sprites[2].get_width() - offset_x, 25)]
+            damage = 10
+        case State.ATTACK, 9:
+            offset_xs = [190, 205, 230]
+            boxes = [
+                pg.Rect(-55 if left else offset_xs[-3], 30, current_sprites[8].get_width() - offset_xs[-3] - 50, 40),
+                pg.Rect(-70 if left else offset_xs[-2], 70, current_sprites[8].get_width() - offset_xs[-2] - 20, 40),
+                pg.Rect(-95 if left else offset_xs[-1], 110, current_sprites[9].get_width() - offset_xs[-1] - 10, 40),
+            ]
+            damage = 20
+        case State.ATTACK, 12:
+            offset_x = 160
+            boxes = [pg.Rect(-30 if left else offset_x, 0, current_sprites[12].get_width() - offset_x - 5, 100)]
+            damage = 30
+        case State.KICK, 2:
+            w = current_sprites[2].get_width()
+            offset_xs = [150, 200, 230]
+            boxes = [
+                pg.Rect(-20 if left else offset_xs[-3], 50, offset_xs[-2] - offset_xs[-3], 40),
+                pg.Rect(-50 if left else offset_xs[-2], 30, offset_xs[-1] - offset_xs[-2], 40),
+                pg.Rect(-120 if left else offset_xs[-1], 10, w - offset_xs[-1], 30),
+            ]
+            damage = 10
+        case State.KICK, 5:
+            w = current_sprites[5].get_width()
+            offset_xs = [120, 150]
+            boxes = [
+                pg.Rect(0 if left else offset_xs[-2], 110, w - offset_xs[-2] - 50, 30),
+                pg.Rect(-40 if left else offset_xs[-1], 140, w - offset_xs[-1] - 10, 30),
+            ]
+            damage = 15
+        case _:
+            return [], 0
+    return [box.move(origin) for box in boxes], damage
+
+
+def check_equivalence(player: main.Player, sprites: dict[str, list[Surface]]) -> int:
+    """
+    Query every (animation, frame, direction) at random positions, in every state for the hit boxes
+    :return: the number of queries checked
+    """
+    rng = random.Random(0)
+    checked = 0
+    for name, animation in player.animations.items():
+        if name not in LEGACY_RECTS:
+            # the fireball's frames were never a fighter's
+            continue
+        assert len(animation) == len(sprites[name]), name
+        states = [state for state, state_name in STATE_ANIMATIONS.items() if state_name == name] or [State.IDLE]
+        for index in range(len(animation)):
+            for direction in Direction:
+                for state in states:
+                    for _ in range(5):
+                        player.state = state
+                        player.set_animation(animation)
+                        player.index = index
+                        player.direction = direction
+                        player.x = rng.randint(-50, 1330)
+                        player.ground_y = rng.uniform(200, 620)
+                        assert player.get_hurt_box() == legacy_hurt_box(player, sprites), (name, index, direction)
+                        assert player.get_hit_boxs_and_damage() == legacy_hit_boxes_and_damage(player, sprites), \
+                            (state, index, direction)
+                        checked += 1
+    return checked
+
+
+def run():
+    pg.display.set_mode((1280, 720))
+    sprites = legacy_sprites()
+    player = main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, Direction.RIGHT)
+    print(f'equivalence: {check_equivalence(player, sprites)} queries match the old boxes')
+
+    player.state = State.ATTACK
+    player.set_animation(player.attack_animation)
+    player.index = 9
+    player.direction = Direction.LEFT
+    player.x = 600
+    player.ground_y = 541.3
+
+    print(f'{"query":<28}{"old us":>10}{"table us":>10}')
+    for name, legacy, compiled in (
+            ('get_hurt_box', legacy_hurt_box, player.get_hurt_box),
+            ('get_hit_boxs_and_damage', legacy_hit_boxes_and_damage, player.get_hit_boxs_and_damage),
+    ):
+        old = measure(lambda: legacy(player, sprites), RUNS) * 1000
+        new = measure(compiled, RUNS) * 1000
+        print(f'{name:<28}{old:>10.3f}{new:>10.3f}')
+    pg.quit()
+
+
+if __name__ == '__main__':
+    run()
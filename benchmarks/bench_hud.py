@@ -0,0 +1,99 @@
+"""
+Per-frame cost of the top bar: rendering the timer and name plates and drawing every bar each frame
+(the old draw_top_bar) against the text cache and the pre-composed HUD layer. Both paths are checked to
+draw the same pixels while the timer counts down and health and energy change.
+
+    python -m benchmarks.bench_hud
+"""
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+from main import BLUE, LIGHT_BLUE, RED, SOFT_GREEN  # noqa: E402
+
+FRAMES = 3000
+
+
+def legacy_top_bar(gm: main.GameManager):
+    time_text = gm.font_time.render(str(round(gm.simulation.timer)), True, (0, 0, 0))
+    gm.screen.blit(time_text, (550 + round(180 - time_text.get_width()) / 2, 50))
+    health_1 = gm.players[0].health
+    health_2 = gm.players[1].health
+    name_plate_1 = gm.font_player.render('Player 1', False, (0, 0, 0))
+    name_plate_2 = gm.font_player.render('Player 2', False, (0, 0, 0))
+    gm.screen.blit(name_plate_1, (50, 30))
+    gm.screen.blit(name_plate_2, (1230 - name_plate_2.get_width(), 30))
+
+    pg.draw.rect(gm.screen, RED, (50, 50 + round(time_text.get_height() / 2) - 15, 500, 30))
+    pg.draw.rect(gm.screen, SOFT_GREEN, (50, 35 + round(time_text.get_height() / 2), 500 - round(
+        500 / gm.max_health * (gm.max_health - health_1)) if health_1 > 0 else 0, 30))
+    pg.draw.rect(gm.screen, RED, (730, 50 + round(time_text.get_height() / 2) - 15, 500, 30))
+    pg.draw.rect(gm.screen, SOFT_GREEN, (730, 35 + round(time_text.get_height() / 2), 500 - round(
+        500 / gm.max_health * (gm.max_health - health_2)) if health_2 > 0 else 0, 30))
+
+    pg.draw.rect(gm.screen, LIGHT_BLUE, (50, 65 + (time_text.get_height() >> 1), 100, 15))
+    pg.draw.rect(gm.screen, BLUE, (50, 65 + (time_text.get_height() >> 1), gm.players[gm.player_idx].energy, 15))
+
+    pg.draw.rect(gm.screen, LIGHT_BLUE, (1130, 65 + (time_text.get_height() >> 1), 100, 15))
+    pg.draw.rect(gm.screen, BLUE,
+                 (1130, 65 + (time_text.get_height() >> 1), gm.players[1 - gm.player_idx].energy, 15))
+
+
+def scripted(gm: main.GameManager):
+    """
+    One frame of a round: the timer runs at 144 frames per second, a hit lands every 50 frames
+    """
+    frame = 0
+
+    def advance():
+        nonlocal frame
+        frame += 1
+        gm.simulation.timer = max(90 - frame / 144, 0)
+        if frame % 50 == 0:
+            player = gm.players[frame // 50 % 2]
+            player.health = max(player.health - 17, -10)
+            gm.players[1 - frame // 50 % 2].energy = min(frame // 50 * 10 % 110, 100)
+
+    return advance
+
+
+def run():
+    gm = main.GameManager(fps=0)
+    gm.poll_assets(block=True)
+    background = gm.bg_sprite.get_sprite()
+
+    for draw in (legacy_top_bar, main.GameManager.draw_top_bar):
+        gm.simulation.reset()
+        gm.text.hits = gm.text.misses = 0
+        advance = scripted(gm)
+        frames = []
+        for i in range(FRAMES):
+            advance()
+            gm.screen.blit(background, (0, 0))
+            draw(gm)
+            if i % 10 == 0:
+                frames.append(pg.image.tobytes(gm.screen, 'RGB'))
+        if draw is legacy_top_bar:
+            expected = frames
+        else:
+            assert frames == expected, 'HUD layer draws different pixels'
+    print(f'HUD layer matches the old top bar over {FRAMES} frames')
+    print(f'text cache over those frames: {gm.text.stats()}')
+
+    print(f'{"path":<10}{"ms/frame":>12}')
+    for name, draw in (('render', legacy_top_bar), ('cached', main.GameManager.draw_top_bar)):
+        gm.simulation.reset()
+        advance = scripted(gm)
+
+        def frame():
+            advance()
+            draw(gm)
+
+        print(f'{name:<10}{measure(frame, FRAMES):>12.4f}')
+
+
+if __name__ == '__main__':
+    run()
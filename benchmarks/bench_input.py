@@ -0,0 +1,51 @@
+"""
+Input pump under a burst of events: every posted key press must reach the player's subscriber, none may be
+handled by another screen, and no single pump may take more than max_events_per_pump events.
+
+    python -m benchmarks.bench_input
+"""
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+BURST = 1000
+
+
+def run():
+    gm = main.GameManager(fps=0)
+    gm.poll_assets(block=True)
+    gm.input.pump()
+    # click PLAYER 2 on the menu
+    player_2_button = gm.text.render(gm.font_option, "PLAYER 2", True, (255, 255, 255))
+    pg.event.post(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1,
+                                 pos=(gm.screen_width - 200 - player_2_button.get_width() // 2,
+                                      gm.screen_height // 2 - 100 + player_2_button.get_height() // 2)))
+    gm.input.pump()
+    assert not gm.menu and gm.player_idx == 1, 'menu click was not routed'
+
+    keys = (pg.K_a, pg.K_x, pg.K_SPACE, pg.K_f)
+    for i in range(BURST):
+        pg.event.post(pg.event.Event(pg.KEYDOWN, key=keys[i % len(keys)], mod=0, unicode='', scancode=0))
+    received = []
+    gm.input.subscribe((pg.KEYDOWN,), lambda event: received.append(event.key))
+    per_pump = []
+    while len(received) < BURST:
+        per_pump.append(gm.input.pump())
+    player_input = gm.read_input()
+    assert player_input.attack and player_input.kick and player_input.jump and player_input.fireball
+
+    pg.event.post(pg.event.Event(pg.QUIT))
+    gm.input.pump()
+    assert gm.game_over, 'quit was not routed'
+
+    print(f'{BURST} key presses delivered over {len(per_pump)} pumps, at most {max(per_pump)} per pump')
+    print(f'last event: {gm.input.recent(1)[0]}')
+    print(f'input stats: {gm.input.stats()}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,59 @@
+"""
+Key press to state change and key press to presented frame, measured by the built-in LatencyTracker while
+the real main loop runs against the AI at several frame caps. Attack and kick keys, and now and then jump,
+are posted every quarter second.
+
+    python -m benchmarks.bench_latency
+"""
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import time  # noqa: E402
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+SECONDS = 4.0
+KEYS = (pg.K_a, pg.K_x, pg.K_a, pg.K_x, pg.K_SPACE)
+
+
+def play(fps: int, dirty_rects: bool) -> main.LatencyTracker:
+    gm = main.GameManager(fps=fps, dirty_rects=dirty_rects)
+    # load the fight and draw it once first, so no timed press waits for either
+    gm.poll_assets(block=True)
+    gm.menu = False
+    gm.frame(0.0)
+    gm.clock.tick(gm.fps)
+    start = previous = next_press = time.perf_counter()
+    presses = 0
+    while time.perf_counter() - start < SECONDS and not gm.simulation.winner:
+        now = time.perf_counter()
+        if now >= next_press:
+            pg.event.post(pg.event.Event(pg.KEYDOWN, key=KEYS[presses % len(KEYS)], mod=0, unicode='',
+                                         scancode=0))
+            presses += 1
+            next_press = now + 0.25
+        gm.frame(now - previous)
+        previous = now
+        gm.clock.tick(gm.fps)
+    return gm.latency
+
+
+def run():
+    print(f'{"fps cap":<10}{"renderer":<10}{"action":<10}{"state p50":>10}{"p95":>8}'
+          f'{"present p50":>13}{"p95":>8}{"ignored":>9}')
+    for fps, dirty_rects in ((144, False), (60, False), (0, False), (0, True)):
+        report = play(fps, dirty_rects).report()
+        for action, stats in report.items():
+            if not stats['press_to_state']['count'] and not stats['ignored']:
+                continue
+            to_state, to_present = stats['press_to_state'], stats['press_to_present']
+            print(f'{fps or "none":<10}{"dirty" if dirty_rects else "full":<10}{action:<10}'
+                  f'{to_state["p50_ms"]:>10.2f}{to_state["p95_ms"]:>8.2f}'
+                  f'{to_present["p50_ms"]:>13.2f}{to_present["p95_ms"]:>8.2f}{stats["ignored"]:>9}')
+
+
+if __name__ == '__main__':
+    run()
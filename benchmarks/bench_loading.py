@@ -0,0 +1,72 @@
+"""
+The menu while the fight's assets load: each launch is a fresh process that either loads everything before its
+first frame, as GameManager.__init__ used to, or shows the menu at once and keeps drawing it while the AssetLoader
+works on background threads, converting a few assets per frame. Cold launches process the sprites from the source
+images, warm ones read the sprite atlas; times per asset job come from the loader.
+
+    python -m benchmarks.bench_loading
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, setup_headless
+
+setup_headless()
+
+LAUNCHES = 3
+LAUNCH = '''
+import time
+start = time.perf_counter()
+import json, sys
+import main
+gm = main.GameManager(fps=0, atlas_dir=sys.argv[2] or None)
+if sys.argv[1] == 'blocking':
+    gm.poll_assets(block=True)
+gm.frame(0.0)
+first_frame_ms = (time.perf_counter() - start) * 1000
+frame_ms = []
+while gm.bg_sprite is None:
+    frame = time.perf_counter()
+    gm.frame(1 / 144)
+    frame_ms.append((time.perf_counter() - frame) * 1000)
+    time.sleep(max(0.0, 1 / 144 - (time.perf_counter() - frame)))
+print(json.dumps({'first_frame_ms': first_frame_ms, 'ready_ms': (time.perf_counter() - start) * 1000,
+                  'menu_frames': len(frame_ms), 'max_frame_ms': max(frame_ms, default=0.0),
+                  'jobs': gm.loader.stats()}))
+'''
+
+
+def launch(mode: str, atlas_dir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', LAUNCH, mode, atlas_dir], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def run():
+    with tempfile.TemporaryDirectory() as atlas_dir:
+        launch('background', atlas_dir)
+        print(f'{"launch":<24}{"first frame":>13}{"fight ready":>13}{"menu frames":>13}{"max frame":>11}  ms, '
+              f'median of {LAUNCHES}')
+        jobs = {}
+        for sprites, directory in (('cold', ''), ('warm', atlas_dir)):
+            for mode in ('blocking', 'background'):
+                runs = [launch(mode, directory) for _ in range(LAUNCHES)]
+                jobs[sprites] = runs[-1]['jobs']
+                print(f'{f"{sprites}, {mode}":<24}' + ''.join(
+                    f'{statistics.median(run[field] for run in runs):>{width}.1f}'
+                    for field, width in (('first_frame_ms', 13), ('ready_ms', 13), ('menu_frames', 13),
+                                         ('max_frame_ms', 11))))
+
+    for sprites, stats in jobs.items():
+        print(f'\n{sprites} asset jobs{"":<28}{"load ms":>9}{"convert ms":>12}')
+        for name, times in stats.items():
+            print(f'  {name:<40}{times["load_ms"]:>9.1f}{times["convert_ms"]:>12.1f}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,107 @@
+"""
+Rollback netplay between two local processes over UDP on localhost, at several injected latencies and packet
+loss rates. Both sides play scripted inputs in real time at the tick rate until a fixed tick is settled; their
+final state must match each other and a plain Simulation run with the same inputs. Per side: rollbacks,
+resimulated ticks, rollback cost, stalls and packets.
+
+    python -m benchmarks.bench_netplay
+"""
+import multiprocessing
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import main  # noqa: E402
+from benchmarks.suite import scripted_input  # noqa: E402
+
+TICKS = 720
+INPUT_DELAY = 2
+SEED = 7
+# (delay in ms added to each packet, fraction of packets dropped), per side
+NETWORKS = ((0, 0.0), (20, 0.0), (50, 0.05), (100, 0.1))
+
+
+def side_input(side: int, tick: int) -> main.PlayerInput:
+    # the second side runs the same script half a cycle later, so both press keys at different ticks
+    return scripted_input(tick + side * 144)
+
+
+def delayed_input(side: int, tick: int, input_delay: int) -> main.PlayerInput:
+    return side_input(side, tick - input_delay) if tick >= input_delay else main.PlayerInput()
+
+
+def play(side: int, port: int, delay_ms: float, loss: float, results):
+    """
+    One side of the match; the host reports its port on ``results`` first, then each side its outcome
+    """
+    peer = None if side == 0 else ('127.0.0.1', port)
+    transport = main.UdpTransport(0, peer, '127.0.0.1', delay_ms, loss, seed=side)
+    if side == 0:
+        results.put(transport.port)
+    session = main.RollbackSession(side, transport, INPUT_DELAY)
+    simulation = main.Simulation(seed=SEED)
+    session.synchronize(simulation, SEED)
+
+    delta_t = simulation.delta_t
+    next_frame = time.perf_counter()
+    lingering = None
+    while lingering is None or time.perf_counter() < lingering:
+        session.poll()
+        if simulation.tick < TICKS and not simulation.winner:
+            session.advance(side_input(side, simulation.tick))
+        session.send()
+        if lingering is None and session.settled(TICKS):
+            # keep answering for a while in case the peer still misses our last packets
+            lingering = time.perf_counter() + 0.3
+        next_frame += delta_t
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    results.put((side, simulation.state_hash(), session.stats()))
+    transport.close()
+
+
+def reference_hash(input_delay: int) -> int:
+    """
+    :return: state hash after TICKS ticks of the same inputs without a network
+    """
+    simulation = main.Simulation(seed=SEED)
+    for tick in range(TICKS):
+        simulation.step([delayed_input(side, tick, input_delay) for side in (0, 1)])
+    return simulation.state_hash()
+
+
+def match(delay_ms: float, loss: float) -> dict[int, tuple[int, dict]]:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    host = context.Process(target=play, args=(0, 0, delay_ms, loss, results))
+    host.start()
+    port = results.get(timeout=60)
+    guest = context.Process(target=play, args=(1, port, delay_ms, loss, results))
+    guest.start()
+    outcome = {}
+    for _ in range(2):
+        side, state_hash, stats = results.get(timeout=120)
+        outcome[side] = state_hash, stats
+    host.join()
+    guest.join()
+    return outcome
+
+
+def run():
+    expected = reference_hash(INPUT_DELAY)
+    print(f'{TICKS} ticks per match, each side paced at 144 ticks/s\n')
+    print(f'{"delay":>6}{"loss":>6}{"side":>6}{"rollbacks":>11}{"resim ticks":>13}{"max depth":>11}'
+          f'{"mean ms":>9}{"max ms":>8}{"stalls":>8}{"sent":>7}{"dropped":>9}{"desyncs":>9}  state')
+    for delay_ms, loss in NETWORKS:
+        outcome = match(delay_ms, loss)
+        for side, (state_hash, stats) in sorted(outcome.items()):
+            state = 'matches' if state_hash == expected else 'DIFFERS'
+            print(f'{delay_ms:>6}{loss:>6.0%}{side:>6}{stats["rollbacks"]:>11}{stats["resimulated_ticks"]:>13}'
+                  f'{stats["max_rollback_ticks"]:>11}{stats["mean_rollback_ms"]:>9.3f}{stats["max_rollback_ms"]:>8.3f}'
+                  f'{stats["stalls"]:>8}{stats["packets_sent"]:>7}{stats["packets_dropped"]:>9}'
+                  f'{stats["desyncs"]:>9}  {state}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,45 @@
+"""
+Frame phases of an uncapped fight against the AI as seen by the FrameProfiler, and the cost of profiling:
+frame time with the profiler disabled, enabled, and enabled with the debug overlay.
+
+    python -m benchmarks.bench_profiler
+"""
+import os
+import tempfile
+
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import main  # noqa: E402
+
+FRAMES = 2000
+
+
+def fight(debug: bool, profile: bool) -> tuple[main.GameManager, float]:
+    gm = main.GameManager(debug, fps=0, profile=profile)
+    gm.menu = False
+    ms = measure(lambda: gm.frame(1 / 144), FRAMES)
+    return gm, ms
+
+
+def run():
+    print(f'{"profiler":<22}{"ms/frame":>10}')
+    for name, debug, profile in (('disabled', False, False), ('enabled', False, True),
+                                 ('enabled with overlay', True, True)):
+        gm, ms = fight(debug, profile)
+        print(f'{name:<22}{ms:>10.4f}')
+
+    print(f'\n{"phase":<12}{"mean":>8}{"p50":>8}{"p95":>8}{"p99":>8}  ms')
+    for phase, stats in gm.profiler.summary().items():
+        print(f'{phase:<12}{stats["mean_ms"]:>8.3f}{stats["p50_ms"]:>8.3f}{stats["p95_ms"]:>8.3f}'
+              f'{stats["p99_ms"]:>8.3f}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('profile.json', 'profile.csv'):
+            gm.profiler.export(os.path.join(directory, name))
+            print(f'exported {name}: {os.path.getsize(os.path.join(directory, name))} bytes')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,160 @@
+"""
+Per-frame cost of stepping and drawing N fireballs with the NumPy Projectiles store against one Python
+object per fireball (the old FireBall path: per-object collide, update and blit). Then a steady stream of
+spawns and despawns, about two fireballs in flight, with fresh objects against the slot pool: the time per tick
+and the bytes tracemalloc sees allocated during each step, at its peak within the step and still held after.
+
+    python -m benchmarks.bench_projectiles
+"""
+import tracemalloc
+
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+from main import Direction  # noqa: E402
+
+COUNTS = (1, 10, 100, 500, 1000)
+FRAMES = 50
+CHURN_WIDTH = 300
+CHURN_TICKS = 3000
+
+
+class ObjectFireBall:
+    def __init__(self, x, y, direction, animation):
+        self.x, self.y, self.direction, self.animation = x, y, direction, animation
+        self.index = 0
+        self.current_num_frames = 0
+
+    def get_hit_box(self) -> pg.Rect:
+        return pg.Rect(self.x, self.y, self.animation.get_width(self.index),
+                       self.animation.get_height(self.index) * 0.6).move(0, 30)
+
+    def collide(self, player, width: int = 1280) -> bool:
+        if player is None:
+            return self.x >= width or self.x <= 0
+        return self.get_hit_box().colliderect(player.get_hurt_box())
+
+    def update(self):
+        self.current_num_frames += 1
+        n = len(self.animation)
+        if self.current_num_frames >= 30:
+            self.current_num_frames = 0
+            self.index = n - 2 if self.index == n - 1 else n - 1 if self.index == n - 2 else self.index + 1
+        self.x += 5 if self.direction == Direction.RIGHT else -5
+
+
+def lanes(count: int):
+    """
+    Fireballs spread over the stage, the two owners in separate rows so they neither meet nor hit a fighter
+    """
+    for i in range(count):
+        owner = i % 2
+        yield 300 + (i * 7) % 680, 40 + owner * 150, Direction.RIGHT if owner else Direction.LEFT, owner
+
+
+def churn(spawn, step, ticks: int = CHURN_TICKS) -> tuple[float, float, int, int]:
+    """
+    Fire a fireball every 20 ticks across a ``CHURN_WIDTH`` px wide stage so that about two are in flight
+    :return: ms per tick, then the mean and largest bytes allocated at the peak of a step and the bytes
+        still allocated after all the steps, measured in a second run
+    """
+    t = 0
+
+    def tick():
+        nonlocal t
+        if t % 20 == 0:
+            spawn(100, 40, Direction.RIGHT, 0)
+        step()
+        t += 1
+
+    ms = measure(tick, ticks)
+    total = largest = 0
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for t in range(ticks):
+        if t % 20 == 0:
+            spawn(100, 40, Direction.RIGHT, 0)
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step()
+        peak = tracemalloc.get_traced_memory()[1] - current
+        total += peak
+        largest = max(largest, peak)
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return ms, total / ticks, largest, retained
+
+
+def run():
+    screen = pg.display.set_mode((1280, 720))
+    players = [
+        main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, Direction.RIGHT),
+        main.Player(main.RYU_SPRITES_PATH, 1050, 620, 500, True, Direction.LEFT),
+    ]
+    sprites = [main.FighterSprites(player) for player in players]
+    animation = players[0].fireball_animation
+
+    print(f'{"fireballs":>10}{"objects ms":>14}{"arrays ms":>14}')
+    for count in COUNTS:
+        fireballs = [ObjectFireBall(x, y, direction, animation) for x, y, direction, _ in lanes(count)]
+        owners = [owner for *_, owner in lanes(count)]
+
+        def object_frame():
+            for fb, owner in zip(fireballs, owners):
+                fb.collide(None) or fb.collide(players[1 - owner])
+                fb.update()
+                screen.blit(sprites[owner].get_fireball_frames().get(fb.index, fb.direction), (fb.x, fb.y))
+
+        projectiles = main.Projectiles(animation, capacity=count)
+        gm = main.GameManager.__new__(main.GameManager)
+        gm.screen, gm.fighter_sprites, gm.dirty_rects = screen, sprites, False
+        gm.simulation = main.Simulation.__new__(main.Simulation)
+        gm.simulation.projectiles = projectiles
+
+        def array_frame():
+            projectiles.step(players)
+            gm.draw_projectiles(1.0)
+
+        def respawn():
+            projectiles.clear()
+            for x, y, direction, owner in lanes(count):
+                projectiles.spawn(x, y, direction, owner)
+
+        objects = measure(object_frame, FRAMES)
+        respawn()
+        arrays = measure(array_frame, FRAMES)
+        assert len(projectiles) == count
+        print(f'{count:>10}{objects:>14.3f}{arrays:>14.3f}')
+
+    fireballs = []
+
+    def object_spawn(x, y, direction, owner):
+        fireballs.append(ObjectFireBall(x, y, direction, animation))
+
+    def object_step():
+        # what the old FireBall did every tick: leave the stage or hit the other fighter, else move on
+        for fb in fireballs[:]:
+            if fb.collide(None, CHURN_WIDTH) or fb.collide(players[1]):
+                fireballs.remove(fb)
+            else:
+                fb.update()
+
+    pool = main.Projectiles(animation, width=CHURN_WIDTH)
+    vectorized = main.Projectiles(animation, width=CHURN_WIDTH)
+    vectorized.scalar_step_limit = 0
+    print(f'\n{"churn":<12}{"ms/tick":>10}{"mean peak B":>14}{"max peak B":>12}{"retained B":>12}')
+    for name, spawn, step in (
+            ('objects', object_spawn, object_step),
+            ('pool', pool.spawn, lambda: pool.step(players)),
+            ('vectorized', vectorized.spawn, lambda: vectorized.step(players)),
+    ):
+        ms, mean_peak, max_peak, retained = churn(spawn, step)
+        print(f'{name:<12}{ms:>10.4f}{mean_peak:>14.0f}{max_peak:>12}{retained:>12}')
+    print(pool.stats())
+
+if __name__ == '__main__':
+    run()
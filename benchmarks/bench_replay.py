@@ -0,0 +1,67 @@
+"""
+Record a round played through GameManager with a scripted human side, then replay it headless at full
+speed and through GameManager at the recorded tick rate, checking the state hash of every tick.
+
+    python -m benchmarks.bench_replay
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import main  # noqa: E402
+from benchmarks.suite import scripted_input  # noqa: E402
+
+TICKS = 90 * 144
+
+
+def record(path: str) -> main.Recording:
+    gm = main.GameManager(fps=0, record_path=path)
+    gm.menu = False
+    tick = 0
+    while not gm.simulation.winner and tick < TICKS:
+        gm.advance(gm.simulation.delta_t, scripted_input(tick))
+        tick += 1
+    gm.save_recording()
+    return gm.recording
+
+
+def run():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'round.rec')
+        recorded = record(path)
+        size = os.path.getsize(path)
+        recording = main.Recording.load(path)
+    assert recording.ticks == recorded.ticks
+    print(f'recorded {len(recording)} ticks (seed {recording.seed}, winner after the last one: '
+          f'{recording.replay()[0].winner or "none"}) in {size} bytes')
+
+    start = time.perf_counter()
+    simulation, diverged = recording.replay()
+    elapsed = time.perf_counter() - start
+    assert diverged is None, f'headless replay diverged at tick {diverged}'
+    print(f'headless replay: {len(recording) / elapsed:,.0f} ticks/s '
+          f'({len(recording) / elapsed / recording.tick_rate:.0f}x real time), identical')
+
+    gm = main.GameManager(fps=0, replay=recording)
+    start = time.perf_counter()
+    while gm.simulation.tick < len(recording):
+        gm.update(gm.advance(gm.simulation.delta_t, main.PlayerInput()))
+    elapsed = time.perf_counter() - start
+    assert gm.diverged_at is None, f'rendered replay diverged at tick {gm.diverged_at}'
+    print(f'rendered replay: {len(recording) / elapsed:,.0f} frames/s, identical')
+
+    other = main.Recording.of(main.Simulation(seed=recording.seed + 1))
+    simulation = other.simulation()
+    for tick in range(len(recording)):
+        simulation.step(recording.inputs(tick))
+        if simulation.state_hash() != recording.state_hash(tick):
+            print(f'same inputs with another AI seed diverge at tick {tick}, as they should')
+            break
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,57 @@
+"""
+RETRY latency: GameManager.reset against legacy_reset, the work reset did before it kept its assets
+(display, fonts, stage GIFs, sprite sheet and both fighters).
+
+    python -m benchmarks.bench_reset
+"""
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+from main import Direction  # noqa: E402
+
+RUNS = 20
+
+
+def legacy_reset(gm: main.GameManager) -> tuple[list, list]:
+    """
+    The baseline reset: set the display mode again, open the four SysFonts, decode the stage GIFs and rebuild
+    both fighters, each from its own freshly loaded sheet and sounds with nothing cached
+    :return: the stage frames and the (player, sprites) pairs
+    """
+    gm.screen = pg.display.set_mode((gm.screen_width, gm.screen_height))
+    gm.font_time = pg.font.SysFont('comicsans', 80, True, True)
+    gm.font_player = pg.font.SysFont('impact', 40, False, False)
+    gm.font_menu = pg.font.SysFont('consolas', 40, True, False)
+    gm.font_option = pg.font.SysFont('consolas', 80, True, False)
+    stage = [pg.image.load(path).convert() for path in main.KEN_STAGE_PATHS]
+    fighters = []
+    for x, p2, direction in ((50, False, Direction.RIGHT), (gm.screen_width - 230, True, Direction.LEFT)):
+        main.assets = main.AssetManager()
+        player = main.Player(main.RYU_SPRITES_PATH, x, 620, gm.max_health, p2, direction)
+        main.assets.get_sound(main.PUNCH_SOUND_PATH)
+        main.assets.get_sound(main.HADOUKEN_SOUND_PATH)
+        fighters.append((player, main.FighterSprites(player, 'default')))
+    return stage, fighters
+
+
+def run():
+    gm = main.GameManager()
+    gm.poll_assets(block=True)
+    pg.mixer.init()
+    cached = main.assets
+    legacy = measure(lambda: legacy_reset(gm), RUNS)
+    main.assets = cached
+    reset = measure(gm.reset, RUNS * 100)
+    print(f'{"path":<32}{"ms":>12}')
+    print(f'{"legacy_reset (baseline work)":<32}{legacy:>12.3f}')
+    print(f'{"reset":<32}{reset:>12.4f}')
+    print(f'{"speedup":<32}{legacy / reset:>11.0f}x')
+    pg.quit()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,75 @@
+"""
+Snapshot and restore cost of a mid-fight Simulation, checked to bring back the exact state, then short
+rounds of the SearchAI against the built-in AIController with one tick per frame and the default frame budget,
+with the time get_input took each frame.
+
+    python -m benchmarks.bench_search_ai
+"""
+import time
+
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import main  # noqa: E402
+
+ROUNDS = 4
+ROUND_TIME = 20.0
+
+
+def mid_fight() -> main.Simulation:
+    simulation = main.Simulation(seed=1)
+    while len(simulation.projectiles) < 2:
+        simulation.step((None, None))
+    return simulation
+
+
+def check_restore(simulation: main.Simulation):
+    snapshot = simulation.snapshot()
+    before = simulation.state_hash()
+    hashes = []
+    for _ in range(200):
+        simulation.step((main.PlayerInput(attack=True), main.PlayerInput(fireball=True)))
+        hashes.append(simulation.state_hash())
+    simulation.restore(snapshot)
+    assert simulation.state_hash() == before, 'restore did not bring the state back'
+    for expected in hashes:
+        simulation.step((main.PlayerInput(attack=True), main.PlayerInput(fireball=True)))
+        assert simulation.state_hash() == expected, 'stepping a restored state played out differently'
+    simulation.restore(snapshot)
+
+
+def run():
+    simulation = mid_fight()
+    check_restore(simulation)
+    snapshot = simulation.snapshot()
+    print(f'snapshot {measure(simulation.snapshot, 20000) * 1000:.2f} us, '
+          f'restore {measure(lambda: simulation.restore(snapshot), 20000) * 1000:.2f} us, '
+          f'step {measure(lambda: (simulation.step((None, None)), simulation.restore(snapshot)), 5000) * 1000:.2f} us '
+          f'(with a restore), state brought back exactly')
+
+    search_ai = main.SearchAI()
+    results = []
+    frame_ms = []
+    for seed in range(ROUNDS):
+        simulation = main.Simulation(round_time=ROUND_TIME, seed=seed)
+        while not simulation.winner:
+            search_ai.begin_frame()
+            start = time.perf_counter()
+            player_input = search_ai.get_input(simulation, 0)
+            frame_ms.append((time.perf_counter() - start) * 1000)
+            simulation.step((player_input, None))
+        results.append((simulation.winner, simulation.players[0].health, simulation.players[1].health))
+
+    print(f'\n{"round":<8}{"winner":<12}{"search AI hp":>14}{"AI hp":>8}')
+    for i, (winner, search_health, ai_health) in enumerate(results):
+        print(f'{i:<8}{winner:<12}{search_health:>14}{ai_health:>8}')
+    print(f'\n{search_ai.stats()}')
+    frame_ms.sort()
+    print(f'get_input per frame: p50 {frame_ms[len(frame_ms) // 2]:.3f} ms, '
+          f'p99 {frame_ms[len(frame_ms) * 99 // 100]:.3f} ms, max {frame_ms[-1]:.3f} ms '
+          f'against a {search_ai.frame_budget_ns / 1e6:.1f} ms frame budget')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,32 @@
+"""
+Headless simulation throughput: AI-vs-AI ticks per second through Simulation.step,
+without opening a window or loading any image.
+
+    python -m benchmarks.bench_simulation
+"""
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import main  # noqa: E402
+
+MATCHES = 5
+
+
+def run():
+    ticks = 0
+    start = time.perf_counter()
+    for seed in range(MATCHES):
+        simulation = main.Simulation(seed=seed)
+        while not simulation.winner:
+            simulation.step((None, None))
+        ticks += simulation.tick
+    elapsed = time.perf_counter() - start
+    print(f'{MATCHES} matches, {ticks} ticks in {elapsed:.2f} s: {ticks / elapsed:,.0f} ticks/s '
+          f'({ticks / elapsed / 144:.0f}x real time at 144 ticks/s)')
+
+
+if __name__ == '__main__':
+    run()
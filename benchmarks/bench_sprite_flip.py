@@ -0,0 +1,67 @@
+"""
+Per-frame cost of drawing a LEFT-facing fighter and fireball: flipping every frame
+(the old get_sprite path) against the pre-flipped OrientedSprites lookup.
+
+    python -m benchmarks.bench_sprite_flip
+"""
+from benchmarks.common import setup_headless, measure
+
+setup_headless()
+
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+
+FRAMES = 5000
+
+
+def legacy_frame(player, fireball, sprites):
+    player.update()
+    fireball.step([])
+    player_frames = sprites.animations[player.current_animation.name]
+    fireball_frames = sprites.get_fireball_frames()
+    return (
+        pg.transform.flip(player_frames[player.index % len(player_frames)], True, False),
+        pg.transform.flip(fireball_frames[fireball.frame[0]], True, False),
+    )
+
+
+def cached_frame(player, fireball, sprites):
+    player.update()
+    fireball.step([])
+    return sprites.get_sprite(player), sprites.get_fireball_frames().flipped[fireball.frame[0]]
+
+
+def allocations(frame, player, fireball, sprites) -> tuple[float, float]:
+    """
+    :return: (new surfaces, new pixel bytes) allocated per frame
+    """
+    known = {id(sprite) for frames in sprites.animations.values() for sprite in frames + frames.flipped}
+    surfaces = 0
+    pixel_bytes = 0
+    for _ in range(FRAMES):
+        for sprite in frame(player, fireball, sprites):
+            if id(sprite) not in known:
+                surfaces += 1
+                pixel_bytes += sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+    return surfaces / FRAMES, pixel_bytes / FRAMES
+
+
+def run():
+    pg.display.set_mode((1280, 720))
+    player = main.Player(main.RYU_SPRITES_PATH, 1050, 620, 500, True, main.Direction.LEFT)
+    sprites = main.FighterSprites(player)
+    player.set_animation(player.attack_animation)
+    player.state = main.State.ATTACK
+    fireball = main.Projectiles(player.fireball_animation, capacity=1, width=10 ** 9)
+    fireball.spawn(10 ** 8, 390, main.Direction.LEFT, 1)
+
+    print(f'{"path":<10}{"ms/frame":>12}{"surfaces":>12}{"pixel B":>12}')
+    for name, frame in (('flip', legacy_frame), ('cached', cached_frame)):
+        ms = measure(lambda: frame(player, fireball, sprites), FRAMES)
+        surfaces, pixel_bytes = allocations(frame, player, fireball, sprites)
+        print(f'{name:<10}{ms:>12.4f}{surfaces:>12.1f}{pixel_bytes:>12.0f}')
+
+
+if __name__ == '__main__':
+    run()
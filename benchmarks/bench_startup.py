@@ -0,0 +1,74 @@
+"""
+Time to the first menu frame by startup phase, each launch a fresh process with a warm sprite atlas. The lazy
+startup of main.py is compared with the work the old one did up front as well: pg.init() of every subsystem,
+SysFont lookups of the system fonts and decoding the sound effects and music. The fight's sprites load behind
+the menu and audio after the first frame, both on background threads; their times are shown separately.
+
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import ROOT, setup_headless
+
+setup_headless()
+
+LAUNCHES = 5
+LAUNCH = '''
+import time
+start = time.perf_counter()
+import json, sys
+import pygame as pg
+import main
+phases = {'imports': (time.perf_counter() - start) * 1000}
+if sys.argv[1] == 'eager':
+    eager = time.perf_counter()
+    pg.init()
+    for args in (('comicsans', 80, True, True), ('impact', 40), ('consolas', 40, True), ('consolas', 80, True),
+                 ('consolas', 16)):
+        pg.font.SysFont(*args)
+    main.assets.get_sound(main.PUNCH_SOUND_PATH)
+    main.assets.get_sound(main.HADOUKEN_SOUND_PATH)
+    pg.mixer.music.load(main.MUSIC_PATH)
+    phases['pg.init, SysFont, audio'] = (time.perf_counter() - eager) * 1000
+gm = main.GameManager(fps=0, atlas_dir=sys.argv[2])
+gm.frame(0.0)
+gm.startup.mark('first frame')
+phases.update(gm.startup.phases)
+phases['to first frame'] = (time.perf_counter() - start) * 1000
+gm.poll_assets(block=True)
+phases.update(gm.startup.phases)
+phases['to fight ready'] = (time.perf_counter() - start) * 1000
+audio = time.perf_counter()
+gm.load_audio()
+phases['audio, after it'] = (time.perf_counter() - audio) * 1000
+print(json.dumps(phases))
+'''
+
+
+def launch(mode: str, atlas_dir: str) -> dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', LAUNCH, mode, atlas_dir], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def run():
+    with tempfile.TemporaryDirectory() as atlas_dir:
+        launch('lazy', atlas_dir)
+        runs = {mode: [launch(mode, atlas_dir) for _ in range(LAUNCHES)] for mode in ('eager', 'lazy')}
+
+    phases = list(dict.fromkeys(phase for mode in ('eager', 'lazy') for phase in runs[mode][0]))
+    print(f'{"phase":<26}{"eager":>9}{"lazy":>9}  ms, median of {LAUNCHES} launches')
+    for phase in phases:
+        row = [statistics.median(launch[phase] for launch in runs[mode]) if phase in runs[mode][0] else None
+               for mode in ('eager', 'lazy')]
+        print(f'{phase:<26}' + ''.join(f'{"-" if ms is None else f"{ms:.1f}":>9}' for ms in row))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,38 @@
+"""
+Tournament throughput against the number of worker processes: the same batch of short AI-vs-AI rounds is played
+with 1, 2, 4, ... workers up to the number of cores, pool start-up included.
+
+    python -m benchmarks.bench_tournament
+"""
+import os
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import tournament  # noqa: E402
+
+MATCHES = 32
+ROUND_TIME = 20.0
+
+
+def run():
+    cores = os.cpu_count() or 1
+    tasks = [(0, {}, {}, seed, seed % 2, ROUND_TIME) for seed in range(MATCHES)]
+    counts = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    print(f'{MATCHES} rounds of {ROUND_TIME:.0f} s on {cores} cores\n')
+    print(f'{"workers":<10}{"seconds":>9}{"matches/s":>11}{"speed-up":>10}{"efficiency":>12}')
+    single = None
+    for workers in counts:
+        start = time.perf_counter()
+        records = tournament.play(tasks, workers)
+        elapsed = time.perf_counter() - start
+        assert len(records) == MATCHES
+        single = single or elapsed
+        print(f'{workers:<10}{elapsed:>9.2f}{MATCHES / elapsed:>11.2f}{single / elapsed:>10.2f}'
+              f'{single / elapsed / workers:>12.0%}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,274 @@
+"""
+Benchmark suite for the engine's hot paths, headless under the SDL dummy drivers. Every benchmark is timed
+``--repeats`` times; the per-repeat timings and their median go to a JSON file with stable key order. With
+``--baseline`` the medians are compared against an earlier result file and the run fails when any of them
+is more than ``--threshold`` slower.
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from benchmarks.common import setup_headless
+
+setup_headless()
+
+import numpy as np  # noqa: E402
+import pygame as pg  # noqa: E402
+
+import main  # noqa: E402
+from main import Direction, State  # noqa: E402
+
+# 90 seconds of play at the default tick rate
+MATCH_TICKS = 90 * 144
+SCRIPT = (
+    main.PlayerInput(right=True),
+    main.PlayerInput(attack=True),
+    main.PlayerInput(left=True),
+    main.PlayerInput(kick=True),
+    main.PlayerInput(guard=True),
+    main.PlayerInput(jump=True),
+    main.PlayerInput(right=True),
+    main.PlayerInput(fireball=True),
+)
+
+
+def scripted_input(tick: int) -> main.PlayerInput:
+    """
+    The human side of the scripted match: a new action every quarter second, keys held in between
+    """
+    player_input = SCRIPT[tick // 36 % len(SCRIPT)]
+    return player_input if tick % 36 == 0 else player_input.without_presses()
+
+
+def fighters() -> tuple[main.Player, main.Player, main.FighterSprites]:
+    player = main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, Direction.RIGHT)
+    opponent = main.Player(main.RYU_SPRITES_PATH, 400, 620, 500, True, Direction.LEFT)
+    return player, opponent, main.FighterSprites(player)
+
+
+def bench_player_init():
+    return lambda: main.Player(main.RYU_SPRITES_PATH, 50, 620, 500, False, Direction.RIGHT)
+
+
+def bench_fighter_sprites_init():
+    player, *_ = fighters()
+    return lambda: main.FighterSprites(player)
+
+
+def bench_get_sprite():
+    player, _, sprites = fighters()
+    player.set_animation(player.attack_animation)
+
+    def get_sprite():
+        player.index = (player.index + 1) % len(player.attack_animation)
+        player.direction = Direction.LEFT if player.index % 2 else Direction.RIGHT
+        return sprites.get_sprite(player)
+
+    return get_sprite
+
+
+def bench_get_hurt_box():
+    player, *_ = fighters()
+    player.set_animation(player.kick_animation)
+    player.state = State.KICK
+    return player.get_hurt_box
+
+
+def bench_get_hit_boxs_and_damage():
+    player, *_ = fighters()
+    player.set_animation(player.attack_animation)
+    player.state = State.ATTACK
+    player.index = 2
+    return player.get_hit_boxs_and_damage
+
+
+def bench_projectiles_step():
+    """
+    Ten fireballs checked against both fighters and each other, the FireBall.collide path of old
+    """
+    player, opponent, _ = fighters()
+    projectiles = main.Projectiles(player.fireball_animation)
+
+    def step():
+        projectiles.clear()
+        for i in range(10):
+            owner = i % 2
+            projectiles.spawn(150 + i * 60, 390 - owner * 200, Direction.RIGHT if owner else Direction.LEFT, owner)
+        projectiles.step([player, opponent])
+
+    return step
+
+
+def bench_costume_sheet():
+    sheet = main.assets.get_image(main.RYU_SPRITES_PATH)
+    rects = main.SHEET_RECTS[main.RYU_SPRITES_PATH]
+    area = pg.Rect(rects[0]).unionall([pg.Rect(rect) for rect in rects])
+    return lambda: main.COSTUMES['p2'].apply(sheet, area, rects)
+
+
+def bench_scale_sprite():
+    sheet = main.assets.get_image(main.RYU_SPRITES_PATH)
+    frames = [sheet.subsurface(rect) for rect in main.RYU_FRAMES['attack']]
+    return lambda: main.scale_sprite(frames, 2.5)
+
+
+def game_manager(dirty_rects: bool) -> main.GameManager:
+    gm = main.GameManager(fps=0, dirty_rects=dirty_rects)
+    gm.menu = False
+    gm.simulation.reset(seed=0)
+    for tick in range(300):
+        gm.advance(gm.simulation.delta_t, scripted_input(tick))
+    return gm
+
+
+def bench_update_frame():
+    gm = game_manager(False)
+    return lambda: gm.update(0.5, 1 / 144)
+
+
+def bench_update_frame_dirty_rects():
+    gm = game_manager(True)
+    gm.update(0.5, 1 / 144)
+
+    def update():
+        # move the fighters so every frame has changed areas to restore and present
+        gm.advance(gm.simulation.delta_t, main.PlayerInput())
+        gm.update(0.5, 1 / 144)
+
+    return update
+
+
+def bench_match_headless():
+    def match():
+        simulation = main.Simulation(seed=0)
+        for tick in range(MATCH_TICKS):
+            simulation.step((scripted_input(tick), None))
+            if simulation.winner:
+                simulation.reset(simulation.seed + 1)
+
+    return match
+
+
+def bench_match_rendered():
+    def match():
+        gm = main.GameManager(fps=0)
+        gm.menu = False
+        gm.simulation.reset(seed=0)
+        for tick in range(MATCH_TICKS):
+            gm.update(gm.advance(gm.simulation.delta_t, scripted_input(tick)))
+            if gm.simulation.winner:
+                gm.simulation.reset(gm.simulation.seed + 1)
+
+    return match
+
+
+# name: (setup returning the callable to time, calls per repeat)
+BENCHMARKS = {
+    'player_init': (bench_player_init, 200),
+    'fighter_sprites_init': (bench_fighter_sprites_init, 200),
+    'get_sprite': (bench_get_sprite, 20000),
+    'get_hurt_box': (bench_get_hurt_box, 20000),
+    'get_hit_boxs_and_damage': (bench_get_hit_boxs_and_damage, 20000),
+    'projectiles_step': (bench_projectiles_step, 2000),
+    'costume_sheet': (bench_costume_sheet, 20),
+    'scale_sprite': (bench_scale_sprite, 200),
+    'update_frame': (bench_update_frame, 500),
+    'update_frame_dirty_rects': (bench_update_frame_dirty_rects, 500),
+    'match_headless': (bench_match_headless, 1),
+    'match_rendered': (bench_match_rendered, 1),
+}
+
+
+def time_benchmark(setup, number: int, repeats: int) -> list[float]:
+    """
+    :return: mean milliseconds per call of each repeat
+    """
+    fn = setup()
+    fn()
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) * 1000 / number)
+    return runs
+
+
+def run_suite(names: list[str], repeats: int) -> dict:
+    results = {}
+    for name in names:
+        setup, number = BENCHMARKS[name]
+        runs = time_benchmark(setup, number, repeats)
+        results[name] = {
+            'number': number,
+            'runs_ms': [round(ms, 6) for ms in runs],
+            'median_ms': round(statistics.median(runs), 6),
+            'min_ms': round(min(runs), 6),
+        }
+        print(f'{name:<28}{results[name]["median_ms"]:>12.4f} ms', file=sys.stderr)
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'pygame': pg.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeats': repeats,
+        },
+        'benchmarks': results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    :return: one line per benchmark whose median is more than ``threshold`` slower than the baseline's
+    """
+    regressions = []
+    print(f'\n{"benchmark":<28}{"baseline":>12}{"current":>12}{"change":>10}', file=sys.stderr)
+    for name, current in results['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            continue
+        change = current['median_ms'] / before['median_ms'] - 1
+        print(f'{name:<28}{before["median_ms"]:>12.4f}{current["median_ms"]:>12.4f}{change:>+10.1%}', file=sys.stderr)
+        if change > threshold:
+            regressions.append(f'{name}: {before["median_ms"]:.4f} -> {current["median_ms"]:.4f} ms ({change:+.1%})')
+    return regressions
+
+
+def run(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Headless benchmark suite')
+    parser.add_argument('--output', help='write the results as JSON to this file, stdout when omitted')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='fail when a median is slower than the baseline by more than this fraction')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='run only these benchmarks')
+    args = parser.parse_args(argv)
+
+    pg.display.set_mode((1280, 720))
+    results = run_suite(args.only, args.repeats)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print('\nregressions:\n  ' + '\n  '.join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -1,8 +1,25 @@
+import argparse
+import bisect
+import csv
+import hashlib
+import json
 import logging as log
+import mmap
+import os
 import random
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from typing import NamedTuple, Sequence
 
+import numpy as np
 import pygame as pg
 from pygame.surface import Surface
 
@@ -13,7 +30,6 @@ RED = (255, 0, 0)
 P2 = (127, 255, 0)
 
 log.basicConfig(level=log.DEBUG)
-pg.init()
 
 KEN_STAGE_PATHS = [
     'assets/KenStage/frame_0_delay-0.2s.gif',
@@ -24,6 +40,109 @@ KEN_STAGE_PATHS = [
 ]
 
 RYU_SPRITES_PATH = 'assets/Ryu.png'
+PUNCH_SOUND_PATH = 'assets/sound/punch.mp3'
+HADOUKEN_SOUND_PATH = 'assets/sound/hadouken.mp3'
+MUSIC_PATH = 'assets/sound/guile-theme.mp3'
+# TTF files loaded by path by load_font, named after the fonts the game asks for
+FONT_DIR = 'assets/fonts'
+# processed sprite atlases, one file per combination of sources and processing parameters
+ATLAS_DIR = '.cache/atlas'
+
+# (x, y, w, h) of every frame on the Ryu sprite sheet, per animation
+RYU_FRAMES: dict[str, tuple[tuple[int, int, int, int], ...]] = {
+    'idle': (
+        (0, 10, 70, 95),
+        (70, 10, 70, 95),
+        (140, 10, 70, 95),
+        (205, 10, 70, 95),
+        (270, 10, 70, 95),
+    ),
+    'move_forward': (
+        (70, 130, 70, 90),
+        (145, 130, 70, 90),
+        (220, 130, 70, 90),
+    ),
+    'move_backward': (
+        (295, 125, 70, 90),
+        (365, 125, 65, 90),
+        (425, 125, 65, 90),
+        (490, 125, 65, 90),
+    ),
+    'attack': (
+        # first animation
+        (0, 465, 70, 95),
+        (80, 465, 70, 95),
+        (160, 465, 125, 95),
+        # second animation
+        (620, 465, 80, 95),
+        (710, 465, 80, 95),
+        (800, 465, 80, 95),
+        (895, 460, 95, 105),
+        (1000, 465, 95, 95),
+        (1105, 465, 110, 95),
+        (1225, 470, 110, 90),
+        # third animation
+        (290, 680, 70, 95),
+        (370, 680, 95, 95),
+        (475, 660, 85, 120),
+    ),
+    'guard': (
+        (275, 355, 70, 100),
+    ),
+    'jump': (
+        (0, 250, 65, 110),
+        (65, 240, 65, 110),
+        (130, 230, 65, 95),
+        (190, 230, 65, 85),
+        (255, 235, 60, 80),
+        (310, 235, 65, 90),
+        (370, 250, 65, 105),
+    ),
+    'kick': (
+        # first animation
+        (10, 915, 65, 110),
+        (85, 920, 70, 100),
+        (160, 920, 120, 100),
+        (280, 920, 70, 100),
+        # second animation
+        (350, 920, 60, 100),
+        (415, 920, 90, 100),
+        (350, 920, 60, 100),
+    ),
+    'shoot_fireball': (
+        (15, 1415, 80, 95),
+        (110, 1415, 85, 95),
+        (205, 1425, 95, 85),
+        (310, 1430, 110, 80),
+        (430, 1430, 130, 80),
+    ),
+    'fireball': (
+        (580, 1425, 45, 65),
+        (640, 1425, 50, 65),
+        (695, 1425, 60, 65),
+        (760, 1425, 60, 65),
+    ),
+}
+
+# every frame cut from each sheet, the only pixels a costume recolours
+SHEET_RECTS = {
+    RYU_SPRITES_PATH: tuple(rect for rects in RYU_FRAMES.values() for rect in rects),
+}
+
+# seconds each frame of the sheet animations is shown, the fireball's longer than the fighter's
+RYU_FRAME_DURATIONS = {
+    name: (5 / 24 if name == 'fireball' else 5 / 36,) * len(rects) for name, rects in RYU_FRAMES.items()
+}
+
+# pixels per second of simulated time, spread over the ticks of the simulation's tick rate
+WALK_SPEED = 576
+FIREBALL_SPEED = 720
+# a jump peaks this many pixels up, this many seconds after take-off
+JUMP_HEIGHT = 366
+JUMP_RISE = 5 / 12
+
+# shown for a GIF frame without a delay of its own, as browsers do
+GIF_DEFAULT_DELAY = 0.1
 
 
 def scale_sprite(sprites: list[Surface], scaler: float) -> list[Surface]:
@@ -33,9 +152,20 @@ def scale_sprite(sprites: list[Surface], scaler: float) -> list[Surface]:
     ]
 
 
-def set_color_sprites(sprites: list[Surface], color):
+def whole(value: float) -> int | float:
+    """
+    :return: ``value`` as an int when it has no fraction, so positions stay whole pixels where the speeds allow
+    """
+    return int(value) if value == int(value) else value
+
+
+def lerp(a: float, b: float, alpha: float) -> float:
+    return a + (b - a) * alpha
+
+
+def flip_sprites(sprites: list[Surface]) -> list[Surface]:
     return [
-        change_color(sprite, color) for sprite in sprites
+        pg.transform.flip(sprite, True, False) for sprite in sprites
     ]
 
 
@@ -44,6 +174,509 @@ class Direction(Enum):
     RIGHT = 1
 
 
+class OrientedSprites(tuple):
+    """
+    Animation frames together with their mirrored copies, built once at load time
+    so that drawing a LEFT-facing frame is a plain lookup instead of a flip.
+    """
+    flipped: tuple[Surface, ...]
+
+    def __new__(cls, sprites, flipped=None):
+        self = super().__new__(cls, sprites)
+        self.flipped = tuple(flipped if flipped is not None else flip_sprites(list(sprites)))
+        return self
+
+    def get(self, index: int, direction: Direction) -> Surface:
+        if direction == Direction.LEFT:
+            return self.flipped[index]
+        return self[index]
+
+
+class Costume(NamedTuple):
+    """
+    A recolouring of a whole fighter sheet: exact sheet colours swapped for others, then every colour multiplied by
+    ``tint`` the way BLEND_MULT does. The colorkey is left alone.
+    """
+    name: str
+    tint: tuple[int, int, int] = (255, 255, 255)
+    palette: tuple[tuple[tuple[int, int, int], tuple[int, int, int]], ...] = ()
+
+    def apply(self, sheet: Surface, area: pg.Rect, rects: Sequence[tuple[int, int, int, int]]) -> Surface:
+        """
+        :return: a copy of ``area`` of the sheet with every pixel inside ``rects`` recoloured, in one pass
+        """
+        if sheet.get_bitsize() == 32:
+            recoloured = sheet.subsurface(area).copy()
+        else:
+            # one packed integer per pixel, so each colour test is a single comparison
+            recoloured = pg.Surface(area.size, 0, 32)
+            recoloured.blit(sheet, (0, 0), area)
+        pixels = pg.surfarray.pixels2d(recoloured)
+        # frames overlap on the sheet, a mask keeps every pixel from being recoloured twice
+        covered = np.zeros(pixels.shape, dtype=bool)
+        for x, y, w, h in rects:
+            covered[x - area.x:x - area.x + w, y - area.y:y - area.y + h] = True
+        covered &= pixels != recoloured.map_rgb(BLUE)
+        values = pixels[covered]
+        for source, target in self.palette:
+            values[values == recoloured.map_rgb(source)] = recoloured.map_rgb(target)
+        if self.tint != (255, 255, 255):
+            tinted = values & ~np.uint32(sum(recoloured.get_masks()[:3]))
+            for shift, tint in zip(recoloured.get_shifts(), self.tint):
+                # BLEND_MULT rounding
+                tinted |= ((values >> shift & 0xFF) * tint + 255) >> 8 << shift
+            values = tinted
+        pixels[covered] = values
+        del pixels
+        return recoloured
+
+
+COSTUMES = {costume.name: costume for costume in (
+    Costume('default'),
+    Costume('p2', tint=P2),
+    Costume('shadow', tint=(110, 110, 150)),
+    # the gi and its shades in red
+    Costume('crimson', palette=(
+        ((247, 247, 247), (248, 112, 96)),
+        ((224, 224, 192), (224, 64, 48)),
+        ((208, 192, 160), (192, 40, 32)),
+        ((176, 160, 128), (144, 24, 24)),
+    )),
+)}
+
+
+class AssetManager:
+    """
+    Process-wide cache of decoded sheets, processed frame lists and sounds.
+    Everything handed out is shared between fighters and fireballs and must be treated as read-only.
+    """
+
+    def __init__(self, display_format: bool = True):
+        """
+        :param display_format: convert images to the display's format as they are decoded, when there is a display
+        """
+        self.display_format = display_format
+        self.images: dict[str, Surface] = {}
+        # recoloured sheets by (path, costume)
+        self.sheets: dict[tuple[str, str], Surface] = {}
+        self.frames: dict[tuple, tuple[Surface, ...]] = {}
+        self.animations: dict[tuple, OrientedSprites] = {}
+        # display-format copies of images scaled to a size, by (path, size)
+        self.scaled: dict[tuple[str, tuple[int, int]], Surface] = {}
+        self.sounds: dict[str, pg.mixer.Sound] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def converts(self) -> bool:
+        return self.display_format and pg.display.get_surface() is not None
+
+    def get_image(self, path: str) -> Surface:
+        image = self.images.get(path)
+        if image is None:
+            self.misses += 1
+            image = pg.image.load(path)
+            if self.converts():
+                image = image.convert()
+            self.images[path] = image
+        else:
+            self.hits += 1
+        return image
+
+    def get_sheet(self, path: str, costume: str = 'default') -> tuple[Surface, tuple[int, int]]:
+        """
+        :return: the sheet at ``path`` recoloured as one of COSTUMES and its offset on the original sheet.
+            The first call recolours the sheet's SHEET_RECTS, or all of it, in one pass.
+        """
+        if costume == 'default':
+            return self.get_image(path), (0, 0)
+        image = self.get_image(path)
+        rects = SHEET_RECTS.get(path, (tuple(image.get_rect()),))
+        area = pg.Rect(rects[0]).unionall([pg.Rect(rect) for rect in rects])
+        key = (path, costume)
+        sheet = self.sheets.get(key)
+        if sheet is None:
+            self.misses += 1
+            sheet = self.sheets[key] = COSTUMES[costume].apply(image, area, rects)
+        else:
+            self.hits += 1
+        return sheet, area.topleft
+
+    def get_frames(self, path: str, rects: tuple[tuple[int, int, int, int], ...], scale: float,
+                   costume: str = 'default', orientation: Direction = Direction.RIGHT) -> tuple[Surface, ...]:
+        """
+        Cut, colorkey and scale ``rects`` out of the sheet at ``path`` in ``costume``.
+        LEFT-facing frames are mirrored copies of the cached RIGHT-facing ones.
+        """
+        key = (path, rects, scale, costume, orientation)
+        frames = self.frames.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+        self.misses += 1
+        if orientation == Direction.LEFT:
+            frames = tuple(flip_sprites(list(self.get_frames(path, rects, scale, costume, Direction.RIGHT))))
+        else:
+            sheet, offset = self.get_sheet(path, costume)
+            sprites = [sheet.subsurface(pg.Rect(rect).move(-offset[0], -offset[1])) for rect in rects]
+            for sprite in sprites:
+                sprite.set_colorkey(BLUE, pg.RLEACCEL)
+            frames = tuple(scale_sprite(sprites, scale))
+        self.frames[key] = frames
+        return frames
+
+    def get_animation(self, path: str, rects: tuple[tuple[int, int, int, int], ...], scale: float,
+                      costume: str = 'default') -> OrientedSprites:
+        key = (path, rects, scale, costume)
+        animation = self.animations.get(key)
+        if animation is not None:
+            self.hits += 1
+            return animation
+        self.misses += 1
+        animation = OrientedSprites(
+            self.get_frames(path, rects, scale, costume, Direction.RIGHT),
+            self.get_frames(path, rects, scale, costume, Direction.LEFT),
+        )
+        self.animations[key] = animation
+        return animation
+
+    def get_scaled(self, path: str, size: tuple[int, int]) -> Surface:
+        key = (path, size)
+        scaled = self.scaled.get(key)
+        if scaled is None:
+            self.misses += 1
+            scaled = pg.transform.scale(self.get_image(path), size)
+            if self.converts():
+                scaled = scaled.convert()
+            self.scaled[key] = scaled
+        else:
+            self.hits += 1
+        return scaled
+
+    def get_sound(self, path: str) -> pg.mixer.Sound:
+        sound = self.sounds.get(path)
+        if sound is None:
+            self.misses += 1
+            sound = pg.mixer.Sound(path)
+            self.sounds[path] = sound
+        else:
+            self.hits += 1
+        return sound
+
+    def surface_bytes(self) -> int:
+        """
+        Pixel memory owned by cached surfaces (subsurfaces share their sheet's pixels and are not counted)
+        """
+        surfaces = list(self.images.values()) + list(self.sheets.values()) + list(self.scaled.values())
+        surfaces += [sprite for frames in self.frames.values() for sprite in frames]
+        return sum(sprite.get_width() * sprite.get_height() * sprite.get_bytesize() for sprite in surfaces)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'images': len(self.images),
+            'costume_sheets': len(self.sheets),
+            'frame_lists': len(self.frames),
+            'scaled_images': len(self.scaled),
+            'sounds': len(self.sounds),
+            'surface_bytes': self.surface_bytes(),
+        }
+
+
+assets = AssetManager()
+
+
+def gif_delay(path: str) -> float:
+    """
+    :return: seconds the first frame of a GIF is shown, from its Graphic Control Extension
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:3] != b'GIF':
+        raise ValueError(f'{path} is not a GIF')
+    flags = data[10]
+    # header, logical screen descriptor and the global color table, if any
+    offset = 13 + (3 * 2 ** ((flags & 7) + 1) if flags & 0x80 else 0)
+    while offset < len(data) and data[offset] == 0x21:
+        label = data[offset + 1]
+        offset += 2
+        if label == 0xF9:
+            delay, = struct.unpack_from('<H', data, offset + 2)
+            return delay / 100 if delay else GIF_DEFAULT_DELAY
+        # skip the extension's data sub-blocks
+        while data[offset]:
+            offset += data[offset] + 1
+        offset += 1
+    return GIF_DEFAULT_DELAY
+
+
+class SpriteAtlas:
+    """
+    Build-once file of the processed frames and scaled images a game needs: one packed run of pixels behind a JSON
+    index of the frame lists with their source rects, scale and costume. An image of up to 256 colors, all of this
+    game's, is stored as an RGB palette and a byte per pixel, any other as BGRA. Only RIGHT-facing frames are
+    stored, LEFT-facing ones are mirrored at load like AssetManager.get_frames mirrors them. The file is named after
+    a hash of the source files' contents and every processing parameter, so a changed asset, scale or costume
+    misses and rebuilds, deleting the outdated files.
+    """
+    magic = b'SFAT'
+    version = 2
+    # magic, version, index length
+    header = struct.Struct('<4sHI')
+
+    def __init__(self, directory: str = ATLAS_DIR):
+        self.directory = directory
+
+    def key(self, frames: Sequence[tuple], scaled: Sequence[tuple[str, tuple[int, int]]]) -> str:
+        """
+        :param frames: AssetManager.get_animation arguments of every frame list
+        :param scaled: AssetManager.get_scaled arguments of every scaled image
+        """
+        digest = hashlib.sha256(repr((self.version, pg.version.ver)).encode())
+        for path in sorted({key[0] for key in frames} | {key[0] for key in scaled}):
+            with open(path, 'rb') as file:
+                digest.update(path.encode() + file.read())
+        for path, rects, scale, costume in frames:
+            digest.update(repr((path, rects, scale, COSTUMES[costume])).encode())
+        digest.update(repr(scaled).encode())
+        return digest.hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.atlas')
+
+    def prepare(self, manager: AssetManager, frames: Sequence[tuple],
+                scaled: Sequence[tuple[str, tuple[int, int]]]) -> bool:
+        """
+        Fill ``manager`` from the atlas file, building and saving it first when there is none
+        :return: whether the atlas was loaded rather than built
+        """
+        if all(key + (Direction.RIGHT,) in manager.frames for key in frames) and \
+                all(key in manager.scaled for key in scaled):
+            return True
+        # fighters share frame lists, the fireball's at least
+        frames = list(dict.fromkeys(frames))
+        key = self.key(frames, scaled)
+        try:
+            self.load(manager, self.path(key))
+            return True
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, struct.error) as error:
+            log.warning(f'rebuilding the sprite atlas: {error}')
+        self.build(manager, frames, scaled, key)
+        return False
+
+    def load(self, manager: AssetManager, path: str):
+        # mapped rather than read, every pixel is copied once, straight into its surface
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, size = self.header.unpack_from(data)
+            if magic != self.magic or version != self.version:
+                raise ValueError(f'{path} is not a version {self.version} sprite atlas')
+            index = json.loads(data[self.header.size:self.header.size + size])
+            offset = self.header.size + size
+            display = manager.converts()
+
+            def cut(w: int, h: int, colors: int) -> Surface:
+                nonlocal offset
+                size = colors * 3 + w * h if colors else w * h * 4
+                if offset + size > len(data):
+                    raise ValueError(f'{path} is shorter than its index')
+                with memoryview(data)[offset:offset + size] as pixels:
+                    if colors:
+                        palette = pixels[:colors * 3]
+                        sprite = pg.image.frombuffer(pixels[colors * 3:], (w, h), 'P')
+                        sprite.set_palette([palette[i:i + 3] for i in range(0, colors * 3, 3)])
+                    else:
+                        sprite = pg.image.frombuffer(pixels, (w, h), 'BGRA')
+                    sprite = sprite.convert() if display else sprite.convert(32)
+                offset += size
+                return sprite
+
+            for source, rects, scale, costume, sizes in index['frames']:
+                key = (source, tuple(tuple(rect) for rect in rects), scale, costume)
+                right = tuple(cut(*size) for size in sizes)
+                for orientation, sprites in ((Direction.RIGHT, right), (Direction.LEFT, flip_sprites(right))):
+                    for sprite in sprites:
+                        sprite.set_colorkey(BLUE, pg.RLEACCEL)
+                    manager.frames[key + (orientation,)] = tuple(sprites)
+            for source, (w, h), colors in index['scaled']:
+                manager.scaled[(source, (w, h))] = cut(w, h, colors)
+
+    @staticmethod
+    def encode(surface: Surface) -> tuple[tuple[int, int, int], bytes]:
+        """
+        :return: width, height and palette size (0 for BGRA), and the pixels as stored
+        """
+        w, h = surface.get_size()
+        pixels = np.frombuffer(pg.image.tobytes(surface, 'BGRA'), dtype=np.uint32)
+        # scaled pixels come in runs, sorting one of each is far cheaper than sorting them all
+        colors = np.unique(pixels[np.concatenate(([True], pixels[1:] != pixels[:-1]))])
+        if len(colors) > 256:
+            return (w, h, 0), pixels.tobytes()
+        palette = colors.view(np.uint8).reshape(-1, 4)[:, 2::-1]
+        return (w, h, len(colors)), palette.tobytes() + np.searchsorted(colors, pixels).astype(np.uint8).tobytes()
+
+    def build(self, manager: AssetManager, frames: Sequence[tuple], scaled: Sequence[tuple[str, tuple[int, int]]],
+              key: str):
+        """
+        Process everything through ``manager`` and save it as the atlas file for ``key``
+        """
+        index = {'frames': [], 'scaled': []}
+        pixels = []
+        for frame_key in frames:
+            encoded = [self.encode(sprite) for sprite in manager.get_frames(*frame_key)]
+            # get_animation asks for both orientations, the mirrored frames are not stored
+            manager.get_frames(*frame_key, orientation=Direction.LEFT)
+            index['frames'].append(list(frame_key) + [[size for size, _ in encoded]])
+            pixels += [data for _, data in encoded]
+        for path, size in scaled:
+            (w, h, colors), data = self.encode(manager.get_scaled(path, size))
+            index['scaled'].append([path, size, colors])
+            pixels.append(data)
+        encoded = json.dumps(index).encode()
+
+        path = self.path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.tmp', 'wb') as file:
+                file.write(self.header.pack(self.magic, self.version, len(encoded)))
+                file.write(encoded)
+                for data in pixels:
+                    file.write(data)
+            os.replace(path + '.tmp', path)
+            for name in os.listdir(self.directory):
+                if name.endswith('.atlas') and name != os.path.basename(path):
+                    os.remove(os.path.join(self.directory, name))
+        except OSError as error:
+            log.warning(f'could not save the sprite atlas: {error}')
+
+
+def load_font(name: str, size: int, bold: bool = False, italic: bool = False) -> pg.font.Font:
+    """
+    :return: ``name``.ttf from FONT_DIR, opened by path without scanning the system's fonts. When it is not there,
+        the system font of that name through SysFont, which scans them once and falls back to pygame's bundled font.
+    """
+    path = os.path.join(FONT_DIR, f'{name}.ttf')
+    if not os.path.exists(path):
+        return pg.font.SysFont(name, size, bold, italic)
+    font = pg.font.Font(path, size)
+    font.set_bold(bold)
+    font.set_italic(italic)
+    return font
+
+
+class AssetLoader:
+    """
+    Runs asset jobs on worker threads, each filling an AssetManager of its own that leaves surfaces in their decoded
+    format. finish() on the main thread converts the results to the display format and adds them to ``assets``,
+    within a time budget per call, so the menu keeps drawing while the rest loads.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='assets')
+        self.jobs: list[tuple[str, Future, AssetManager]] = []
+        # finished jobs' surfaces not converted yet: job name, whether frames or scaled, cache key, surfaces
+        self.converting: deque[tuple[str, bool, tuple, tuple[Surface, ...]]] = deque()
+        self.results: dict[str, object] = {}
+        # per job, milliseconds on its worker and converting on the main thread
+        self.load_ms: dict[str, float] = {}
+        self.convert_ms: dict[str, float] = {}
+
+    def submit(self, name: str, job):
+        """
+        :param job: called on a worker with the job's AssetManager, its return value ends up in ``results``
+        """
+        manager = AssetManager(display_format=False)
+
+        def run():
+            start = time.perf_counter()
+            result = job(manager)
+            self.load_ms[name] = (time.perf_counter() - start) * 1000
+            return result
+
+        self.convert_ms[name] = 0.0
+        self.jobs.append((name, self.executor.submit(run), manager))
+
+    def finish(self, budget_ms: float | None = None) -> bool:
+        """
+        Convert finished jobs on this thread until ``budget_ms`` is spent, None waits for and converts everything
+        :return: whether every job is loaded and converted
+        """
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        while self.jobs or self.converting:
+            if not self.converting:
+                job = next((job for job in self.jobs if job[1].done()), None)
+                if job is None:
+                    if deadline is not None:
+                        return False
+                    job = self.jobs[0]
+                self.jobs.remove(job)
+                name, future, manager = job
+                # raises what the job raised
+                self.results[name] = future.result()
+                self.converting.extend((name, True, key, frames) for key, frames in manager.frames.items())
+                self.converting.extend((name, False, key, (image,)) for key, image in manager.scaled.items())
+                continue
+            name, is_frames, key, surfaces = self.converting.popleft()
+            start = time.perf_counter()
+            converted = tuple(surface.convert() for surface in surfaces)
+            if is_frames:
+                for sprite in converted:
+                    sprite.set_colorkey(BLUE, pg.RLEACCEL)
+                assets.frames.setdefault(key, converted)
+            else:
+                assets.scaled.setdefault(key, converted[0])
+            now = time.perf_counter()
+            self.convert_ms[name] += (now - start) * 1000
+            if deadline is not None and now > deadline:
+                break
+        if self.jobs or self.converting:
+            return False
+        # also when the last conversion ran past the deadline, or the workers would live until exit
+        self.executor.shutdown()
+        return True
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {name: {'load_ms': round(self.load_ms.get(name, 0.0), 1), 'convert_ms': round(ms, 1)}
+                for name, ms in self.convert_ms.items()}
+
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces keyed by (font, text, color, antialias)
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.surfaces: OrderedDict[tuple, Surface] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pg.font.Font, text: str, antialias: bool, color: tuple[int, int, int]) -> Surface:
+        """
+        Drop-in for ``font.render``; the returned surface is shared and must not be drawn on
+        """
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.surfaces),
+            'capacity': self.capacity,
+        }
+
+
 class State(Enum):
     MOVE_RIGHT = 'move_right'
     MOVE_LEFT = 'move_left'
@@ -57,249 +690,688 @@ class State(Enum):
     SHOOT_FIREBALL = 'fireball'
 
 
+# keys handled by Player.handle_input as actions, every other key press resets the fighter to IDLE
+ACTION_KEYS = {pg.K_a, pg.K_SPACE, pg.K_x, pg.K_f}
+
+
+class AnimationClock:
+    """
+    Plays frames of given durations against elapsed wall time, so an animation runs at the same speed at any frame
+    rate. A frame that takes longer than the shortest durations skips the frames it spans.
+    """
+
+    def __init__(self, durations: Sequence[float]):
+        """
+        :param durations: seconds each frame is shown, the animation loops over them
+        """
+        if not durations or min(durations) <= 0:
+            raise ValueError('frame durations must be positive')
+        self.durations = tuple(durations)
+        self.cycle = sum(self.durations)
+        self.index = 0
+        # seconds the current frame has been shown
+        self.time = 0.0
+
+    def advance(self, elapsed: float) -> int:
+        """
+        :param elapsed: seconds since the last call
+        :return: index of the frame to show now
+        """
+        self.time += elapsed % self.cycle
+        while self.time >= self.durations[self.index]:
+            self.time -= self.durations[self.index]
+            self.index = (self.index + 1) % len(self.durations)
+        return self.index
+
+
 class SpriteSheet(ABC):
-    def __init__(self):
-        self.current_num_frames = 0
-        self.max_num_frames = 30
+    def __init__(self, durations: Sequence[float]):
+        self.clock = AnimationClock(durations)
         self.index = 0
 
     @abstractmethod
-    def get_sprite(self) -> Surface:
+    def get_sprite(self, elapsed: float = 0.0) -> Surface:
         pass
 
 
 class BackgroundSprite(SpriteSheet):
-    def __init__(self, paths: list[str]):
-        super().__init__()
-        self.bg_sprites = [pg.image.load(path).convert() for path in paths]
+    def __init__(self, paths: list[str], size: tuple[int, int]):
+        # each GIF is one frame of the stage and carries its own delay
+        super().__init__([gif_delay(path) for path in paths])
+        self.paths = paths
+        self.size: tuple[int, int] | None = None
+        self.scaled_sprites: list[Surface] = []
+        self.resize(size)
+
+    def resize(self, size: tuple[int, int]):
+        """
+        Rebuild the display-sized, display-format frames; a no-op while the size is unchanged
+        """
+        if size == self.size:
+            return
+        self.size = size
+        self.scaled_sprites = [assets.get_scaled(path, size) for path in self.paths]
+
+    def get_sprite(self, elapsed: float = 0.0) -> Surface:
+        """
+        :param elapsed: seconds since the last call
+        """
+        self.index = self.clock.advance(elapsed)
+        return self.scaled_sprites[self.index]
 
-    def get_sprite(self) -> Surface:
-        self.current_num_frames += 1
-        if self.current_num_frames >= self.max_num_frames:
-            self.current_num_frames = 0
-            self.index = (self.index + 1) % len(self.bg_sprites)
-        return self.bg_sprites[self.index]
 
+class Animation:
+    """
+    Pixel-free description of one animation: its name, sheet rectangles, the on-screen size of every frame and
+    the ticks each frame is shown. This is all the simulation needs, so fighters can run without loading any image.
+    """
 
-class FireBall(SpriteSheet):
-    def __init__(self, player):
+    def __init__(self, name: str, rects: tuple[tuple[int, int, int, int], ...], scaler: float,
+                 durations: Sequence[float], tick_rate: int):
         """
-        :type player: Player
+        :param durations: seconds each frame is shown, rounded to whole ticks of ``tick_rate``
         """
-        super().__init__()
-        self.direction = player.direction
-        self.x = player.x
-        if self.direction == Direction.LEFT:
-            self.x -= 120
-        else:
-            self.x += player.w - 50
-        self.y = player.y - 230
-        self.velocity = 5
-        self.sprite = player.sprite
-        self.sprites: list[Surface] = [
-            self.sprite.subsurface(pg.Rect(580, 1425, 45, 65)),
-            self.sprite.subsurface(pg.Rect(640, 1425, 50, 65)),
-            self.sprite.subsurface(pg.Rect(695, 1425, 60, 65)),
-            self.sprite.subsurface(pg.Rect(760, 1425, 60, 65)),
-        ]
-        self.index = 0
+        self.name = name
+        self.rects = rects
+        self.sizes: tuple[tuple[int, int], ...] = tuple((int(w * scaler), int(h * scaler)) for _, _, w, h in rects)
+        self.ticks: tuple[int, ...] = tuple(max(1, round(duration * tick_rate)) for duration in durations)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def get_width(self, index: int) -> int:
+        return self.sizes[index][0]
+
+    def get_height(self, index: int) -> int:
+        return self.sizes[index][1]
+
+
+def hurt_box_geometry(animation: Animation, index: int, direction: Direction,
+                      idle_width: int) -> tuple[int, int, int, int]:
+    """
+    Hurt box of one frame as (x, y, w, h) relative to the fighter's x and the top of the frame
+    """
+    w = animation.get_width(index)
+    h = animation.get_height(index)
+    d = w - idle_width
+    if direction == Direction.LEFT and d > 0:
+        return -int(d * 0.4), 25, int(w * 0.6), h - 25
+    return 30, 25, int(w * 0.6), h - 25
+
+
+def hit_box_geometry(state: State, animation: Animation, index: int,
+                     direction: Direction) -> tuple[list[tuple[int, int, int, int]], int]:
+    """
+    Hit boxes as (x, y, w, h) relative to the fighter's x and the top of the frame, and their damage
+    """
+    match state:
+        case State.ATTACK:
+            match index:
+                case 2:
+                    offset_x = 180
+                    damage = 10
+                    if direction == Direction.LEFT:
+                        return [(-140, 40, animation.get_width(2) - offset_x, 25)], damage
+                    return [(offset_x, 40, animation.get_width(2) - offset_x, 25)], damage
+                case 9:
+                    offset_xs = [
+                        190,
+                        205,
+                        230,
+                    ]
+                    damage = 20
+                    if direction == Direction.LEFT:
+                        return [
+                            (-55, 30, animation.get_width(8) - offset_xs[-3] - 50, 40),
+                            (-70, 70, animation.get_width(8) - offset_xs[-2] - 20, 40),
+                            (-95, 110, animation.get_width(9) - offset_xs[-1] - 10, 40),
+                        ], damage
+                    return [
+                        (offset_xs[-3], 30, animation.get_width(8) - offset_xs[-3] - 50, 40),
+                        (offset_xs[-2], 70, animation.get_width(8) - offset_xs[-2] - 20, 40),
+                        (offset_xs[-1], 110, animation.get_width(9) - offset_xs[-1] - 10, 40),
+                    ], damage
+                case 12:
+                    offset_x = 160
+                    if direction == Direction.LEFT:
+                        return [(-30, 0, animation.get_width(12) - offset_x - 5, 100)], 30
+                    return [(offset_x, 0, animation.get_width(12) - offset_x - 5, 100)], 30
+        case State.KICK:
+            match index:
+                case 2:
+                    w = animation.get_width(2)
+                    offset_xs = [
+                        150,
+                        200,
+                        230,
+                    ]
+                    damage = 10
+                    if direction == Direction.LEFT:
+                        return [
+                            (-20, 50, offset_xs[-2] - offset_xs[-3], 40),
+                            (-50, 30, offset_xs[-1] - offset_xs[-2], 40),
+                            (-120, 10, w - offset_xs[-1], 30),
+                        ], damage
+                    return [
+                        (offset_xs[-3], 50, offset_xs[-2] - offset_xs[-3], 40),
+                        (offset_xs[-2], 30, offset_xs[-1] - offset_xs[-2], 40),
+                        (offset_xs[-1], 10, w - offset_xs[-1], 30),
+                    ], damage
+                case 5:
+                    w = animation.get_width(5)
+                    offset_xs = [
+                        120,
+                        150,
+                    ]
+                    damage = 15
+                    if direction == Direction.LEFT:
+                        return [
+                            (0, 110, w - offset_xs[-2] - 50, 30),
+                            (-40, 140, w - offset_xs[-1] - 10, 30),
+                        ], damage
+                    return [
+                        (offset_xs[-2], 110, w - offset_xs[-2] - 50, 30),
+                        (offset_xs[-1], 140, w - offset_xs[-1] - 10, 30),
+                    ], damage
 
-        for sprite in self.sprites:
-            sprite.set_colorkey(BLUE, pg.RLEACCEL)
+    return [], 0
 
-        self.sprites = scale_sprite(self.sprites, 2.5)
 
-    def get_hit_box(self) -> pg.Rect:
-        return pg.Rect(self.x, self.y, self.sprites[self.index].get_width(),
-                       self.sprites[self.index].get_height() * 0.6) \
-            .move(0, 30)
+class FrameData:
+    """
+    Hurt boxes of every (animation, frame, direction) and hit boxes with damage of every (state, frame, direction),
+    compiled once from the geometry above. Entries end with the frame height, so a query only has to add
+    the fighter's x and the top of its frame.
+    """
 
-    def collide(self, other_obj) -> bool:
+    def __init__(self, animations: dict[str, Animation], attack_states: dict[State, str]):
         """
-        :type other_obj: FireBall | Player | None
-        :return: bool
+        :param attack_states: animation played in each state that has hit boxes
         """
-        if not other_obj and self.x >= 1280 or self.x <= 0:
-            return True
-        if type(other_obj) is FireBall:
-            return True
-        elif type(other_obj) is Player:
-            if self.get_hit_box().colliderect(other_obj.get_hurt_box()):
-                other_obj.health -= 50
-                return True
-        return False
+        idle_width = animations['idle'].get_width(0)
+        self.hurt_boxes: dict[tuple[str, int, Direction], tuple[int, int, int, int, int]] = {
+            (name, index, direction): (
+                *hurt_box_geometry(animation, index, direction, idle_width), animation.get_height(index)
+            )
+            for name, animation in animations.items()
+            for index in range(len(animation))
+            for direction in Direction
+        }
+        self.hit_boxes: dict[tuple[State, int, Direction], tuple[tuple[tuple[int, int, int, int], ...], int, int]] = {}
+        for state, name in attack_states.items():
+            animation = animations[name]
+            for index in range(len(animation)):
+                for direction in Direction:
+                    boxes, damage = hit_box_geometry(state, animation, index, direction)
+                    if boxes:
+                        self.hit_boxes[(state, index, direction)] = (
+                            tuple(boxes), damage, animation.get_height(index % len(animation))
+                        )
+
+
+class PlayerInput(NamedTuple):
+    """
+    One tick of input for one fighter: held keys plus the action keys pressed during the tick
+    """
+    left: bool = False
+    right: bool = False
+    shift: bool = False
+    guard: bool = False
+    attack: bool = False
+    jump: bool = False
+    kick: bool = False
+    fireball: bool = False
+    other: bool = False
+
+    def without_presses(self) -> 'PlayerInput':
+        return self._replace(attack=False, jump=False, kick=False, fireball=False, other=False)
+
+    def with_presses_from(self, earlier: 'PlayerInput') -> 'PlayerInput':
+        """
+        Keep this record's held keys and add the key presses of an earlier record that no tick has consumed yet
+        """
+        return self._replace(
+            attack=self.attack or earlier.attack,
+            jump=self.jump or earlier.jump,
+            kick=self.kick or earlier.kick,
+            fireball=self.fireball or earlier.fireball,
+            other=self.other or earlier.other,
+        )
 
-    def get_coord(self) -> tuple[int, int]:
-        if self.direction == Direction.RIGHT:
-            self.x += self.velocity
-        else:
-            self.x -= self.velocity
-        return self.x, self.y
+    def to_bits(self) -> int:
+        """
+        :return: one bit per field, in field order from the lowest bit
+        """
+        bits = 0
+        for i, value in enumerate(self):
+            bits |= value << i
+        return bits
 
-    def get_sprite(self) -> Surface:
-        if self.direction == Direction.LEFT:
-            pass
-        self.current_num_frames += 1
-
-        n = len(self.sprites)
-        if self.current_num_frames >= self.max_num_frames and self.index < len(self.sprites):
-            self.current_num_frames = 0
-            if self.index == n - 1:
-                self.index = n - 2
-            elif self.index == n - 2:
-                self.index = n - 1
-            else:
-                self.index += 1
+    @classmethod
+    def from_bits(cls, bits: int) -> 'PlayerInput':
+        return cls(*(bool(bits >> i & 1) for i in range(len(cls._fields))))
 
-        if self.direction == Direction.LEFT:
-            return pg.transform.flip(self.sprites[self.index], True, False)
-        return self.sprites[self.index]
 
+class PoolPolicy(Enum):
+    DROP = 0  # refuse the spawn when every slot is taken
+    GROW = 1  # double the capacity
+
+
+class Projectiles:
+    """
+    Fixed-capacity pool of every fireball in flight, stored as NumPy structure-of-arrays. Movement, animation,
+    bounds culling and hit tests against the fighters and against the other side's fireballs run as batch
+    operations over all slots; slot i is in use while alive[i] is set. Free slots are kept on a stack.
+    A step() that removes nothing writes into scratch arrays allocated with the pool. Only the meeting test,
+    while both sides have fireballs in flight, makes temporaries: compress()'s index list and NumPy's iteration
+    buffer for the pairwise compares, which is capped at its bufsize.
+    """
+
+    def __init__(self, animation: Animation, capacity: int = 16, width: int = 1280,
+                 policy: PoolPolicy = PoolPolicy.DROP, tick_rate: int = 144):
+        """
+        :param animation: fireball frames, the same for both owners
+        :param capacity: number of slots
+        :param policy: what spawn does when every slot is taken
+        :param tick_rate: ticks per second of the simulation stepping the pool
+        """
+        self.animation = animation
+        self.width = width
+        self.policy = policy
+        # whole pixels, the pool keeps positions as integers
+        self.velocity = round(FIREBALL_SPEED / tick_rate)
+        self.damage = 50
+        n = len(animation)
+        self.frame_durations = np.array(animation.ticks, dtype=np.int32)
+        self.frame_widths = np.array([animation.get_width(i) for i in range(n)], dtype=np.int32)
+        self.frame_heights = np.array([animation.get_height(i) for i in range(n)], dtype=np.int32)
+        # hit box height of each frame, truncated the way pg.Rect truncates float sizes
+        self.hit_heights = (self.frame_heights * 0.6).astype(np.int32)
+        # play frames in order, then loop over the last two
+        self.next_frames = np.array([n - 2 if i == n - 1 else n - 1 if i == n - 2 else i + 1 for i in range(n)],
+                                    dtype=np.int32)
+        # below this many live fireballs step() runs on Python ints, NumPy's per-call overhead would dominate
+        self.scalar_step_limit = 8
+        self.frame_durations_list, self.widths_list, self.hit_heights_list, self.next_frames_list = (
+            values.tolist() for values in (self.frame_durations, self.frame_widths, self.hit_heights,
+                                           self.next_frames))
+        self.high_water = 0
+        self.exhausted = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int):
+        self.capacity = capacity
+        # every integer field is a row of one block, so a snapshot is a single copy
+        self.data = np.zeros((8, capacity), dtype=np.int32)
+        # last_x is the position at the start of the current tick, for render interpolation
+        self.x, self.y, self.last_x, self.dx, self.direction, self.frame, self.frame_ticks, self.owner = self.data
+        self.alive = np.zeros(capacity, dtype=bool)
+        # the live slots in ascending order and per-row views that index to Python ints, for step_scalar
+        self.live: list[int] = []
+        self.rows = [memoryview(row) for row in self.data]
+        # scratch for step(): masks and hit box edges of every slot, and the slots and edges of each side's
+        # fireballs for the meeting test. pairs only grows, when more fireballs meet than ever before.
+        self.keep, self.hit, self.mask = np.zeros((3, capacity), dtype=bool)
+        self.sides = np.zeros((2, capacity), dtype=bool)
+        self.edges = np.zeros((4, capacity), dtype=np.int32)
+        self.scratch = np.zeros(capacity, dtype=np.int32)
+        # frame as an index array, take() would otherwise convert the int32 row on every call
+        self.frame_index = np.zeros(capacity, dtype=np.intp)
+        self.slots = np.arange(capacity)
+        self.side_slots = np.zeros((2, capacity), dtype=np.intp)
+        self.side_edges = np.zeros((2, 4 * capacity), dtype=np.int32)
+        self.pairs = np.zeros(0, dtype=bool)
+        # slots step_scalar removes this tick: 1 left the stage or hit a fighter, 2 met a fireball
+        self.culled = bytearray(capacity)
+        # lowest slot on top, so the live slots stay packed at the front
+        self.free = list(range(capacity - 1, -1, -1))
+        self.count = 0
+
+    def grow(self):
+        data, alive = self.data, self.alive
+        n, count, free, live = self.capacity, self.count, self.free, self.live
+        self.allocate(n * 2)
+        self.count = count
+        self.free = self.free[:n] + free
+        self.data[:, :n] = data
+        self.alive[:n] = alive
+        self.live = live
+
+    def clear(self):
+        self.alive[:] = False
+        self.live.clear()
+        self.free[:] = range(self.capacity - 1, -1, -1)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def snapshot(self) -> tuple:
+        return self.data.copy(), self.alive.copy(), self.free[:], self.count, self.high_water, self.exhausted
+
+    def restore(self, snapshot: tuple):
+        data, alive, free, self.count, self.high_water, self.exhausted = snapshot
+        if data.shape != self.data.shape:
+            self.allocate(data.shape[1])
+        self.data[:] = data
+        self.alive[:] = alive
+        self.live[:] = np.flatnonzero(alive).tolist()
+        self.free[:] = free
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            'capacity': self.capacity,
+            'in_use': self.count,
+            'high_water': self.high_water,
+            'exhausted': self.exhausted,
+            'policy': self.policy.name,
+        }
+
+    def spawn(self, x: int, y: int, direction: Direction, owner: int) -> int | None:
+        """
+        :return: the acquired slot, None when the pool is full and the policy is DROP
+        """
+        if not self.free:
+            self.exhausted += 1
+            if self.policy == PoolPolicy.DROP:
+                log.debug(f'projectile pool exhausted at {self.capacity} slots, fireball dropped')
+                return None
+            self.grow()
+        slot = self.free.pop()
+        self.x[slot] = x
+        self.y[slot] = y
+        self.last_x[slot] = x
+        self.direction[slot] = direction.value
+        self.dx[slot] = self.velocity if direction == Direction.RIGHT else -self.velocity
+        self.frame[slot] = 0
+        self.frame_ticks[slot] = 0
+        self.owner[slot] = owner
+        self.alive[slot] = True
+        bisect.insort(self.live, slot)
+        self.count += 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return slot
+
+    def release(self, slot: int):
+        if self.alive[slot]:
+            self.alive[slot] = False
+            self.live.remove(slot)
+            self.free.append(slot)
+            self.count -= 1
+
+    def hit_boxes(self, slots: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: left, top, right and bottom edges of the hit boxes of ``slots``
+        """
+        frame = self.frame[slots]
+        left = self.x[slots]
+        top = self.y[slots] + 30
+        return left, top, left + self.frame_widths[frame], top + self.hit_heights[frame]
 
-class Player(SpriteSheet):
-    def __init__(self, path: str, x: int, y: int, max_health: int, p2: bool, direction: Direction):
-        super().__init__()
+    def step(self, players: list):
+        """
+        Advance one tick: cull fireballs that left the stage, hit the opposing fighter or met an opposing
+        fireball, then animate and move the rest
+        :type players: list[Player]
+        """
+        if not self.count:
+            return
+        if self.count <= self.scalar_step_limit:
+            self.step_scalar(players)
+            return
+        x, frame, alive, keep, hit, mask = self.x, self.frame_index, self.alive, self.keep, self.hit, self.mask
+        left, top, right, bottom = self.edges
+        np.copyto(frame, self.frame)
+        np.copyto(self.last_x, x)
+        np.copyto(left, x)
+        self.frame_widths.take(frame, out=right, mode='clip')
+        np.add(right, x, out=right)
+        np.add(self.y, 30, out=top)
+        self.hit_heights.take(frame, out=bottom, mode='clip')
+        np.add(bottom, top, out=bottom)
+        np.greater(x, 0, out=keep)
+        np.less(x, self.width, out=mask)
+        np.logical_and(keep, mask, out=keep)
+        np.logical_and(keep, alive, out=keep)
+
+        for i, player in enumerate(players):
+            hurt_box = player.get_hurt_box()
+            np.not_equal(self.owner, i, out=hit)
+            np.logical_and(hit, keep, out=hit)
+            for edges, compare, edge in ((left, np.less, hurt_box.right), (right, np.greater, hurt_box.left),
+                                         (top, np.less, hurt_box.bottom), (bottom, np.greater, hurt_box.top)):
+                compare(edges, edge, out=mask)
+                np.logical_and(hit, mask, out=hit)
+            hits = np.count_nonzero(hit)
+            if hits:
+                player.health -= self.damage * hits
+                # hit is a subset of keep
+                np.logical_xor(keep, hit, out=keep)
+
+        self.cancel_met(keep)
+
+        np.logical_xor(alive, keep, out=mask)
+        if mask.any():
+            self.free.extend(np.flatnonzero(mask).tolist())
+            np.copyto(alive, keep)
+            self.live[:] = np.flatnonzero(keep).tolist()
+            self.count = len(self.live)
+        np.add(self.frame_ticks, 1, out=self.frame_ticks, where=keep)
+        self.frame_durations.take(frame, out=self.scratch, mode='clip')
+        np.greater_equal(self.frame_ticks, self.scratch, out=mask)
+        np.logical_and(mask, keep, out=mask)
+        self.next_frames.take(frame, out=self.scratch, mode='clip')
+        np.copyto(self.frame, self.scratch, where=mask)
+        np.copyto(self.frame_ticks, 0, where=mask)
+        np.add(x, self.dx, out=x, where=keep)
+
+    def cancel_met(self, keep: np.ndarray):
+        """
+        Clear ``keep`` of every fireball that overlaps one of the other side's, all pairs are tested before any
+        is removed
+        """
+        counts = []
+        for side, sides in enumerate(self.sides):
+            np.equal(self.owner, side, out=sides)
+            np.logical_and(sides, keep, out=sides)
+            counts.append(np.count_nonzero(sides))
+        n, m = counts
+        if not n or not m:
+            return
+        # pack the slots and hit box edges of each side's fireballs at the front of side_slots and side_edges
+        for sides, slots, edges, count in zip(self.sides, self.side_slots, self.side_edges, counts):
+            self.slots.compress(sides, out=slots[:count])
+            self.edges.take(slots[:count], axis=1, out=edges[:4 * count].reshape(4, count), mode='clip')
+        if len(self.pairs) < 2 * n * m:
+            self.pairs = np.zeros(2 * n * m, dtype=bool)
+        overlap = self.pairs[:n * m].reshape(n, m)
+        test = self.pairs[n * m:2 * n * m].reshape(n, m)
+        left, top, right, bottom = self.side_edges[0, :4 * n].reshape(4, n, 1)
+        other_left, other_top, other_right, other_bottom = self.side_edges[1, :4 * m].reshape(4, m)
+        np.less(left, other_right, out=overlap)
+        for edges, compare, other in ((right, np.greater, other_left), (top, np.less, other_bottom),
+                                      (bottom, np.greater, other_top)):
+            compare(edges, other, out=test)
+            np.logical_and(overlap, test, out=overlap)
+        for side, axis, count in ((0, 1, n), (1, 0, m)):
+            met = self.mask[:count]
+            overlap.any(axis=axis, out=met)
+            np.logical_not(met, out=met)
+            keep.put(self.side_slots[side, :count], met, mode='clip')
+
+    def step_scalar(self, players: list):
+        """
+        step() for a handful of fireballs, with the same outcome: Python loops over the live slots that read and
+        write the arrays through memoryviews, so a tick without spawns or removals allocates no arrays or lists
+        :type players: list[Player]
+        """
+        x, y, last_x, dx, _, frame, frame_ticks, owner = self.rows
+        live, culled = self.live, self.culled
+        widths, heights, width = self.widths_list, self.hit_heights_list, self.width
+
+        # bit 1 << owner is set for each side with a fireball left
+        sides = 0
+        for slot in live:
+            left = x[slot]
+            last_x[slot] = left
+            if 0 < left < width:
+                sides |= 1 << owner[slot]
+            else:
+                culled[slot] = 1
+
+        for p, player in enumerate(players):
+            # only the other side's fireballs can hit a fighter
+            if not sides & ~(1 << p):
+                continue
+            hurt_box = None
+            hits = 0
+            for slot in live:
+                if not culled[slot] and owner[slot] != p:
+                    if hurt_box is None:
+                        hurt_box = player.get_hurt_box()
+                    left, top = x[slot], y[slot] + 30
+                    if left < hurt_box.right and left + widths[frame[slot]] > hurt_box.left \
+                            and top < hurt_box.bottom and top + heights[frame[slot]] > hurt_box.top:
+                        culled[slot] = 1
+                        hits += 1
+            if hits:
+                player.health -= self.damage * hits
+
+        if sides == 3:
+            # every pair is tested before any fireball is removed
+            for i in live:
+                if culled[i] != 1 and owner[i] == 0:
+                    left, top = x[i], y[i] + 30
+                    right, bottom = left + widths[frame[i]], top + heights[frame[i]]
+                    for j in live:
+                        if culled[j] != 1 and owner[j] == 1 and left < x[j] + widths[frame[j]] and right > x[j] \
+                                and top < y[j] + 30 + heights[frame[j]] and bottom > y[j] + 30:
+                            culled[i] = culled[j] = 2
+
+        durations, next_frames = self.frame_durations_list, self.next_frames_list
+        kept = 0
+        for slot in live:
+            if culled[slot]:
+                culled[slot] = 0
+                self.alive[slot] = False
+                self.free.append(slot)
+                continue
+            live[kept] = slot
+            kept += 1
+            ticks = frame_ticks[slot] + 1
+            if ticks >= durations[frame[slot]]:
+                frame[slot] = next_frames[frame[slot]]
+                ticks = 0
+            frame_ticks[slot] = ticks
+            x[slot] += dx[slot]
+        if kept < len(live):
+            del live[kept:]
+            self.count = kept
+
+    def get_hit_boxes(self) -> list[pg.Rect]:
+        slots = np.flatnonzero(self.alive)
+        left, top, right, bottom = self.hit_boxes(slots)
+        return [pg.Rect(x, y, r - x, b - y) for x, y, r, b in zip(left.tolist(), top.tolist(), right.tolist(),
+                                                                   bottom.tolist())]
+
+    def get_coords(self, alpha: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param alpha: how far between the previous and the current tick to place the fireballs
+        :return: live slots and their interpolated (x, y) draw positions, shape (n, 2)
+        """
+        slots = np.flatnonzero(self.alive)
+        if not self.count:
+            return slots, np.empty((0, 2), dtype=np.int32)
+        if self.count <= self.scalar_step_limit:
+            # a handful of fireballs, cheaper to interpolate on Python ints
+            return slots, np.array([(round(lerp(self.last_x.item(slot), self.x.item(slot), alpha)), self.y.item(slot))
+                                    for slot in slots.tolist()], dtype=np.int32)
+        x = np.rint(lerp(self.last_x[slots], self.x[slots], alpha)).astype(np.int32)
+        return slots, np.stack((x, self.y[slots]), axis=1)
+
+
+class Player:
+    def __init__(self, path: str, x: int, y: int, max_health: int, p2: bool, direction: Direction,
+                 tick_rate: int = 144):
+        """
+        :param tick_rate: ticks per second of the simulation stepping the fighter
+        """
         self.p2 = p2
-        self.punch_sound = pg.mixer.Sound('assets/sound/punch.mp3')
-        self.hadouken_sound = pg.mixer.Sound('assets/sound/hadouken.mp3')
         self.scaler = 2.5
-        self.max_num_frames = 20
-        self.sprite = pg.image.load(path).convert()
-        self.state = State.IDLE
-        self.fireballs = set[FireBall]()
-        self.removed_fireballs: list[FireBall] = []
-        self.prev_state = self.state
-        self.velocity = 4
-        self.direction = direction
-        self.is_move_right = True
-        self.ground_y: float = y
-        self.health = max_health
+        self.path = path
+        self.spawn = (x, y, direction)
+        self.max_health = max_health
+        self.velocity = whole(WALK_SPEED / tick_rate)
         self.hurt_box: dict[State, tuple[int, ...]] = {
             State.ATTACK: tuple(map(int, (15 * self.scaler, 20 * self.scaler, 40 * self.scaler, 80 * self.scaler))),
             State.GUARD: tuple(map(int, (15 * self.scaler, 20 * self.scaler, 40 * self.scaler, 80 * self.scaler))),
             State.JUMP: tuple(map(int, (15 * self.scaler, 20 * self.scaler, 40 * self.scaler, 80 * self.scaler))),
             State.IDLE: tuple(map(int, (15 * self.scaler, 20 * self.scaler, 40 * self.scaler, 80 * self.scaler))),
         }
-        self.jump_height = 12
-        self.gravity = 0.2
-        self.jump_speed = self.jump_height
-        self.energy = 0
-
-        self.idle_sprites: list[Surface] = [
-            self.sprite.subsurface(pg.Rect(0, 10, 70, 95)),
-            self.sprite.subsurface(pg.Rect(70, 10, 70, 95)),
-            self.sprite.subsurface(pg.Rect(140, 10, 70, 95)),
-            self.sprite.subsurface(pg.Rect(205, 10, 70, 95)),
-            self.sprite.subsurface(pg.Rect(270, 10, 70, 95)),
-        ]
-
-        self.move_sprites: list[list[Surface]] = [
-            [
-                self.sprite.subsurface(pg.Rect(70, 130, 70, 90)),
-                self.sprite.subsurface(pg.Rect(145, 130, 70, 90)),
-                self.sprite.subsurface(pg.Rect(220, 130, 70, 90)),
-            ],
-            [
-                self.sprite.subsurface(pg.Rect(295, 125, 70, 90)),
-                self.sprite.subsurface(pg.Rect(365, 125, 65, 90)),
-                self.sprite.subsurface(pg.Rect(425, 125, 65, 90)),
-                self.sprite.subsurface(pg.Rect(490, 125, 65, 90)),
-            ],
-        ]
+        # take-off speed and gravity per tick that reach JUMP_HEIGHT on the last of ``rise`` ticks going up
+        rise = round(JUMP_RISE * tick_rate)
+        self.jump_height = whole(2 * JUMP_HEIGHT / (rise + 1))
+        self.gravity = self.jump_height / rise
 
         self.frame_idx_hit_box: dict[State, list[int]] = {
             State.ATTACK: [2, 9, 12],
             State.KICK: [2, 5],
         }
 
-        self.attack_sprites: list[Surface] = [
-            # first animation
-            self.sprite.subsurface(pg.Rect(0, 465, 70, 95)),
-            self.sprite.subsurface(pg.Rect(80, 465, 70, 95)),
-            self.sprite.subsurface(pg.Rect(160, 465, 125, 95)),
-            # second animation
-            self.sprite.subsurface(pg.Rect(620, 465, 80, 95)),
-            self.sprite.subsurface(pg.Rect(710, 465, 80, 95)),
-            self.sprite.subsurface(pg.Rect(800, 465, 80, 95)),
-            self.sprite.subsurface(pg.Rect(895, 460, 95, 105)),
-            self.sprite.subsurface(pg.Rect(1000, 465, 95, 95)),
-            self.sprite.subsurface(pg.Rect(1105, 465, 110, 95)),
-            self.sprite.subsurface(pg.Rect(1225, 470, 110, 90)),
-            # third animation
-            self.sprite.subsurface(pg.Rect(290, 680, 70, 95)),
-            self.sprite.subsurface(pg.Rect(370, 680, 95, 95)),
-            self.sprite.subsurface(pg.Rect(475, 660, 85, 120)),
-        ]
-
-        self.guard_sprites: list[Surface] = [
-            self.sprite.subsurface(pg.Rect(275, 355, 70, 100)),
-        ]
-
-        self.jump_sprites: list[Surface] = [
-            self.sprite.subsurface(pg.Rect(0, 250, 65, 110)),
-            self.sprite.subsurface(pg.Rect(65, 240, 65, 110)),
-            self.sprite.subsurface(pg.Rect(130, 230, 65, 95)),
-            self.sprite.subsurface(pg.Rect(190, 230, 65, 85)),
-            self.sprite.subsurface(pg.Rect(255, 235, 60, 80)),
-            self.sprite.subsurface(pg.Rect(310, 235, 65, 90)),
-            self.sprite.subsurface(pg.Rect(370, 250, 65, 105)),
-        ]
-
-        self.kick_sprites: list[Surface] = [
-            # first animation
-            self.sprite.subsurface(pg.Rect(10, 915, 65, 110)),
-            self.sprite.subsurface(pg.Rect(85, 920, 70, 100)),
-            self.sprite.subsurface(pg.Rect(160, 920, 120, 100)),
-            self.sprite.subsurface(pg.Rect(280, 920, 70, 100)),
-            # second animation
-            self.sprite.subsurface(pg.Rect(350, 920, 60, 100)),
-            self.sprite.subsurface(pg.Rect(415, 920, 90, 100)),
-            self.sprite.subsurface(pg.Rect(350, 920, 60, 100)),
-
-        ]
-
-        self.shoot_fireball_sprites: list[Surface] = [
-            self.sprite.subsurface(pg.Rect(15, 1415, 80, 95)),
-            self.sprite.subsurface(pg.Rect(110, 1415, 85, 95)),
-            self.sprite.subsurface(pg.Rect(205, 1425, 95, 85)),
-            self.sprite.subsurface(pg.Rect(310, 1430, 110, 80)),
-            self.sprite.subsurface(pg.Rect(430, 1430, 130, 80)),
-        ]
-
-        for sprite in \
-                self.idle_sprites + self.attack_sprites + \
-                self.move_sprites[0] + self.move_sprites[1] + \
-                self.jump_sprites + self.kick_sprites + \
-                self.guard_sprites + self.shoot_fireball_sprites:
-            sprite.set_colorkey(BLUE, pg.RLEACCEL)
-
-        self.idle_sprites = scale_sprite(self.idle_sprites, self.scaler)
-        self.attack_sprites = scale_sprite(self.attack_sprites, self.scaler)
-        self.move_sprites[0] = scale_sprite(self.move_sprites[0], self.scaler)
-        self.move_sprites[1] = scale_sprite(self.move_sprites[1], self.scaler)
-        self.jump_sprites = scale_sprite(self.jump_sprites, self.scaler)
-        self.kick_sprites = scale_sprite(self.kick_sprites, self.scaler)
-        self.guard_sprites = scale_sprite(self.guard_sprites, self.scaler)
-        self.shoot_fireball_sprites = scale_sprite(self.shoot_fireball_sprites, self.scaler)
-        if self.p2:
-            self.idle_sprites = set_color_sprites(self.idle_sprites, P2)
-            self.attack_sprites = set_color_sprites(self.attack_sprites, P2)
-            self.move_sprites[0] = set_color_sprites(self.move_sprites[0], P2)
-            self.move_sprites[1] = set_color_sprites(self.move_sprites[1], P2)
-            self.jump_sprites = set_color_sprites(self.jump_sprites, P2)
-            self.kick_sprites = set_color_sprites(self.kick_sprites, P2)
-            self.guard_sprites = set_color_sprites(self.guard_sprites, P2)
-        self.current_sprites = self.idle_sprites
-        self.cap_y = y - self.idle_sprites[0].get_height() + 20
+        self.animations: dict[str, Animation] = {
+            name: Animation(name, rects, self.scaler, RYU_FRAME_DURATIONS[name], tick_rate)
+            for name, rects in RYU_FRAMES.items()
+        }
+        self.idle_animation = self.animations['idle']
+        self.move_animations = (self.animations['move_forward'], self.animations['move_backward'])
+        self.attack_animation = self.animations['attack']
+        self.guard_animation = self.animations['guard']
+        self.jump_animation = self.animations['jump']
+        self.kick_animation = self.animations['kick']
+        self.shoot_fireball_animation = self.animations['shoot_fireball']
+        self.fireball_animation = self.animations['fireball']
+        self.frame_data = FrameData(self.animations, {State.ATTACK: 'attack', State.KICK: 'kick'})
+        self.cap_y = y - self.idle_animation.get_height(0) + 20
+        self.reset()
+
+    def reset(self):
+        """
+        Put the fighter back at its spawn with full health for a new round
+        """
+        x, y, direction = self.spawn
+        self.state = State.IDLE
+        self.prev_state = self.state
+        self.direction = direction
+        self.is_move_right = True
+        self.ground_y: float = y
+        self.health = self.max_health
+        self.jump_speed = self.jump_height
+        self.energy = 0
+        self.current_num_frames = 0
+        self.index = 0
+        self.current_animation = self.idle_animation
         self.y = y
         self.x = x
-        self.w = self.current_sprites[self.index].get_width()
-        self.h = self.current_sprites[self.index].get_height()
+        self.w = self.current_animation.get_width(self.index)
+        self.h = self.current_animation.get_height(self.index)
         self.prev_x = x
+        # position at the start of the current tick, for render interpolation
+        self.last_x = x
+        self.last_ground_y = self.ground_y
         self.lock = False
 
-    def update_sprite(self, sprites: list[Surface]):
-        self.current_sprites = sprites
+    def snapshot(self) -> dict:
+        """
+        :return: a copy of every attribute; the per-round state is all immutable values, so a shallow copy is enough
+        """
+        return self.__dict__.copy()
+
+    def restore(self, snapshot: dict):
+        self.__dict__.update(snapshot)
+
+    def set_animation(self, animation: Animation):
+        self.current_animation = animation
 
     def get_direction_idx(self):
         return 1 if self.direction == Direction.LEFT else 0
@@ -307,15 +1379,15 @@ class Player(SpriteSheet):
     def get_health_bar(self):
         return self.health
 
-    def get_hit(self, opponent):
+    def get_hit(self, opponent) -> bool:
         """
         :param opponent:
         :type opponent: Player
-        :return:
+        :return: whether one of the opponent's hit boxes landed this tick
         """
         opponent_hit_boxs, damage = opponent.get_hit_boxs_and_damage()
-        if not opponent.get_hit_boxs_and_damage():
-            return
+        if not opponent_hit_boxs:
+            return False
         for hit_box in opponent_hit_boxs:
             if hit_box.colliderect(self.get_hurt_box()) and self.current_num_frames == 0:
                 if self.state == State.GUARD:
@@ -325,7 +1397,6 @@ class Player(SpriteSheet):
                         self.energy = 100
                 else:
                     self.health -= damage
-                pg.mixer.Sound.play(self.punch_sound)
                 opponent.energy += 10
                 if opponent.energy > 100:
                     opponent.energy = 100
@@ -335,48 +1406,48 @@ class Player(SpriteSheet):
                     self.x = 1280 - self.w
                 elif self.x < 0:
                     self.x = 0
-                print(self.health)
-                break
+                return True
+        return False
 
-    def get_sprite(self) -> Surface:
+    def update(self) -> tuple[int, int] | None:
+        """
+        Advance the animation and jump by one tick
+        :return: where to release a fireball if the hadouken animation has just ended
+        """
+        fireball_origin = None
+        frame_ticks = self.current_animation.ticks[self.index % len(self.current_animation)]
         match self.state:
             case State.IDLE:
-                # self.current_handle_input = self._handle_input_IDLE
                 self.current_num_frames += 1
-                if self.current_num_frames >= self.max_num_frames:
-                    match self.current_sprites:
-                        case self.attack_sprites:
+                if self.current_num_frames >= frame_ticks:
+                    match self.current_animation:
+                        case self.attack_animation:
                             self.state = State.ATTACK
-                        case self.kick_sprites:
+                        case self.kick_animation:
                             self.state = State.KICK
                     self.current_num_frames = 0
                     self.index = (self.index + 1)
-                if self.index >= len(self.current_sprites):
+                if self.index >= len(self.current_animation):
                     self.state = State.IDLE
-                    self.current_sprites = self.idle_sprites
+                    self.current_animation = self.idle_animation
                     self.index = 0
             case State.GUARD:
                 self.current_num_frames += 1
-                if self.current_num_frames >= self.max_num_frames:
+                if self.current_num_frames >= frame_ticks:
                     self.current_num_frames = 0
                     self.index += 1
             case _:
                 self.current_num_frames += 1
-                if self.current_num_frames >= self.max_num_frames:
+                if self.current_num_frames >= frame_ticks:
                     self.current_num_frames = 0
                     self.index += 1
-                if self.index >= len(self.current_sprites):
+                if self.index >= len(self.current_animation):
                     if self.state == State.SHOOT_FIREBALL:
-                        self.fireballs.add(FireBall(self))
+                        fireball_origin = self.get_fireball_origin()
                     self.state = State.IDLE
-                    self.current_sprites = self.idle_sprites
+                    self.current_animation = self.idle_animation
                     self.index = 0
 
-        if self.removed_fireballs:
-            for fb in self.removed_fireballs:
-                self.fireballs.remove(fb)
-            self.removed_fireballs = []
-
         if self.state == State.JUMP:
             self.ground_y -= self.jump_speed
             self.jump_speed -= self.gravity
@@ -384,246 +1455,140 @@ class Player(SpriteSheet):
                 self.jump_speed = self.jump_height
                 self.current_num_frames += 1
                 self.state = State.IDLE
-                self.current_sprites = self.idle_sprites
+                self.current_animation = self.idle_animation
                 self.index = 0
 
-        new_idx = self.index % len(self.current_sprites)
+        new_idx = self.index % len(self.current_animation)
 
-        self.w = self.current_sprites[new_idx].get_width()
-        self.h = self.current_sprites[new_idx].get_height()
+        self.w = self.current_animation.get_width(new_idx)
+        self.h = self.current_animation.get_height(new_idx)
+        return fireball_origin
 
+    def get_fireball_origin(self) -> tuple[int, int]:
         if self.direction == Direction.LEFT:
-            return pg.transform.flip(self.current_sprites[new_idx], True, False)
-        return self.current_sprites[new_idx]
+            return self.x - 120, self.y - 230
+        return self.x + self.w - 50, self.y - 230
 
-    def get_coord(self) -> tuple[int, int]:
-        new_idx = self.index % len(self.current_sprites)
-        d = self.current_sprites[new_idx].get_width() - self.idle_sprites[0].get_width()
+    def get_coord(self, alpha: float = 1.0) -> tuple[int, int]:
+        """
+        :param alpha: how far between the previous and the current tick to place the fighter
+        """
+        new_idx = self.index % len(self.current_animation)
+        x = round(lerp(self.last_x, self.x, alpha))
+        ground_y = lerp(self.last_ground_y, self.ground_y, alpha)
+        d = self.current_animation.get_width(new_idx) - self.idle_animation.get_width(0)
         if self.direction == Direction.LEFT and d > 0:
-            return self.x - d, round(self.ground_y) - self.current_sprites[new_idx].get_height()
-        return self.x, round(self.ground_y) - self.current_sprites[new_idx].get_height()
+            return x - d, round(ground_y) - self.current_animation.get_height(new_idx)
+        return x, round(ground_y) - self.current_animation.get_height(new_idx)
 
-    def handle_input(self) -> bool:
-        key_pressed = pg.key.get_pressed()
+    def handle_input(self, inputs: PlayerInput):
         if self.state == State.JUMP:
-            if key_pressed[pg.K_LEFT]:
+            if inputs.left:
                 if self.direction == Direction.RIGHT:
                     self.direction = Direction.LEFT
                 self.x -= self.velocity
                 if self.x < 0:
                     self.x = 0
-            if key_pressed[pg.K_RIGHT]:
+            if inputs.right:
                 if self.direction == Direction.LEFT:
                     self.direction = Direction.RIGHT
                 self.x += self.velocity
                 if self.x > 1280 - self.w:
                     self.x = 1280 - self.w
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    return True
-            return False
+            return
 
-        if key_pressed[pg.K_RIGHT] and (key_pressed[pg.K_LSHIFT] or key_pressed[pg.K_RSHIFT]):
+        if inputs.right and inputs.shift:
             self.direction = Direction.RIGHT
             self.state = State.IDLE
-            self.current_sprites = self.idle_sprites
-        elif key_pressed[pg.K_LEFT] and (key_pressed[pg.K_LSHIFT] or key_pressed[pg.K_RSHIFT]):
+            self.current_animation = self.idle_animation
+        elif inputs.left and inputs.shift:
             self.direction = Direction.LEFT
             self.state = State.IDLE
-            self.current_sprites = self.idle_sprites
-        elif key_pressed[pg.K_RIGHT]:
+            self.current_animation = self.idle_animation
+        elif inputs.right:
             index = self.get_direction_idx()
-            self.update_sprite(self.move_sprites[index if self.is_move_right else 1 - index])
+            self.set_animation(self.move_animations[index if self.is_move_right else 1 - index])
             self.state = State.MOVE
             self.is_move_right = True
             self.x += self.velocity
             if self.x > 1280 - self.w:
                 self.x = 1280 - self.w
-        elif key_pressed[pg.K_LEFT]:
+        elif inputs.left:
             index = self.get_direction_idx()
-            self.update_sprite(self.move_sprites[index if self.is_move_right else 1 - index])
+            self.set_animation(self.move_animations[index if self.is_move_right else 1 - index])
             self.state = State.MOVE
             self.is_move_right = False
             self.x -= self.velocity
             if self.x < 0:
                 self.x = 0
-        elif key_pressed[pg.K_g]:
-            self.update_sprite(self.guard_sprites)
+        elif inputs.guard:
+            self.set_animation(self.guard_animation)
             self.state = State.GUARD
             self.index = 0
 
-        for event in pg.event.get():
-            if event.type == pg.KEYDOWN:
-                print(event.key)
-                match event.key:
-                    case pg.K_a:
-                        print(event.key)
-                        self.update_sprite(self.attack_sprites)
-                        self.state = State.ATTACK
-                        self.index = 0
-                    case pg.K_SPACE:
-                        self.update_sprite(self.jump_sprites)
-                        self.state = State.JUMP
-                        self.index = 0
-                    case pg.K_x:
-                        self.update_sprite(self.kick_sprites)
-                        self.state = State.KICK
-                        self.index = 0
-                    case pg.K_f:
-                        if self.energy >= 50:
-                            self.update_sprite(self.shoot_fireball_sprites)
-                            self.state = State.SHOOT_FIREBALL
-                            self.index = 0
-                            self.energy -= 50
-
-                    case _:
-                        self.state = State.IDLE
-            elif event.type == pg.QUIT:
-                return True
-
-        return False
+        if inputs.other:
+            self.state = State.IDLE
+        if inputs.attack:
+            self.set_animation(self.attack_animation)
+            self.state = State.ATTACK
+            self.index = 0
+        if inputs.jump:
+            self.set_animation(self.jump_animation)
+            self.state = State.JUMP
+            self.index = 0
+        if inputs.kick:
+            self.set_animation(self.kick_animation)
+            self.state = State.KICK
+            self.index = 0
+        if inputs.fireball and self.energy >= 50:
+            self.set_animation(self.shoot_fireball_animation)
+            self.state = State.SHOOT_FIREBALL
+            self.index = 0
+            self.energy -= 50
 
     def get_hurt_box(self) -> pg.Rect | None:
-        new_idx = self.index % len(self.current_sprites)
-        w = self.current_sprites[new_idx].get_width()
-        h = self.current_sprites[new_idx].get_height()
-        d = self.current_sprites[new_idx].get_width() - self.idle_sprites[0].get_width()
-        if self.direction == Direction.LEFT and d > 0:
-            return pg.Rect(self.x - int(d * 0.4), self.ground_y - h, int(w * 0.6), h - 25).move(0, 25)
-        return pg.Rect(self.x, self.ground_y - h, int(w * 0.6), h - 25).move(30, 25)
+        x, y, w, h, frame_h = self.frame_data.hurt_boxes[
+            (self.current_animation.name, self.index % len(self.current_animation), self.direction)
+        ]
+        return pg.Rect(self.x + x, int(self.ground_y - frame_h) + y, w, h)
 
     def get_hit_boxs_and_damage(self) -> tuple[list[pg.Rect], int]:
-        new_idx = self.index % len(self.current_sprites)
-        h = self.current_sprites[new_idx].get_height()
-        match self.state:
-            case State.ATTACK:
-                match self.index:
-                    case 2:
-                        offset_x = 180
-                        damage = 10
-                        if self.direction == Direction.LEFT:
-                            return [
-                                       pg
-                                       .Rect(-140, 40, self.current_sprites[2].get_width() - offset_x, 25)
-                                       .move(self.x, self.ground_y - h)
-                                   ], damage
-                        return [
-                                   pg
-                                   .Rect(offset_x, 40, self.current_sprites[2].get_width() - offset_x, 25)
-                                   .move(self.x, self.ground_y - h)
-                               ], damage
-                    case 9:
-                        offset_xs = [
-                            190,
-                            205,
-                            230,
-                        ]
-                        damage = 20
-                        if self.direction == Direction.LEFT:
-                            return [
-                                       pg
-                                       .Rect(-55, 30, self.current_sprites[8].get_width() - offset_xs[-3] - 50, 40)
-                                       .move(self.x, self.ground_y - h),
-                                       pg
-                                       .Rect(-70, 70, self.current_sprites[8].get_width() - offset_xs[-2] - 20, 40)
-                                       .move(self.x, self.ground_y - h),
-                                       pg
-                                       .Rect(-95, 110, self.current_sprites[9].get_width() - offset_xs[-1] - 10, 40)
-                                       .move(self.x, self.ground_y - h),
-                                   ], damage
-                        return [
-                                   pg
-                                   .Rect(offset_xs[-3], 30, self.current_sprites[8].get_width() - offset_xs[-3] - 50,
-                                         40)
-                                   .move(self.x, self.ground_y - h),
-                                   pg
-                                   .Rect(offset_xs[-2], 70, self.current_sprites[8].get_width() - offset_xs[-2] - 20,
-                                         40)
-                                   .move(self.x, self.ground_y - h),
-                                   pg
-                                   .Rect(offset_xs[-1], 110, self.current_sprites[9].get_width() - offset_xs[-1] - 10,
-                                         40)
-                                   .move(self.x, self.ground_y - h)
-                               ], damage
-                    case 12:
-                        offset_x = 160
-                        if self.direction == Direction.LEFT:
-                            return [
-                                       pg
-                                       .Rect(-30, 0, self.current_sprites[12].get_width() - offset_x - 5, 100)
-                                       .move(self.x, self.ground_y - h)
-                                   ], 30
-                        return [
-                                   pg
-                                   .Rect(offset_x, 0, self.current_sprites[12].get_width() - offset_x - 5, 100)
-                                   .move(self.x, self.ground_y - h)
-                               ], 30
-            case State.KICK:
-                match self.index:
-                    case 2:
-                        w = self.current_sprites[2].get_width()
-                        offset_xs = [
-                            150,
-                            200,
-                            230,
-                        ]
-                        damage = 10
-                        if self.direction == Direction.LEFT:
-                            return [
-                                       pg
-                                       .Rect(-20, 50, offset_xs[-2] - offset_xs[-3], 40)
-                                       .move(self.x, self.ground_y - h),
-                                       pg
-                                       .Rect(-50, 30, offset_xs[-1] - offset_xs[-2], 40)
-                                       .move(self.x, self.ground_y - h),
-                                       pg
-                                       .Rect(-120, 10, w - offset_xs[-1], 30)
-                                       .move(self.x, self.ground_y - h),
-                                   ], damage
-                        return [
-                                   pg
-                                   .Rect(offset_xs[-3], 50, offset_xs[-2] - offset_xs[-3], 40)
-                                   .move(self.x, self.ground_y - h),
-                                   pg
-                                   .Rect(offset_xs[-2], 30, offset_xs[-1] - offset_xs[-2], 40)
-                                   .move(self.x, self.ground_y - h),
-                                   pg
-                                   .Rect(offset_xs[-1], 10, w - offset_xs[-1], 30)
-                                   .move(self.x, self.ground_y - h),
-                               ], damage
-                    case 5:
-                        w = self.current_sprites[5].get_width()
-                        offset_xs = [
-                            120,
-                            150,
-                        ]
-                        damage = 15
-                        if self.direction == Direction.LEFT:
-                            return [
-                                       pg
-                                       .Rect(0, 110, w - offset_xs[-2] - 50, 30)
-                                       .move(self.x, self.ground_y - h),
-                                       pg
-                                       .Rect(-40, 140, w - offset_xs[-1] - 10, 30)
-                                       .move(self.x, self.ground_y - h),
-                                   ], damage
-                        return [
-                                   pg
-                                   .Rect(offset_xs[-2], 110, w - offset_xs[-2] - 50, 30)
-                                   .move(self.x, self.ground_y - h),
-                                   pg
-                                   .Rect(offset_xs[-1], 140, w - offset_xs[-1] - 10, 30)
-                                   .move(self.x, self.ground_y - h),
-                               ], damage
-
-        return [], 0
+        frame = self.frame_data.hit_boxes.get((self.state, self.index, self.direction))
+        if frame is None:
+            return [], 0
+        boxes, damage, frame_h = frame
+        top = int(self.ground_y - frame_h)
+        return [pg.Rect(self.x + x, top + y, w, h) for x, y, w, h in boxes], damage
 
 
 class AIController:
-    def __init__(self, max_num_frame: int):
+    # keyword arguments a tournament can sweep
+    tunables = ('engage_distance', 'guard_distance', 'fireball_energy', 'attack_odds')
+
+    def __init__(self, max_num_frame: int, engage_distance: int = 150, guard_distance: int = 100,
+                 fireball_energy: int = 50, attack_odds: int = 144):
+        """
+        :param engage_distance: walks towards the opponent while further away than this
+        :param guard_distance: guards against an attack from this close, else attacks or kicks
+        :param fireball_energy: energy needed before shooting, at least the 50 a fireball costs
+        :param attack_odds: acts on one idle tick in this many, on average
+        """
+        if fireball_energy < 50:
+            raise ValueError('fireball_energy is below the cost of a fireball')
+        if attack_odds < 1:
+            raise ValueError('attack_odds must be at least 1')
         self.lock_animation = 0
         self.max_num_frame = max_num_frame
-        self.random = random.SystemRandom()
+        self.engage_distance = engage_distance
+        self.guard_distance = guard_distance
+        self.fireball_energy = fireball_energy
+        self.attack_odds = attack_odds
+        self.random = random.Random()
+
+    def reset(self, seed: int | None = None):
+        self.lock_animation = 0
+        if seed is not None:
+            self.random.seed(seed)
 
     def is_able_shoot_fireball(self, ai: Direction, human: Direction, distance: int) -> bool:
         if ai == Direction.LEFT and human == Direction.RIGHT:
@@ -640,17 +1605,18 @@ class AIController:
         if ai.state == State.IDLE:
 
             # When ai energy above threshold and it has opposite direction as player, shoot fireball immediately
-            if ai.energy >= 50 and self.is_able_shoot_fireball(ai.direction, human.direction, distance):
-                    self.lock_animation = len(ai.shoot_fireball_sprites) * self.max_num_frame
+            if (ai.energy >= self.fireball_energy
+                    and self.is_able_shoot_fireball(ai.direction, human.direction, distance)):
+                    self.lock_animation = len(ai.shoot_fireball_animation) * self.max_num_frame
                     ai.energy -= 50
-                    ai.update_sprite(ai.shoot_fireball_sprites)
+                    ai.set_animation(ai.shoot_fireball_animation)
                     ai.state = State.SHOOT_FIREBALL
                     ai.index = 0
             # In IDLE, it has the tendency to move towards the player
-            elif distance < -150:
+            elif distance < -self.engage_distance:
                 ai.direction = Direction.RIGHT
                 index = ai.get_direction_idx()
-                ai.update_sprite(ai.move_sprites[index if ai.is_move_right else 1 - index])
+                ai.set_animation(ai.move_animations[index if ai.is_move_right else 1 - index])
                 ai.state = State.MOVE
                 ai.is_move_right = True
                 ai.x += int(ai.velocity * 1 / 2)
@@ -659,33 +1625,33 @@ class AIController:
                 elif ai.x >= 1280:
                     ai.x = 1280
                 ai.state = State.IDLE
-            elif distance >= 150:
+            elif distance >= self.engage_distance:
                 ai.direction = Direction.LEFT
                 index = ai.get_direction_idx()
-                ai.update_sprite(ai.move_sprites[index if ai.is_move_right else 1 - index])
+                ai.set_animation(ai.move_animations[index if ai.is_move_right else 1 - index])
                 ai.state = State.MOVE
                 ai.is_move_right = False
                 ai.x -= int(ai.velocity / 2)
                 if ai.x <= human.x:
                     ai.x = human.x
                 ai.state = State.IDLE
-            elif self.random.randint(0, 143) == 0:
-                if human.state == State.ATTACK and abs(distance) <= 100 and ai.state == State.IDLE:
-                    self.lock_animation = len(ai.guard_sprites) * self.max_num_frame
-                    ai.update_sprite(ai.guard_sprites)
+            elif self.random.randint(0, self.attack_odds - 1) == 0:
+                if human.state == State.ATTACK and abs(distance) <= self.guard_distance and ai.state == State.IDLE:
+                    self.lock_animation = len(ai.guard_animation) * self.max_num_frame
+                    ai.set_animation(ai.guard_animation)
                     ai.state = State.GUARD
                     ai.index = 0
                 else:
                     seed = self.random.randint(0,1)
                     match seed:
                         case 0:
-                            self.lock_animation = len(ai.attack_sprites) * self.max_num_frame
-                            ai.update_sprite(ai.attack_sprites)
+                            self.lock_animation = len(ai.attack_animation) * self.max_num_frame
+                            ai.set_animation(ai.attack_animation)
                             ai.state = State.ATTACK
                             ai.index = 0
                         case 1:
-                            self.lock_animation = len(ai.kick_sprites) * self.max_num_frame
-                            ai.update_sprite(ai.kick_sprites)
+                            self.lock_animation = len(ai.kick_animation) * self.max_num_frame
+                            ai.set_animation(ai.kick_animation)
                             ai.state = State.KICK
                             ai.index = 0
 
@@ -704,110 +1670,1549 @@ class AIController:
             self.lock_animation -= 1
 
 
+class Simulation:
+    """
+    Headless game core: both fighters, their fireballs, hit detection and the round timer.
+    step() advances one tick from plain PlayerInput records and needs no window, surface or SDL video driver;
+    rendering only reads this state.
+    """
+
+    def __init__(self, max_health: int = 500, round_time: float = 90.0, tick_rate: int = 144, width: int = 1280,
+                 seed: int | None = None):
+        """
+        :param seed: seed of the AI for the first round, a random one when None
+        """
+        self.max_health = max_health
+        self.round_time = round_time
+        self.tick_rate = tick_rate
+        self.width = width
+        self.delta_t = 1 / tick_rate
+        self.players: list[Player] = [
+            Player(RYU_SPRITES_PATH, 50, 620, max_health, False, Direction.RIGHT, tick_rate),
+            Player(RYU_SPRITES_PATH, width - 230, 620, max_health, True, Direction.LEFT, tick_rate),
+        ]
+        self.ai_controllers = [AIController(tick_rate), AIController(tick_rate)]
+        self.projectiles = Projectiles(self.players[0].fireball_animation, width=width, tick_rate=tick_rate)
+        self.reset(seed)
+
+    def reset(self, seed: int | None = None):
+        """
+        Start a round; the same seed and the same inputs play out the same round
+        :param seed: seed of the AI, a random one when None
+        """
+        self.seed = random.SystemRandom().getrandbits(32) if seed is None else seed
+        self.timer = self.round_time
+        self.winner = ""
+        self.tick = 0
+        # names of the sounds triggered during the last step
+        self.events: list[str] = []
+        for player in self.players:
+            player.reset()
+        for i, ai_controller in enumerate(self.ai_controllers):
+            ai_controller.reset(self.seed * 2 + i)
+        self.projectiles.clear()
+
+    def state_hash(self) -> int:
+        """
+        :return: CRC-32 of everything step() reads and writes, for checking that two runs stay identical
+        """
+        players = tuple(
+            (player.state.value, player.prev_state.value, player.direction.value, player.is_move_right,
+             player.ground_y, player.health, player.jump_speed, player.energy, player.current_num_frames,
+             player.index, player.current_animation.name, player.x, player.y, player.w, player.h, player.prev_x,
+             player.lock)
+            for player in self.players
+        )
+        ai = tuple(ai_controller.lock_animation for ai_controller in self.ai_controllers)
+        crc = zlib.crc32(repr((self.tick, self.timer, self.winner, players, ai)).encode())
+        projectiles = self.projectiles
+        alive = projectiles.alive
+        for values in (projectiles.x, projectiles.y, projectiles.direction, projectiles.frame,
+                       projectiles.frame_ticks, projectiles.owner):
+            crc = zlib.crc32(values[alive].tobytes(), crc)
+        return crc
+
+    def step(self, inputs: Sequence[PlayerInput | None]):
+        """
+        :param inputs: one record per player, None hands that player to its AIController for this tick
+        """
+        self.events.clear()
+        for player in self.players:
+            player.last_x = player.x
+            player.last_ground_y = player.ground_y
+
+        if self.players[1].get_hit(self.players[0]):
+            self.events.append('punch')
+        if self.players[0].get_hit(self.players[1]):
+            self.events.append('punch')
+
+        shooting = [player.state == State.SHOOT_FIREBALL for player in self.players]
+        for i, player in enumerate(self.players):
+            if inputs[i] is None:
+                self.ai_controllers[i].update_AI_state(player, self.players[1 - i])
+            else:
+                player.handle_input(inputs[i])
+            if player.state == State.SHOOT_FIREBALL and not shooting[i]:
+                # the shout starts with the throw, not when the fireball leaves the hand
+                self.events.append('hadouken')
+
+        if not self.winner:
+            self.timer -= self.delta_t
+            if self.timer <= 0:
+                self.winner = "No"
+        if self.players[0].health <= 0:
+            self.winner = "PLAYER 2"
+        elif self.players[1].health <= 0:
+            self.winner = "PLAYER 1"
+
+        self.projectiles.step(self.players)
+
+        for i, player in enumerate(self.players):
+            fireball_origin = player.update()
+            if fireball_origin is not None:
+                self.projectiles.spawn(*fireball_origin, player.direction, i)
+
+        self.tick += 1
+
+    def snapshot(self) -> tuple:
+        """
+        :return: everything step() changes except the AI random generators, which a search that gives both sides
+            explicit inputs never touches
+        """
+        return (self.timer, self.winner, self.tick, self.events[:], [player.snapshot() for player in self.players],
+                [ai_controller.lock_animation for ai_controller in self.ai_controllers], self.projectiles.snapshot())
+
+    def restore(self, snapshot: tuple):
+        self.timer, self.winner, self.tick, events, players, locks, projectiles = snapshot
+        self.events[:] = events
+        for player, state in zip(self.players, players):
+            player.restore(state)
+        for ai_controller, lock_animation in zip(self.ai_controllers, locks):
+            ai_controller.lock_animation = lock_animation
+        self.projectiles.restore(projectiles)
+
+
+class SearchAI:
+    """
+    Lookahead AI. It snapshots the simulation, plays each action ``horizon`` ticks ahead with the opponent standing
+    still and adopts the action with the best outcome, then starts over from the state of that moment. The rollouts
+    run on the live simulation, which is restored before get_input returns, and are spread over as many frames as
+    the frame budget needs, so the AI reacts a few ticks late instead of ever costing a frame.
+    """
+    actions = ('idle', 'toward', 'away', 'turn', 'guard', 'attack', 'kick', 'jump', 'fireball')
+    # how fast the cost estimates forget a slow operation, per call of think
+    decay = 0.97
+
+    def __init__(self, frame_budget_ms: float = 1.0, horizon: int = 48):
+        """
+        :param frame_budget_ms: search time allowed per rendered frame, see begin_frame
+        :param horizon: ticks played ahead, long enough for an attack to land
+        """
+        self.frame_budget_ns = int(frame_budget_ms * 1e6)
+        self.remaining_ns = self.frame_budget_ns
+        self.horizon = horizon
+        self.action = PlayerInput()
+        self.next_tick = -1
+        self.root = None
+        self.cursor = None
+        self.root_tick = 0
+        self.baseline = (0, 0, 0)
+        self.candidates: list[PlayerInput] = []
+        self.scores: list[float] = []
+        self.tick = 0
+        self.decisions = 0
+        self.reaction_ticks = 0
+        self.frames = 0
+        self.search_ns = 0
+        self.max_frame_ns = 0
+        # decaying peaks of what a snapshot, a restore and a rollout tick cost, to keep them within the budget
+        self.snapshot_ns = 0.0
+        self.restore_ns = 0.0
+        self.step_ns = 0.0
+
+    def begin_frame(self):
+        self.remaining_ns = self.frame_budget_ns
+
+    def action_input(self, action: str, me: Player, opponent: Player) -> PlayerInput:
+        toward_right = opponent.x > me.x
+        match action:
+            case 'toward':
+                return PlayerInput(right=toward_right, left=not toward_right)
+            case 'away':
+                return PlayerInput(right=not toward_right, left=toward_right)
+            case 'turn':
+                return PlayerInput(right=toward_right, left=not toward_right, shift=True)
+            case 'guard':
+                return PlayerInput(guard=True)
+            case 'attack':
+                return PlayerInput(attack=True)
+            case 'kick':
+                return PlayerInput(kick=True)
+            case 'jump':
+                return PlayerInput(jump=True)
+            case 'fireball':
+                return PlayerInput(fireball=True)
+        return PlayerInput()
+
+    def get_input(self, simulation: Simulation, side: int) -> PlayerInput:
+        """
+        :return: this tick's input for ``simulation.players[side]``
+        """
+        if simulation.tick != self.next_tick:
+            # a new round or another simulation, the search in progress is of no use
+            self.root = None
+        self.next_tick = simulation.tick + 1
+        if self.remaining_ns > 0:
+            best = self.think(simulation, side)
+            if best is not None:
+                self.action = best
+                return best
+        return self.action.without_presses()
+
+    def begin_search(self, simulation: Simulation, side: int):
+        me, opponent = simulation.players[side], simulation.players[1 - side]
+        self.root = self.cursor = simulation.snapshot()
+        self.root_tick = simulation.tick
+        self.baseline = (me.health, opponent.health, me.energy)
+        self.candidates = [self.action_input(action, me, opponent) for action in self.actions]
+        self.scores = []
+        self.tick = 0
+
+    @staticmethod
+    def cost(estimate: float, start: int) -> tuple[float, int]:
+        """
+        :param start: when the operation began, in perf_counter_ns
+        :return: the estimate raised to what the operation took, and the time now
+        """
+        now = time.perf_counter_ns()
+        return max(now - start, estimate), now
+
+    def think(self, simulation: Simulation, side: int) -> PlayerInput | None:
+        """
+        Carry on with the rollouts for the rest of this frame's budget, one tick at a time. The snapshots and
+        restores around them come out of the budget too; a budget too small for them and a tick is left unused.
+        :return: the best action once every candidate has been played out, else None
+        """
+        start = time.perf_counter_ns()
+        # a one-off slow operation must not hold the search back for good
+        self.snapshot_ns *= self.decay
+        self.restore_ns *= self.decay
+        self.step_ns *= self.decay
+        setup_ns = self.snapshot_ns * (2 if self.root is None else 1) + self.restore_ns
+        if setup_ns + self.snapshot_ns + self.restore_ns + self.step_ns > self.remaining_ns:
+            self.remaining_ns = 0
+            return None
+        if self.root is None:
+            self.begin_search(simulation, side)
+        mark = time.perf_counter_ns()
+        live = simulation.snapshot()
+        self.snapshot_ns, mark = self.cost(self.snapshot_ns, mark)
+        simulation.restore(self.cursor)
+        self.restore_ns, mark = self.cost(self.restore_ns, mark)
+        # leave enough for the snapshot of the cursor and the restore of the live state at the end
+        deadline = start + self.remaining_ns - self.snapshot_ns - self.restore_ns
+        inputs = [PlayerInput(), PlayerInput()]
+        best = None
+        while mark + self.step_ns + (self.restore_ns if self.tick + 1 == self.horizon else 0) < deadline:
+            candidate = self.candidates[len(self.scores)]
+            inputs[side] = candidate if self.tick == 0 else candidate.without_presses()
+            simulation.step(inputs)
+            self.step_ns, mark = self.cost(self.step_ns, mark)
+            self.tick += 1
+            if self.tick < self.horizon and not simulation.winner:
+                continue
+            self.scores.append(self.score(simulation, side))
+            self.tick = 0
+            mark = time.perf_counter_ns()
+            simulation.restore(self.root)
+            self.restore_ns, mark = self.cost(self.restore_ns, mark)
+            if len(self.scores) == len(self.candidates):
+                best = self.candidates[self.scores.index(max(self.scores))]
+                self.decisions += 1
+                self.reaction_ticks += live[2] - self.root_tick
+                self.root = None
+                break
+        mark = time.perf_counter_ns()
+        if self.root is not None:
+            self.cursor = simulation.snapshot()
+            self.snapshot_ns, mark = self.cost(self.snapshot_ns, mark)
+        simulation.restore(live)
+        self.restore_ns, _ = self.cost(self.restore_ns, mark)
+        elapsed = time.perf_counter_ns() - start
+        self.remaining_ns -= elapsed
+        self.frames += 1
+        self.search_ns += elapsed
+        self.max_frame_ns = max(self.max_frame_ns, elapsed)
+        return best
+
+    def score(self, simulation: Simulation, side: int) -> float:
+        """
+        :return: how good the rollout that brought ``simulation`` here turned out
+        """
+        me, opponent = simulation.players[side], simulation.players[1 - side]
+        health, opponent_health, energy = self.baseline
+        score = (opponent_health - opponent.health) - 1.5 * (health - me.health) + 0.1 * (me.energy - energy)
+        # stay about a punch away from the opponent
+        return score - 0.01 * abs(abs(opponent.x - me.x) - 150)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            'decisions': self.decisions,
+            'mean_reaction_ticks': self.reaction_ticks / max(self.decisions, 1),
+            'frames_searched': self.frames,
+            'mean_frame_ms': self.search_ns / max(self.frames, 1) / 1e6,
+            'max_frame_ms': self.max_frame_ns / 1e6,
+        }
+
+
+class Recording:
+    """
+    One round as the AI seed, the simulation settings and, per tick, both sides' inputs and the state hash
+    after the tick; enough to play the round again and check that it plays out identically.
+    Stored as a fixed header followed by 8 bytes per tick.
+    """
+    magic = b'SFRP'
+    version = 1
+    header = struct.Struct('<4sHIIdHH')
+    # input bits of each side, AI_INPUT for a side the AI played, state hash
+    record = struct.Struct('<HHI')
+    AI_INPUT = 0xFFFF
+
+    def __init__(self, seed: int, max_health: int, round_time: float, tick_rate: int, width: int,
+                 ticks: bytes = b''):
+        self.seed = seed
+        self.max_health = max_health
+        self.round_time = round_time
+        self.tick_rate = tick_rate
+        self.width = width
+        self.ticks = bytearray(ticks)
+
+    @classmethod
+    def of(cls, simulation: Simulation) -> 'Recording':
+        """
+        :return: an empty recording of the round ``simulation`` has just started
+        """
+        return cls(simulation.seed, simulation.max_health, simulation.round_time, simulation.tick_rate,
+                   simulation.width)
+
+    def simulation(self) -> Simulation:
+        return Simulation(self.max_health, self.round_time, self.tick_rate, self.width, self.seed)
+
+    def __len__(self) -> int:
+        return len(self.ticks) // self.record.size
+
+    def add(self, inputs: Sequence[PlayerInput | None], state_hash: int):
+        self.ticks += self.record.pack(*(self.AI_INPUT if player_input is None else player_input.to_bits()
+                                         for player_input in inputs), state_hash)
+
+    def inputs(self, tick: int) -> list[PlayerInput | None]:
+        bits = self.record.unpack_from(self.ticks, tick * self.record.size)[:2]
+        return [None if side == self.AI_INPUT else PlayerInput.from_bits(side) for side in bits]
+
+    def state_hash(self, tick: int) -> int:
+        return self.record.unpack_from(self.ticks, tick * self.record.size)[2]
+
+    def replay(self) -> tuple[Simulation, int | None]:
+        """
+        Play the round headless as fast as possible
+        :return: the simulation after the last tick, and the first tick whose state hash differs or None
+        """
+        simulation = self.simulation()
+        for tick in range(len(self)):
+            simulation.step(self.inputs(tick))
+            if simulation.state_hash() != self.state_hash(tick):
+                return simulation, tick
+        return simulation, None
+
+    def save(self, path: str):
+        with open(path, 'wb') as file:
+            file.write(self.header.pack(self.magic, self.version, self.seed, self.max_health, self.round_time,
+                                        self.tick_rate, self.width))
+            file.write(self.ticks)
+
+    @classmethod
+    def load(cls, path: str) -> 'Recording':
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, seed, max_health, round_time, tick_rate, width = cls.header.unpack_from(data)
+        if magic != cls.magic or version != cls.version:
+            raise ValueError(f'{path} is not a version {cls.version} recording')
+        return cls(seed, max_health, round_time, tick_rate, width, data[cls.header.size:])
+
+
+class UdpTransport:
+    """
+    Non-blocking UDP socket talking to one peer. Latency and packet loss can be injected on the sending side, so two
+    local processes can play as if over a real network; delayed packets leave on the next send or receive call.
+    """
+
+    def __init__(self, port: int = 0, peer: tuple[str, int] | None = None, address: str = '0.0.0.0',
+                 delay_ms: float = 0.0, loss: float = 0.0, seed: int | None = None):
+        """
+        :param port: local port, 0 picks a free one
+        :param peer: address of the other side, None takes it from the first packet received
+        :param delay_ms: added to every packet sent
+        :param loss: fraction of the packets sent that are dropped instead
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((address, port))
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+        self.peer = peer
+        self.delay_ns = int(delay_ms * 1e6)
+        self.loss = loss
+        self.random = random.Random(seed)
+        # (due time, payload), in due order since the delay is constant
+        self.outbox: deque[tuple[int, bytes]] = deque()
+        self.sent = 0
+        self.dropped = 0
+        self.received = 0
+
+    def send(self, payload: bytes):
+        if self.peer is None:
+            return
+        self.sent += 1
+        if self.random.random() < self.loss:
+            self.dropped += 1
+            return
+        self.outbox.append((time.perf_counter_ns() + self.delay_ns, payload))
+        self.flush()
+
+    def flush(self):
+        now = time.perf_counter_ns()
+        while self.outbox and self.outbox[0][0] <= now:
+            self.socket.sendto(self.outbox.popleft()[1], self.peer)
+
+    def receive(self) -> list[bytes]:
+        """
+        :return: the packets from the peer that arrived since the last call
+        """
+        self.flush()
+        packets = []
+        while True:
+            try:
+                payload, address = self.socket.recvfrom(2048)
+            except BlockingIOError:
+                break
+            except ConnectionRefusedError:
+                # an earlier packet found no one listening yet
+                continue
+            if self.peer is None:
+                self.peer = address
+            if address == self.peer:
+                packets.append(payload)
+        self.received += len(packets)
+        return packets
+
+    def close(self):
+        self.socket.close()
+
+    def stats(self) -> dict[str, int]:
+        return {'packets_sent': self.sent, 'packets_dropped': self.dropped, 'packets_received': self.received}
+
+
+class RollbackSession:
+    """
+    Two-machine play over a UdpTransport with rollback. Each side steps every tick right away with the other side's
+    input predicted as its last known held keys without presses, snapshotting the simulation before each tick. When
+    the real input arrives and differs, the simulation is restored to the first mispredicted tick and stepped forward
+    again within the same frame. Local input takes effect ``input_delay`` ticks late to hide part of the latency,
+    and a side stalls rather than predict more than ``max_rollback`` ticks ahead of the other.
+    Every packet repeats the inputs the peer has not acknowledged yet, so a lost packet costs no input, and carries
+    the state hash of a recent confirmed tick to catch a desync.
+    """
+    magic = b'SFNP'
+    version = 1
+    HELLO, WELCOME, INPUTS = range(3)
+    hello = struct.Struct('<4sBB')
+    # + seed of the round
+    welcome = struct.Struct('<4sBBI')
+    # + last remote tick received, first tick and count of the input bits that follow, a confirmed tick and its hash
+    inputs_header = struct.Struct('<4sBBiIHiI')
+    max_inputs_per_packet = 64
+    hash_interval = 16
+
+    def __init__(self, side: int, transport: UdpTransport, input_delay: int = 2, max_rollback: int = 8):
+        """
+        :param side: index of the local player, 0 hosts and picks the seed, 1 joins
+        """
+        self.side = side
+        self.transport = transport
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        self.simulation: Simulation | None = None
+        self.connected = False
+        self.local_inputs: list[PlayerInput] = []
+        # confirmed remote inputs, always a contiguous run from tick 0
+        self.remote_inputs: list[PlayerInput] = []
+        # remote inputs stepped with but not yet confirmed, by tick
+        self.predicted: dict[int, PlayerInput] = {}
+        # snapshot taken before each of the last ticks, by tick modulo the ring size
+        self.snapshots: list[tuple | None] = [None] * (max_rollback + 1)
+        self.peer_ack = -1
+        self.hashes: dict[int, int] = {}
+        self.remote_hashes: dict[int, int] = {}
+        self.last_hash = (-1, 0)
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.max_depth = 0
+        self.rollback_ns = 0
+        self.max_rollback_ns = 0
+        self.stalls = 0
+        self.desyncs = 0
+
+    def synchronize(self, simulation: Simulation, seed: int | None = None, timeout: float = 30.0):
+        """
+        Wait for the other side and start the round on ``simulation`` with the host's seed
+        :param seed: seed of the round when hosting, a random one when None
+        """
+        self.simulation = simulation
+        if self.side == 0:
+            simulation.reset(seed)
+        deadline = time.perf_counter() + timeout
+        next_hello = 0.0
+        while not self.connected:
+            now = time.perf_counter()
+            if now > deadline:
+                raise TimeoutError('the other player did not answer')
+            if self.side == 1 and now >= next_hello:
+                self.transport.send(self.hello.pack(self.magic, self.version, self.HELLO))
+                next_hello = now + 0.05
+            self.poll()
+            time.sleep(0.001)
+        self.local_inputs = [PlayerInput()] * self.input_delay
+
+    def poll(self):
+        """
+        Read the packets that arrived and roll back when they show a misprediction
+        """
+        mispredicted = None
+        for packet in self.transport.receive():
+            if len(packet) < self.hello.size or packet[:4] != self.magic or packet[4] != self.version:
+                continue
+            kind = packet[5]
+            if kind == self.HELLO and self.side == 0:
+                self.transport.send(self.welcome.pack(self.magic, self.version, self.WELCOME, self.simulation.seed))
+                self.connected = True
+            elif kind == self.WELCOME and self.side == 1 and not self.connected:
+                self.simulation.reset(self.welcome.unpack(packet)[3])
+                self.connected = True
+            elif kind == self.INPUTS and self.connected:
+                tick = self.receive_inputs(packet)
+                if tick is not None and (mispredicted is None or tick < mispredicted):
+                    mispredicted = tick
+        if mispredicted is not None:
+            self.rollback(mispredicted)
+
+    def receive_inputs(self, packet: bytes) -> int | None:
+        """
+        :return: the first tick whose remote input was predicted wrong, None when every prediction held
+        """
+        _, _, _, ack, start, count, hash_tick, state_hash = self.inputs_header.unpack_from(packet)
+        self.peer_ack = max(self.peer_ack, ack)
+        if hash_tick >= 0:
+            self.check_hash(hash_tick, state_hash, self.remote_hashes, self.hashes)
+        first = len(self.remote_inputs)
+        if start > first:
+            # an older packet overtaken by a newer one is of no use, a gap is filled by the next packet
+            return None
+        mispredicted = None
+        bits = struct.unpack_from(f'<{count}H', packet, self.inputs_header.size)
+        for tick in range(first, start + count):
+            player_input = PlayerInput.from_bits(bits[tick - start])
+            self.remote_inputs.append(player_input)
+            predicted = self.predicted.pop(tick, None)
+            if predicted is not None and predicted != player_input and mispredicted is None:
+                mispredicted = tick
+        return mispredicted
+
+    def check_hash(self, tick: int, state_hash: int, store: dict[int, int], other: dict[int, int]):
+        """
+        Keep one side's hash of a confirmed tick in ``store`` and compare it with the other side's, if known
+        """
+        if tick in other:
+            if other.pop(tick) != state_hash:
+                self.desyncs += 1
+                if self.desyncs == 1:
+                    log.warning(f'the other side has a different state at tick {tick}, the sides have desynced')
+        else:
+            store[tick] = state_hash
+        for old in [old for old in store if old < tick - 64 * self.hash_interval]:
+            del store[old]
+
+    def step(self):
+        simulation = self.simulation
+        tick = simulation.tick
+        self.snapshots[tick % len(self.snapshots)] = simulation.snapshot()
+        confirmed = tick < len(self.remote_inputs)
+        if confirmed:
+            remote = self.remote_inputs[tick]
+        else:
+            remote = self.remote_inputs[-1].without_presses() if self.remote_inputs else PlayerInput()
+            self.predicted[tick] = remote
+        inputs = [remote, remote]
+        inputs[self.side] = self.local_inputs[tick]
+        simulation.step(inputs)
+        if confirmed and tick % self.hash_interval == 0:
+            self.last_hash = (tick, simulation.state_hash())
+            self.check_hash(*self.last_hash, self.hashes, self.remote_hashes)
+
+    def rollback(self, tick: int):
+        """
+        Restore the snapshot taken before ``tick`` and step forward again to where the simulation was
+        """
+        start = time.perf_counter_ns()
+        simulation = self.simulation
+        end = simulation.tick
+        simulation.restore(self.snapshots[tick % len(self.snapshots)])
+        while simulation.tick < end and not simulation.winner:
+            self.step()
+        elapsed = time.perf_counter_ns() - start
+        self.rollbacks += 1
+        self.resimulated += end - tick
+        self.max_depth = max(self.max_depth, end - tick)
+        self.rollback_ns += elapsed
+        self.max_rollback_ns = max(self.max_rollback_ns, elapsed)
+
+    def advance(self, local_input: PlayerInput) -> bool:
+        """
+        Step one tick; ``local_input`` takes effect ``input_delay`` ticks from now
+        :return: False when the other side is too far behind and the tick has to wait
+        """
+        if self.simulation.tick - len(self.remote_inputs) >= self.max_rollback:
+            self.stalls += 1
+            return False
+        self.local_inputs.append(local_input)
+        self.step()
+        return True
+
+    def send(self):
+        """
+        Send the local inputs the peer has not acknowledged, call once per frame after the ticks
+        """
+        first = self.peer_ack + 1
+        bits = [player_input.to_bits()
+                for player_input in self.local_inputs[first:first + self.max_inputs_per_packet]]
+        self.transport.send(self.inputs_header.pack(self.magic, self.version, self.INPUTS, len(self.remote_inputs) - 1,
+                                                    first, len(bits), *self.last_hash)
+                            + struct.pack(f'<{len(bits)}H', *bits))
+
+    def settled(self, tick: int) -> bool:
+        """
+        :return: whether both sides have every input up to ``tick`` and nothing before it can roll back
+        """
+        return len(self.remote_inputs) >= tick and self.peer_ack >= tick - 1
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            'ticks': self.simulation.tick,
+            'rollbacks': self.rollbacks,
+            'resimulated_ticks': self.resimulated,
+            'max_rollback_ticks': self.max_depth,
+            'mean_rollback_ms': self.rollback_ns / max(self.rollbacks, 1) / 1e6,
+            'max_rollback_ms': self.max_rollback_ns / 1e6,
+            'stalls': self.stalls,
+            'desyncs': self.desyncs,
+        } | self.transport.stats()
+
+
+class FighterSprites:
+    """
+    Read-only view that maps a Player's animation, frame index and direction to cached sprite frames
+    """
+
+    def __init__(self, player: Player, costume: str | None = None):
+        """
+        :param costume: one of COSTUMES, 'p2' for the second player and 'default' for the first when None
+        """
+        self.animations: dict[str, OrientedSprites] = {
+            name: assets.get_animation(*key) for name, key in self.animation_keys(player, costume).items()
+        }
+
+    @staticmethod
+    def animation_keys(player: Player, costume: str | None = None) -> dict[str, tuple]:
+        """
+        :return: the AssetManager.get_animation arguments of each of the player's animations, by name
+        """
+        costume = costume or ('p2' if player.p2 else 'default')
+        # one fireball look for both sides, the projectile pool draws every fireball with the same frames
+        return {
+            name: (player.path, animation.rects, player.scaler, 'default' if name == 'fireball' else costume)
+            for name, animation in player.animations.items()
+        }
+
+    def get_sprite(self, player: Player) -> Surface:
+        animation = player.current_animation
+        return self.animations[animation.name].get(player.index % len(animation), player.direction)
+
+    def get_fireball_frames(self) -> OrientedSprites:
+        return self.animations['fireball']
+
+
+class HudLayer:
+    """
+    The top bar pre-composed on one colorkeyed layer: name plates are drawn once, a health or energy bar only
+    when its value changes. The timer digits come from the text cache and are blitted on their own.
+    """
+    key_color = (255, 0, 255)
+
+    def __init__(self, width: int, font_time: pg.font.Font, font_player: pg.font.Font, text: TextCache,
+                 max_health: int):
+        self.font_time = font_time
+        self.text = text
+        self.max_health = max_health
+        time_height = font_time.get_height()
+        bar_y = 35 + round(time_height / 2)
+        energy_y = 65 + (time_height >> 1)
+        self.health_rects = (pg.Rect(50, bar_y, 500, 30), pg.Rect(730, bar_y, 500, 30))
+        self.energy_rects = (pg.Rect(50, energy_y, 100, 15), pg.Rect(1130, energy_y, 100, 15))
+        name_plate_1 = text.render(font_player, 'Player 1', False, (0, 0, 0))
+        name_plate_2 = text.render(font_player, 'Player 2', False, (0, 0, 0))
+        plate_rects = (name_plate_1.get_rect(topleft=(50, 30)),
+                       name_plate_2.get_rect(topleft=(1230 - name_plate_2.get_width(), 30)))
+        # every area the layer paints on screen
+        self.rects = [*plate_rects, *self.health_rects, *self.energy_rects]
+
+        self.layer = pg.Surface((width, max(rect.bottom for rect in self.rects))).convert()
+        self.layer.fill(self.key_color)
+        self.layer.blit(name_plate_1, plate_rects[0])
+        self.layer.blit(name_plate_2, plate_rects[1])
+        self.layer.set_colorkey(self.key_color, pg.RLEACCEL)
+        self.values: list[int | None] = [None] * 4
+
+    def update(self, health_1: int, health_2: int, energy_1: int, energy_2: int):
+        """
+        Redraw the bars whose value changed since the last call
+        """
+        redrawn: list[pg.Rect] = []
+        for i, value in enumerate((health_1, health_2, energy_1, energy_2)):
+            rect = self.health_rects[i] if i < 2 else self.energy_rects[i - 2]
+            # the energy bars overlap the bottom row of the health bars and are drawn over them
+            if value == self.values[i] and rect.collidelist(redrawn) == -1:
+                continue
+            self.values[i] = value
+            redrawn.append(rect)
+            if i < 2:
+                pg.draw.rect(self.layer, RED, rect)
+                pg.draw.rect(self.layer, SOFT_GREEN, (rect.x, rect.y, 500 - round(
+                    500 / self.max_health * (self.max_health - value)) if value > 0 else 0, 30))
+            else:
+                pg.draw.rect(self.layer, LIGHT_BLUE, rect)
+                pg.draw.rect(self.layer, BLUE, (rect.x, rect.y, value, 15))
+
+    def draw(self, screen: Surface, timer: int) -> list[pg.Rect]:
+        """
+        :return: the areas drawn
+        """
+        time_text = self.text.render(self.font_time, str(timer), True, (0, 0, 0))
+        time_rect = screen.blit(time_text, (550 + round(180 - time_text.get_width()) / 2, 50))
+        screen.blit(self.layer, (0, 0))
+        return [time_rect, *self.rects]
+
+
+class InputEvent(NamedTuple):
+    type: int
+    key: int
+    pos: tuple[int, int]
+    # time.perf_counter_ns() of the pump that read the event
+    timestamp_ns: int
+
+
+class InputSystem:
+    """
+    The only place SDL events are read. pump() runs once per frame, stamps every event, keeps the last
+    ``capacity`` of them in a ring buffer and hands each one to the subscribers of its type, in subscription
+    order. At most ``max_events_per_pump`` events are taken per pump; the rest stay queued in SDL for the next
+    one, so a pump takes bounded time and nothing is dropped.
+    """
+
+    def __init__(self, capacity: int = 256, max_events_per_pump: int = 64):
+        self.capacity = capacity
+        self.max_events_per_pump = max_events_per_pump
+        self.history: list[InputEvent | None] = [None] * capacity
+        self.recorded = 0
+        self.subscribers: dict[int, list] = {}
+        self.held = pg.key.get_pressed()
+        self.pumps = 0
+        self.capped_pumps = 0
+        self.max_pump_ns = 0
+
+    def subscribe(self, event_types: Sequence[int], handler):
+        """
+        :param handler: called with each InputEvent of one of ``event_types``
+        """
+        for event_type in event_types:
+            self.subscribers.setdefault(event_type, []).append(handler)
+
+    def pump(self) -> int:
+        """
+        Read, record and route the pending events and snapshot the held keys
+        :return: number of events handled
+        """
+        start = time.perf_counter_ns()
+        handled = 0
+        while handled < self.max_events_per_pump:
+            event = pg.event.poll()
+            if event.type == pg.NOEVENT:
+                break
+            record = InputEvent(event.type, getattr(event, 'key', 0), getattr(event, 'pos', (0, 0)), start)
+            self.history[self.recorded % self.capacity] = record
+            self.recorded += 1
+            handled += 1
+            for handler in self.subscribers.get(event.type, ()):
+                handler(record)
+        else:
+            self.capped_pumps += 1
+        self.held = pg.key.get_pressed()
+        self.pumps += 1
+        self.max_pump_ns = max(self.max_pump_ns, time.perf_counter_ns() - start)
+        return handled
+
+    def recent(self, n: int) -> list[InputEvent]:
+        """
+        :return: up to the last ``n`` recorded events, oldest first
+        """
+        n = min(n, self.recorded, self.capacity)
+        return [self.history[i % self.capacity] for i in range(self.recorded - n, self.recorded)]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'events': self.recorded,
+            'pumps': self.pumps,
+            'capped_pumps': self.capped_pumps,
+            'max_pump_us': self.max_pump_ns // 1000,
+        }
+
+
+class LatencyHistogram:
+    """
+    Latency samples in milliseconds, counted in power-of-two buckets; the last ``keep`` samples are kept for
+    percentiles
+    """
+    edges_ms = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self, keep: int = 4096):
+        self.counts = [0] * (len(self.edges_ms) + 1)
+        self.samples: deque[float] = deque(maxlen=keep)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float):
+        self.counts[bisect.bisect_left(self.edges_ms, ms)] += 1
+        self.samples.append(ms)
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)]
+
+    def to_dict(self) -> dict:
+        n = sum(self.counts)
+        return {
+            'count': n,
+            'mean_ms': self.total / n if n else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max,
+            'buckets': {f'<={edge}ms': count for edge, count in zip(self.edges_ms, self.counts)} |
+            {f'>{self.edges_ms[-1]}ms': self.counts[-1]},
+        }
+
+
+class LatencyTracker:
+    """
+    Time from an action key press to the tick that puts the human fighter into the action's state, and to the
+    first presented frame after that tick. A press the fighter ignores (no energy, mid-jump, overridden by a
+    later key on the same tick) is counted but not timed. SDL events carry no timestamp here, so a press is
+    timed from the pump that read it and the wait for that pump, up to one frame, is not included.
+    """
+    actions = {pg.K_a: State.ATTACK, pg.K_x: State.KICK, pg.K_SPACE: State.JUMP, pg.K_f: State.SHOOT_FIREBALL}
+
+    def __init__(self):
+        # (state, press timestamp) read but not applied by a tick yet
+        self.pressed: list[tuple[State, int]] = []
+        # (state, press timestamp) applied on a tick, waiting for the next present
+        self.applied: list[tuple[State, int]] = []
+        self.to_state = {state: LatencyHistogram() for state in self.actions.values()}
+        self.to_present = {state: LatencyHistogram() for state in self.actions.values()}
+        self.ignored = {state: 0 for state in self.actions.values()}
+
+    def reset(self):
+        self.pressed.clear()
+        self.applied.clear()
+
+    def on_press(self, key: int, timestamp_ns: int):
+        state = self.actions.get(key)
+        if state is not None:
+            self.pressed.append((state, timestamp_ns))
+
+    def on_tick(self, state: State):
+        """
+        Call after the tick that applied the presses read so far
+        :param state: the human fighter's state after that tick
+        """
+        if not self.pressed:
+            return
+        now = time.perf_counter_ns()
+        for press in self.pressed:
+            if press[0] == state:
+                self.to_state[state].add((now - press[1]) / 1e6)
+                self.applied.append(press)
+            else:
+                self.ignored[press[0]] += 1
+        self.pressed.clear()
+
+    def on_present(self):
+        if not self.applied:
+            return
+        now = time.perf_counter_ns()
+        for state, timestamp_ns in self.applied:
+            self.to_present[state].add((now - timestamp_ns) / 1e6)
+        self.applied.clear()
+
+    def report(self) -> dict:
+        return {
+            state.value: {
+                'press_to_state': self.to_state[state].to_dict(),
+                'press_to_present': self.to_present[state].to_dict(),
+                'ignored': self.ignored[state],
+            }
+            for state in self.to_state
+        }
+
+    def dump(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class FrameProfiler:
+    """
+    Per-phase frame timings. Methods are timed by instrument(), which wraps them on their instance, so a
+    disabled profiler wraps nothing and costs nothing. Time spent in an instrumented call is charged to its
+    phase minus the time of the instrumented calls it makes itself, unless it is instrumented as inclusive.
+    end_frame() closes the frame into a ring buffer of the last ``capacity`` frames.
+    """
+    phases = ('input', 'network', 'ai', 'collision', 'simulation', 'background', 'hud', 'projectiles', 'fighters',
+              'overlay', 'menus', 'present')
+
+    def __init__(self, enabled: bool = False, capacity: int = 600):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.frames = np.zeros((capacity, len(self.phases)))
+        self.recorded = 0
+        self.current = [0] * len(self.phases)
+        # time of the instrumented calls made by each open call
+        self.children: list[int] = []
+        # open inclusive calls, the instrumented calls they make are not timed on their own
+        self.inclusive = [0]
+
+    def instrument(self, owner, name: str, phase: str, inclusive: bool = False):
+        """
+        Charge every call of ``owner.name`` to ``phase``; does nothing while the profiler is disabled
+        :param inclusive: charge the instrumented calls it makes to ``phase`` as well
+        """
+        if not self.enabled:
+            return
+        method = getattr(owner, name)
+        index = self.phases.index(phase)
+        children = self.children
+        current = self.current
+        open_inclusive = self.inclusive
+
+        def timed(*args, **kwargs):
+            if open_inclusive[0]:
+                return method(*args, **kwargs)
+            children.append(0)
+            open_inclusive[0] += inclusive
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                open_inclusive[0] -= inclusive
+                current[index] += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+
+        setattr(owner, name, timed)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.frames[self.recorded % self.capacity] = self.current
+        self.frames[self.recorded % self.capacity] /= 1e6
+        self.recorded += 1
+        self.current[:] = [0] * len(self.phases)
+
+    def recent(self) -> np.ndarray:
+        """
+        :return: milliseconds per phase of the buffered frames, shape (frames, phases), not in time order
+        """
+        return self.frames[:min(self.recorded, self.capacity)]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        frames = self.recent()
+        if not len(frames):
+            return {}
+        p50, p95, p99 = np.percentile(frames, (50, 95, 99), axis=0)
+        mean = frames.mean(axis=0)
+        return {
+            phase: {'mean_ms': mean[i], 'p50_ms': p50[i], 'p95_ms': p95[i], 'p99_ms': p99[i]}
+            for i, phase in enumerate(self.phases)
+        }
+
+    def export(self, path: str):
+        """
+        Write the buffered frames, oldest first, as CSV when ``path`` ends in .csv and as JSON otherwise
+        """
+        n = min(self.recorded, self.capacity)
+        order = [(self.recorded - n + i) % self.capacity for i in range(n)]
+        rows = self.frames[order].tolist()
+        with open(path, 'w', newline='') as file:
+            if path.endswith('.csv'):
+                writer = csv.writer(file)
+                writer.writerow(('frame', *self.phases))
+                first = self.recorded - n
+                writer.writerows((first + i, *row) for i, row in enumerate(rows))
+            else:
+                json.dump({'phases': self.phases, 'summary': self.summary(), 'frames_ms': rows}, file)
+
+
+class SoundCategory(NamedTuple):
+    """
+    Mixer channels reserved for one kind of sound effect
+    """
+    name: str
+    channels: int
+    # when all its channels are busy, a sound may take the voice of an equal or lower priority category
+    priority: int
+
+
+SOUND_CATEGORIES = (
+    SoundCategory('specials', 2, 2),
+    SoundCategory('hits', 4, 1),
+)
+# category and file of every sound effect, by simulation event
+SOUND_EFFECTS = {
+    'punch': ('hits', PUNCH_SOUND_PATH),
+    'hadouken': ('specials', HADOUKEN_SOUND_PATH),
+}
+
+
+class AudioEngine:
+    """
+    Sound effects on reserved mixer channels, each decoded once into the shared AssetManager cache, and the music
+    streamed on pygame's music channel. The mixer buffer is small: a sound is heard only once the buffer it was
+    mixed into plays, so the buffer size bounds the latency. A sound whose category has no free channel takes a
+    free one of a lower priority category, or else steals the oldest voice of the lowest priority it may take.
+    """
+
+    def __init__(self, frequency: int = 44100, buffer: int = 256,
+                 categories: Sequence[SoundCategory] = SOUND_CATEGORIES,
+                 effects: dict[str, tuple[str, str]] | None = None):
+        """
+        :param buffer: mixer buffer in sample frames, a power of two; smaller buffers risk underruns
+        :param effects: category and file of each sound by name, SOUND_EFFECTS when None
+        """
+        self.frequency = frequency
+        self.buffer = buffer
+        self.categories = {category.name: category for category in categories}
+        self.effects = SOUND_EFFECTS if effects is None else effects
+        self.sounds: dict[str, pg.mixer.Sound] = {}
+        self.voices: list[pg.mixer.Channel] = []
+        # category and start time of each voice's current sound
+        self.owners: list[str] = []
+        self.started: list[float] = []
+        self.ready = False
+        self.triggers = 0
+        self.borrowed = 0
+        self.stolen = 0
+        self.silent = 0
+
+    def open(self):
+        """
+        Open the mixer unless it is open already, reserve the channels and decode every effect
+        """
+        if not pg.mixer.get_init():
+            pg.mixer.pre_init(self.frequency, -16, 2, self.buffer)
+            pg.mixer.init()
+        self.owners = [category.name for category in sorted(self.categories.values(), key=lambda c: -c.priority)
+                       for _ in range(category.channels)]
+        # reserved, so Sound.play() elsewhere never takes one of them
+        pg.mixer.set_num_channels(len(self.owners))
+        pg.mixer.set_reserved(len(self.owners))
+        self.voices = [pg.mixer.Channel(i) for i in range(len(self.owners))]
+        self.started = [0.0] * len(self.owners)
+        for name, (_, path) in self.effects.items():
+            self.sounds[name] = assets.get_sound(path)
+        self.ready = True
+
+    def play_music(self, path: str):
+        pg.mixer.music.load(path)
+        pg.mixer.music.play(-1)
+
+    def play(self, name: str) -> bool:
+        """
+        :return: False when the engine is not open yet and the sound was dropped
+        """
+        if not self.ready:
+            self.silent += 1
+            return False
+        self.triggers += 1
+        category = self.categories[self.effects[name][0]]
+        allowed = [i for i, owner in enumerate(self.owners) if self.categories[owner].priority <= category.priority]
+        free = [i for i in allowed if not self.voices[i].get_busy()]
+        if free:
+            # its own channels first, then the lowest priority ones
+            index = min(free, key=lambda i: (self.owners[i] != category.name, self.categories[self.owners[i]].priority))
+            self.borrowed += self.owners[index] != category.name
+        else:
+            index = min(allowed, key=lambda i: (self.categories[self.owners[i]].priority, self.started[i]))
+            self.stolen += 1
+        self.voices[index].play(self.sounds[name])
+        self.started[index] = time.perf_counter()
+        return True
+
+    def measure_latency(self, probes: int = 20) -> list[float]:
+        """
+        Trigger-to-output latency in ms: a 1 ms silent probe is played on the last voice and timed until the mixer
+        has consumed it, minus its length. Blocks for about a buffer per probe.
+        """
+        frequency, size, channels = pg.mixer.get_init()
+        probe = pg.mixer.Sound(buffer=bytes(frequency // 1000 * abs(size) // 8 * channels))
+        voice = self.voices[-1]
+        period = self.buffer / frequency
+        latencies = []
+        for i in range(probes):
+            # triggers at different points of the mixing period
+            time.sleep(period * (i % 7) / 7)
+            start = time.perf_counter()
+            voice.play(probe)
+            while voice.get_busy():
+                time.sleep(0.0002)
+            latencies.append((time.perf_counter() - start) * 1000 - 1.0)
+        return latencies
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'buffer': self.buffer,
+            'triggers': self.triggers,
+            'borrowed': self.borrowed,
+            'stolen': self.stolen,
+            'silent': self.silent,
+        }
+
+
+class StartupTimer:
+    """
+    Wall time of each startup phase up to the first frame, in the order the phases ran
+    """
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str):
+        """
+        Charge the time since the previous mark to ``phase``
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def total_ms(self) -> float:
+        return (self.last - self.start) * 1000
+
+    def report(self) -> str:
+        return ', '.join(f'{phase} {ms:.1f}' for phase, ms in self.phases.items()) + f', total {self.total_ms():.1f} ms'
+
+
 class GameManager:
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, tick_rate: int = 144, fps: int = 144, max_steps_per_frame: int = 8,
+                 dirty_rects: bool = False, latency_path: str | None = None, profile: bool = False,
+                 record_path: str | None = None, replay: Recording | None = None, search_ai: bool = False,
+                 netplay: RollbackSession | None = None, costumes: tuple[str, str] = ('default', 'p2'),
+                 atlas_dir: str | None = ATLAS_DIR, audio_buffer: int = 256):
+        """
+        :param tick_rate: simulation ticks per second, independent of the render rate
+        :param fps: render frame cap, 0 renders as fast as possible
+        :param max_steps_per_frame: catch-up limit, time beyond it is dropped instead of simulated
+        :param dirty_rects: restore and present only the areas that changed instead of the whole screen
+        :param latency_path: where to write the input latency histograms as JSON at exit
+        :param profile: time every frame phase; shown with the debug boxes, F12 exports profile.json and .csv
+        :param record_path: where to save a Recording of each round, overwritten by the next round
+        :param replay: play this recording instead of reading the keyboard and warn when the state diverges
+        :param search_ai: let a SearchAI play the opponent instead of the AIController
+        :param netplay: play one round against the other side of this session, which is synchronized here
+        :param costumes: COSTUMES names of player 1 and player 2
+        :param atlas_dir: where to keep the SpriteAtlas of processed sprites, None processes them on every start
+        :param audio_buffer: mixer buffer in sample frames
+        """
+        self.startup = StartupTimer()
         self.debug = debug
+        self.dirty_rects = dirty_rects
         self.screen_width = 1280
         self.screen_height = 720
-        self.fps = 144
+        self.fps = fps
+        self.tick_rate = tick_rate
+        self.max_steps_per_frame = max_steps_per_frame
+        self.accumulator = 0.0
+        # key presses read on a frame that ran no tick, applied on the next tick
+        self.pending_input = PlayerInput()
+        # keys pressed since the human player's input was last read
+        self.pressed_keys: set[int] = set()
+        # only what the first frame needs, the mixer is opened by load_audio once it is shown
+        pg.display.init()
+        pg.font.init()
         self.screen = pg.display.set_mode((self.screen_width, self.screen_height))
+        self.startup.mark('display')
         self.game_over = False
         self.clock = pg.time.Clock()
-        self.timer = 90.0
-        self.delta_t = 1 / self.fps
-        self.bg_sprite: SpriteSheet = BackgroundSprite(KEN_STAGE_PATHS)
         self.player_idx = 0
         self.max_health = 500
         self.menu = True
-        self.winner = ""
-        self.font_time = pg.font.SysFont("comicsans", 80, True, True)
-        self.font_player = pg.font.SysFont("impact", 40, False, False)
-        self.font_menu = pg.font.SysFont("consolas", 40, True, False)
-        self.font_option = pg.font.SysFont("consolas", 80, True, False)
-        self.players: list[Player] = [
-            Player(RYU_SPRITES_PATH, 50, 620, self.max_health, False, Direction.RIGHT),
-            Player(RYU_SPRITES_PATH, self.screen_width - 230, 620, self.max_health, True, Direction.LEFT),
-        ]
-        self.ai_controller = AIController(self.fps)
+        self.font_time = load_font('comicsans', 80, True, True)
+        self.font_player = load_font('impact', 40)
+        self.font_menu = load_font('consolas', 40, True)
+        self.font_option = load_font('consolas', 80, True)
+        self.font_profile = load_font('consolas', 16)
+        self.startup.mark('fonts')
+        self.text = TextCache()
+        self.hud = HudLayer(self.screen_width, self.font_time, self.font_player, self.text, self.max_health)
+        self.simulation = Simulation(self.max_health, tick_rate=self.tick_rate, width=self.screen_width)
+        self.search_ai = SearchAI() if search_ai else None
+        self.record_path = record_path
+        self.recording: Recording | None = None
+        self.replay = replay
+        # first tick where the replay did not reproduce the recorded state
+        self.diverged_at: int | None = None
+        if replay is not None:
+            if (replay.max_health, replay.round_time, replay.tick_rate, replay.width) != \
+                    (self.max_health, self.simulation.round_time, self.tick_rate, self.screen_width):
+                raise ValueError('the recording was made with other simulation settings')
+        self.start_round()
+        self.startup.mark('simulation')
+        self.netplay = netplay
+        if netplay is not None:
+            log.info('waiting for the other player')
+            netplay.synchronize(self.simulation)
+            self.player_idx = netplay.side
+            self.menu = False
+            self.startup.mark('network')
+        self.players = self.simulation.players
+        # the stage and fighters, built by poll_assets once the loader is done; the fight is locked until then
+        self.costumes = costumes
+        self.bg_sprite: BackgroundSprite | None = None
+        self.fighter_sprites: list[FighterSprites] = []
+        # warm when the processed sprites came from an atlas file rather than the source images
+        self.atlas_warm: bool | None = None
+        self.loader = self.load_assets(atlas_dir)
+        # main thread time per frame for converting loaded assets while the menu is up
+        self.asset_budget_ms = 4.0
+        # dirty-rect bookkeeping: what is on the display now and where the moving parts were drawn
+        self.shown_background: Surface | None = None
+        self.shown_screen = ''
+        self.drawn: list[pg.Rect] = []
+        self.hud_rects: list[pg.Rect] = []
+        self.hud_key: tuple | None = None
+        # presentation metrics
+        self.presented_pixels = 0
+        self.presented_total = 0
+        self.rendered_frames = 0
+        self.full_redraws = 0
+        self.latency_path = latency_path
+        self.latency = LatencyTracker()
+        self.input = InputSystem()
+        self.input.subscribe((pg.QUIT,), self.on_quit)
+        self.input.subscribe((pg.MOUSEBUTTONDOWN,), self.on_menu_click)
+        self.input.subscribe((pg.MOUSEBUTTONDOWN,), self.on_game_over_click)
+        self.input.subscribe((pg.KEYDOWN,), self.on_key_down)
+        self.input.subscribe((pg.KEYDOWN,), self.on_export_key)
+        self.profiler = FrameProfiler(profile)
+        self.profile_surface: Surface | None = None
+        self.instrument()
+        # opened by load_audio, events before that are silent
+        self.audio = AudioEngine(buffer=audio_buffer)
+        self.audio_thread: threading.Thread | None = None
+        self.startup.mark('setup')
+        self.poll_assets()
+
+    def load_assets(self, atlas_dir: str | None) -> AssetLoader | None:
+        """
+        Start loading the stage and the fighters' frames in the background
+        :return: the loader, None when everything is cached already
+        """
+        frames = list(dict.fromkeys(key for player, costume in zip(self.players, self.costumes)
+                                    for key in FighterSprites.animation_keys(player, costume).values()))
+        screen_size = (self.screen_width, self.screen_height)
+        scaled = [(path, screen_size) for path in KEN_STAGE_PATHS]
+        if all(key + (Direction.RIGHT,) in assets.frames for key in frames) and \
+                all(key in assets.scaled for key in scaled):
+            return None
+        loader = AssetLoader()
+        if atlas_dir is not None:
+            atlas = SpriteAtlas(atlas_dir)
+            loader.submit('sprite atlas', lambda manager: atlas.prepare(manager, frames, scaled))
+            return loader
+        for path, size in scaled:
+            loader.submit(path, lambda manager, path=path, size=size: manager.get_scaled(path, size))
+        sheets: dict[str, list[tuple]] = {}
+        for key in frames:
+            sheets.setdefault(f'{key[0]} {key[3]}', []).append(key)
+        for name, keys in sheets.items():
+            loader.submit(name, lambda manager, keys=keys: [manager.get_animation(*key) for key in keys])
+        return loader
+
+    def poll_assets(self, block: bool = False) -> bool:
+        """
+        Convert what the loader has finished within ``asset_budget_ms``, or all of it when ``block``, and build the
+        stage and fighter sprites once everything is in
+        :return: whether the fight can be drawn
+        """
+        if self.bg_sprite is not None:
+            return True
+        if self.loader is not None:
+            if not self.loader.finish(None if block else self.asset_budget_ms):
+                return False
+            self.atlas_warm = self.loader.results.get('sprite atlas')
+            log.info(f'assets, {"processed" if self.atlas_warm is None else "loaded" if self.atlas_warm else "built"}'
+                     f' in the background: {self.loader.stats()}')
+        self.bg_sprite = BackgroundSprite(KEN_STAGE_PATHS, (self.screen_width, self.screen_height))
+        self.fighter_sprites = [FighterSprites(player, costume) for player, costume in zip(self.players, self.costumes)]
+        self.startup.mark('assets')
+        return True
+
+    def load_audio(self):
+        """
+        Open the mixer, decode the sound effects and start the music, on a background thread after the first frame
+        """
+        start = time.perf_counter()
+        try:
+            self.audio.open()
+            self.audio.play_music(MUSIC_PATH)
+        except pg.error as error:
+            log.warning(f'playing without sound: {error}')
+            return
+        log.info(f'audio ready {(time.perf_counter() - start) * 1000:.1f} ms after the first frame')
 
-    def reset(self, debug=False):
-        self.debug = debug
-        self.screen_width = 1280
-        self.screen_height = 720
-        self.fps = 144
-        self.screen = pg.display.set_mode((self.screen_width, self.screen_height))
+    def reset(self):
+        """
+        Start a new round: only per-round state is reset, the display, fonts, stage and sprites are reused
+        """
         self.game_over = False
-        self.clock = pg.time.Clock()
-        self.timer = 90.0
-        self.delta_t = 1 / self.fps
-        self.bg_sprite: SpriteSheet = BackgroundSprite(KEN_STAGE_PATHS)
         self.player_idx = 0
-        self.max_health = 500
         self.menu = True
-        self.winner = ""
-        self.font_time = pg.font.SysFont("comicsans", 80, True, True)
-        self.font_player = pg.font.SysFont("impact", 40, False, False)
-        self.font_menu = pg.font.SysFont("consolas", 40, True, False)
-        self.font_option = pg.font.SysFont("consolas", 80, True, False)
-        self.players: list[Player] = [
-            Player(RYU_SPRITES_PATH, 50, 620, self.max_health, False, Direction.RIGHT),
-            Player(RYU_SPRITES_PATH, self.screen_width - 230, 620, self.max_health, True, Direction.LEFT),
-        ]
-        self.ai_controller = AIController(self.fps)
-
-    def run(self):
-        pg.mixer.music.load('assets/sound/guile-theme.mp3')
-        pg.mixer.music.play(-1)
-        # main loop
-        while not self.game_over:
-            if not self.menu:
-                # get single input
-                self.players[1 - self.player_idx].get_hit(self.players[self.player_idx])
-
-                self.players[self.player_idx].get_hit(self.players[1 - self.player_idx])
+        self.accumulator = 0.0
+        self.pending_input = PlayerInput()
+        self.pressed_keys.clear()
+        self.latency.reset()
+        self.start_round()
+
+    def start_round(self):
+        if self.replay is not None:
+            self.menu = False
+            self.diverged_at = None
+            self.simulation.reset(self.replay.seed)
+            return
+        self.simulation.reset()
+        if self.record_path:
+            self.recording = Recording.of(self.simulation)
 
-                self.game_over = self.players[self.player_idx].handle_input()
+    def save_recording(self):
+        if self.recording is not None and len(self.recording):
+            self.recording.save(self.record_path)
+            log.info(f'{len(self.recording)} ticks recorded to {self.record_path}')
 
-                self.ai_controller.update_AI_state(self.players[1 - self.player_idx], self.players[self.player_idx])
+    def check_tick(self, inputs: list[PlayerInput | None]):
+        """
+        Record the tick that just ran or compare it against the replay
+        """
+        simulation = self.simulation
+        if self.recording is not None:
+            self.recording.add(inputs, simulation.state_hash())
+            if simulation.winner:
+                self.save_recording()
+        elif self.replay is not None and self.diverged_at is None and \
+                simulation.state_hash() != self.replay.state_hash(simulation.tick - 1):
+            self.diverged_at = simulation.tick - 1
+            log.warning(f'replay diverged from the recording at tick {self.diverged_at}')
+
+    def on_quit(self, _: InputEvent):
+        self.game_over = True
+
+    def instrument(self):
+        profiler = self.profiler
+        profiler.instrument(self.input, 'pump', 'input')
+        profiler.instrument(self, 'read_input', 'input')
+        if self.netplay is not None:
+            profiler.instrument(self.netplay, 'poll', 'network')
+            profiler.instrument(self.netplay, 'send', 'network')
+        profiler.instrument(self.simulation, 'step', 'simulation')
+        for player in self.players:
+            profiler.instrument(player, 'get_hit', 'collision')
+        profiler.instrument(self.simulation.projectiles, 'step', 'collision')
+        for ai_controller in self.simulation.ai_controllers:
+            profiler.instrument(ai_controller, 'update_AI_state', 'ai')
+        if self.search_ai is not None:
+            # the rollouts step the live simulation, they are search time and not simulation or collision time
+            profiler.instrument(self.search_ai, 'get_input', 'ai', inclusive=True)
+        # update() itself is left with the background blit or restore and the dirty-rect bookkeeping
+        profiler.instrument(self, 'update', 'background')
+        profiler.instrument(self, 'draw_top_bar', 'hud')
+        profiler.instrument(self, 'draw_projectiles', 'projectiles')
+        profiler.instrument(self, 'draw_fighters', 'fighters')
+        profiler.instrument(self, 'draw_profile_overlay', 'overlay')
+        profiler.instrument(self, 'draw_menu_screen', 'menus')
+        profiler.instrument(self, 'draw_game_over', 'menus')
+        profiler.instrument(self, 'present', 'present')
+
+    def on_export_key(self, event: InputEvent):
+        if event.key == pg.K_F12 and self.profiler.enabled:
+            self.profiler.export('profile.json')
+            self.profiler.export('profile.csv')
+            log.info('frame profile written to profile.json and profile.csv')
+
+    def on_key_down(self, event: InputEvent):
+        if not self.menu and not self.simulation.winner:
+            self.pressed_keys.add(event.key)
+            self.latency.on_press(event.key, event.timestamp_ns)
+
+    def read_input(self) -> PlayerInput:
+        """
+        :return: the human player's held keys as of the last pump and the keys pressed since the last call
+        """
+        key_pressed = self.input.held
+        pressed_keys = self.pressed_keys
+        self.pressed_keys = set()
+        return PlayerInput(
+            left=key_pressed[pg.K_LEFT],
+            right=key_pressed[pg.K_RIGHT],
+            shift=key_pressed[pg.K_LSHIFT] or key_pressed[pg.K_RSHIFT],
+            guard=key_pressed[pg.K_g],
+            attack=pg.K_a in pressed_keys,
+            jump=pg.K_SPACE in pressed_keys,
+            kick=pg.K_x in pressed_keys,
+            fireball=pg.K_f in pressed_keys,
+            other=not pressed_keys <= ACTION_KEYS,
+        )
 
-                self.timer -= self.delta_t if len(self.winner) == 0 else 0
-                if self.timer <= 0:
-                    self.winner = "No"
+    def advance(self, elapsed: float, human_input: PlayerInput) -> float:
+        """
+        Add ``elapsed`` seconds of wall time to the accumulator and run the simulation ticks that fit into it.
+        Key presses are applied on the next tick only, held keys on all of them.
+        :return: interpolation factor between the previous and the current tick for rendering
+        """
+        delta_t = self.simulation.delta_t
+        self.accumulator += elapsed
+        steps = 0
+        inputs: list[PlayerInput | None] = [None, None]
+        inputs[self.player_idx] = human_input.with_presses_from(self.pending_input)
+        if self.search_ai is not None:
+            self.search_ai.begin_frame()
+        while self.accumulator >= delta_t and not self.simulation.winner:
+            if steps == self.max_steps_per_frame:
+                # too far behind: drop the backlog rather than spiral into ever longer frames
+                self.accumulator = 0.0
+                break
+            if self.replay is not None:
+                if self.simulation.tick == len(self.replay):
+                    self.accumulator = 0.0
+                    break
+                inputs = self.replay.inputs(self.simulation.tick)
+            elif self.search_ai is not None:
+                inputs[1 - self.player_idx] = self.search_ai.get_input(self.simulation, 1 - self.player_idx)
+            if self.netplay is None:
+                self.simulation.step(inputs)
+            elif not self.netplay.advance(inputs[self.player_idx]):
+                # the other side is behind: wait for its inputs rather than predict any further
+                self.accumulator = 0.0
+                break
+            if self.recording is not None or self.replay is not None:
+                self.check_tick(inputs)
+            if steps == 0:
+                self.latency.on_tick(self.players[self.player_idx].state)
+            for event in self.simulation.events:
+                self.audio.play(event)
+            inputs[self.player_idx] = human_input.without_presses()
+            self.accumulator -= delta_t
+            steps += 1
+        self.pending_input = inputs[self.player_idx]
+        return min(self.accumulator / delta_t, 1.0)
 
-            self.update()
+    def run(self):
+        self.frame(0.0)
+        self.startup.mark('first frame')
+        log.info(f'startup: {self.startup.report()}')
+        self.audio_thread = threading.Thread(target=self.load_audio, name='audio', daemon=True)
+        self.audio_thread.start()
+        previous = time.perf_counter()
+        # main loop
+        while not self.game_over:
+            now = time.perf_counter()
+            self.frame(now - previous)
+            previous = now
             self.clock.tick(self.fps)
 
+        log.info(f'render stats: {self.render_stats()}')
+        log.info(f'text cache: {self.text.stats()}')
+        log.info(f'input: {self.input.stats()}')
+        log.info(f'audio: {self.audio.stats()}')
+        if self.search_ai is not None:
+            log.info(f'search AI: {self.search_ai.stats()}')
+        if self.netplay is not None:
+            log.info(f'netplay: {self.netplay.stats()}')
+            self.netplay.transport.close()
+        self.save_recording()
+        if self.latency_path:
+            self.latency.dump(self.latency_path)
+            log.info(f'input latency written to {self.latency_path}')
+        self.audio_thread.join()
         pg.quit()
 
-    def draw_top_bar(self):
-        time_text = self.font_time.render(str(round(self.timer)), True, (0, 0, 0))
-        self.screen.blit(time_text, (550 + round(180 - time_text.get_width()) / 2, 50))
-        health_1 = self.players[0].health
-        health_2 = self.players[1].health
-        name_plate_1 = self.font_player.render('Player 1', False, (0, 0, 0))
-        name_plate_2 = self.font_player.render('Player 2', False, (0, 0, 0))
-        self.screen.blit(name_plate_1, (50, 30))
-        self.screen.blit(name_plate_2, (1230 - name_plate_2.get_width(), 30))
-
-        pg.draw.rect(self.screen, RED, (50, 50 + round(time_text.get_height() / 2) - 15, 500, 30))
-        pg.draw.rect(self.screen, SOFT_GREEN, (50, 35 + round(time_text.get_height() / 2), 500 - round(
-            500 / self.max_health * (self.max_health - health_1)) if health_1 > 0 else 0, 30))
-        pg.draw.rect(self.screen, RED, (730, 50 + round(time_text.get_height() / 2) - 15, 500, 30))
-        pg.draw.rect(self.screen, SOFT_GREEN, (730, 35 + round(time_text.get_height() / 2), 500 - round(
-            500 / self.max_health * (self.max_health - health_2)) if health_2 > 0 else 0, 30))
-
-        pg.draw.rect(self.screen, LIGHT_BLUE, (50, 65 + (time_text.get_height() >> 1), 100, 15))
-        pg.draw.rect(self.screen, BLUE,
-                     (50, 65 + (time_text.get_height() >> 1), self.players[self.player_idx].energy, 15))
-
-        pg.draw.rect(self.screen, LIGHT_BLUE, (1130, 65 + (time_text.get_height() >> 1), 100, 15))
-        pg.draw.rect(self.screen, BLUE,
-                     (1130, 65 + (time_text.get_height() >> 1), self.players[1 - self.player_idx].energy, 15))
-
-        if health_1 <= 0:
-            self.winner = "PLAYER 2"
-        elif health_2 <= 0:
-            self.winner = "PLAYER 1"
+    def frame(self, elapsed: float):
+        """
+        One pass of the main loop: read input, run the ticks that ``elapsed`` seconds of wall time allow, render
+        """
+        self.input.pump()
+        if self.netplay is not None:
+            self.netplay.poll()
+        alpha = 1.0
+        if not self.menu and not self.simulation.winner:
+            alpha = self.advance(elapsed, self.read_input())
+        else:
+            self.accumulator = 0.0
+        if self.netplay is not None:
+            self.netplay.send()
+        self.update(alpha, elapsed)
+        self.profiler.end_frame()
+
+    def render_stats(self) -> dict[str, int | float]:
+        frames = max(self.rendered_frames, 1)
+        return {
+            'frames': self.rendered_frames,
+            'full_redraws': self.full_redraws,
+            'presented_pixels_per_frame': self.presented_total / frames,
+            'screen_pixels': self.screen_width * self.screen_height,
+        }
+
+    def get_hud_key(self) -> tuple:
+        """
+        :return: everything the top bar shows; the bar only needs redrawing when this changes
+        """
+        return (round(self.simulation.timer), self.players[0].health, self.players[1].health,
+                self.players[self.player_idx].energy, self.players[1 - self.player_idx].energy)
+
+    def draw_top_bar(self) -> list[pg.Rect]:
+        """
+        :return: the areas drawn
+        """
+        self.hud.update(self.players[0].health, self.players[1].health, self.players[self.player_idx].energy,
+                        self.players[1 - self.player_idx].energy)
+        return self.hud.draw(self.screen, round(self.simulation.timer))
 
     @staticmethod
     def inner(point: tuple[int, int], x0, x1, y0, y1) -> bool:
@@ -817,13 +3222,11 @@ class GameManager:
         if not self.menu:
             return
         self.screen.fill((0, 0, 0))
-        menu_mouse_pos = pg.mouse.get_pos()
-        menu_text = self.font_menu.render("MENU", True, (255, 255, 255))
-        quit_text = self.font_menu.render("QUIT", True, (255, 255, 255))
-        quit_rect = (quit_text.get_width(), quit_text.get_height())
+        menu_text = self.text.render(self.font_menu, "MENU", True, (255, 255, 255))
+        quit_text = self.text.render(self.font_menu, "QUIT", True, (255, 255, 255))
 
-        player_1_button = self.font_option.render("PLAYER 1", True, (255, 255, 255))
-        player_2_button = self.font_option.render("PLAYER 2", True, (255, 255, 255))
+        player_1_button = self.text.render(self.font_option, "PLAYER 1", True, (255, 255, 255))
+        player_2_button = self.text.render(self.font_option, "PLAYER 2", True, (255, 255, 255))
 
         self.screen.blit(menu_text, (round((self.screen_width - menu_text.get_width()) / 2), 70))
         self.screen.blit(quit_text,
@@ -832,34 +3235,44 @@ class GameManager:
         self.screen.blit(player_1_button, (200, self.screen_height / 2 - 100))
         self.screen.blit(player_2_button,
                          (self.screen_width - 200 - player_2_button.get_width(), self.screen_height / 2 - 100))
-        ev = pg.event.get()
-        for event in ev:
-            if event.type == pg.MOUSEBUTTONDOWN:
-                if self.inner(menu_mouse_pos, (self.screen_width - menu_text.get_width()) / 2,
-                              (self.screen_width - menu_text.get_width()) / 2 + quit_rect[0],
-                              self.screen_height / 2 + 100, self.screen_height / 2 + 100 + quit_rect[1]):
-                    self.game_over = True
-                elif self.inner(menu_mouse_pos, 200, 200 + player_1_button.get_width(), self.screen_height / 2 - 100,
-                                self.screen_height / 2 - 100 + player_1_button.get_height()):
-                    self.player_idx = 0
-                    self.menu = False
-                elif self.inner(menu_mouse_pos, self.screen_width - 200 - player_2_button.get_width(),
-                                self.screen_width - 200, self.screen_height / 2 - 100,
-                                self.screen_height / 2 - 100 + player_2_button.get_height()):
-                    self.player_idx = 1
-                    self.menu = False
+        if self.bg_sprite is None:
+            loading_text = self.text.render(self.font_menu, "LOADING", True, (128, 128, 128))
+            self.screen.blit(loading_text, (round((self.screen_width - loading_text.get_width()) / 2), 130))
+
+    def on_menu_click(self, event: InputEvent):
+        if not self.menu:
+            return
+        menu_text = self.text.render(self.font_menu, "MENU", True, (255, 255, 255))
+        quit_text = self.text.render(self.font_menu, "QUIT", True, (255, 255, 255))
+        quit_rect = (quit_text.get_width(), quit_text.get_height())
+        player_1_button = self.text.render(self.font_option, "PLAYER 1", True, (255, 255, 255))
+        player_2_button = self.text.render(self.font_option, "PLAYER 2", True, (255, 255, 255))
+        if self.inner(event.pos, (self.screen_width - menu_text.get_width()) / 2,
+                      (self.screen_width - menu_text.get_width()) / 2 + quit_rect[0],
+                      self.screen_height / 2 + 100, self.screen_height / 2 + 100 + quit_rect[1]):
+            self.game_over = True
+        elif self.bg_sprite is None:
+            # the fight unlocks once its assets are loaded
+            return
+        elif self.inner(event.pos, 200, 200 + player_1_button.get_width(), self.screen_height / 2 - 100,
+                        self.screen_height / 2 - 100 + player_1_button.get_height()):
+            self.player_idx = 0
+            self.menu = False
+        elif self.inner(event.pos, self.screen_width - 200 - player_2_button.get_width(),
+                        self.screen_width - 200, self.screen_height / 2 - 100,
+                        self.screen_height / 2 - 100 + player_2_button.get_height()):
+            self.player_idx = 1
+            self.menu = False
 
     def draw_game_over(self):
-        if len(self.winner) == 0:
+        winner = self.simulation.winner
+        if len(winner) == 0:
             return
         self.screen.fill((0, 0, 0))
-        retry_text = self.font_menu.render("RETRY", True, (255, 255, 255))
-        quit_text = self.font_menu.render("QUIT", True, (255, 255, 255))
-        winner_text = self.font_menu.render((self.winner + " WIN!" if self.winner != "No" else "DRAW!!!"), True,
+        retry_text = self.text.render(self.font_menu, "RETRY", True, (255, 255, 255))
+        quit_text = self.text.render(self.font_menu, "QUIT", True, (255, 255, 255))
+        winner_text = self.text.render(self.font_menu, (winner + " WIN!" if winner != "No" else "DRAW!!!"), True,
                                             (255, 255, 255))
-        quit_rect = (quit_text.get_width(), quit_text.get_height())
-        retry_rect = (retry_text.get_width(), retry_text.get_height())
-        menu_mouse_pos = pg.mouse.get_pos()
 
         self.screen.blit(retry_text, (round((self.screen_width - retry_text.get_width()) / 2),
                                       self.screen_height / 2 - round(retry_text.get_height() / 2) + 100))
@@ -867,65 +3280,175 @@ class GameManager:
                                        self.screen_height / 2 - round(winner_text.get_height() / 2) - 100))
         self.screen.blit(quit_text, (round((self.screen_width - quit_text.get_width()) / 2),
                                      self.screen_height / 2 - round(quit_text.get_height() / 2) + 200))
-        ev = pg.event.get()
-        for event in ev:
-            if event.type == pg.MOUSEBUTTONDOWN:
-                if self.inner(menu_mouse_pos, (self.screen_width - quit_text.get_width()) / 2,
-                              (self.screen_width - quit_text.get_width()) / 2 + quit_rect[0],
-                              self.screen_height / 2 - round(quit_text.get_height() / 2) + 200,
-                              self.screen_height / 2 - round(quit_text.get_height() / 2) + 200 + quit_rect[1]):
-                    self.game_over = True
-                elif self.inner(menu_mouse_pos, round((self.screen_width - retry_text.get_width()) / 2),
-                                round((self.screen_width - retry_text.get_width()) / 2) + retry_rect[0],
-                                self.screen_height / 2 - round(retry_text.get_height() / 2) + 100,
-                                self.screen_height / 2 - round(retry_text.get_height() / 2) + 100 + retry_rect[1]):
-                    self.reset()
-
-    def update(self):
-        self.screen.blit(
-            pg.transform.scale(self.bg_sprite.get_sprite(), (self.screen_width, self.screen_height)),
-            (0, 0),
-        )
-
-        self.draw_top_bar()
 
-        for fb in self.players[self.player_idx].fireballs:
-            if fb.collide(None) or fb.collide(self.players[1 - self.player_idx]):
-                self.players[self.player_idx].removed_fireballs.append(fb)
-            self.screen.blit(fb.get_sprite(), fb.get_coord())
-
-        for fb in self.players[1 - self.player_idx].fireballs:
-            if fb.collide(None) or fb.collide(self.players[self.player_idx]):
-                self.players[1 - self.player_idx].removed_fireballs.append(fb)
-            self.screen.blit(fb.get_sprite(), fb.get_coord())
+    def on_game_over_click(self, event: InputEvent):
+        if not self.simulation.winner:
+            return
+        retry_text = self.text.render(self.font_menu, "RETRY", True, (255, 255, 255))
+        quit_text = self.text.render(self.font_menu, "QUIT", True, (255, 255, 255))
+        quit_rect = (quit_text.get_width(), quit_text.get_height())
+        retry_rect = (retry_text.get_width(), retry_text.get_height())
+        if self.inner(event.pos, (self.screen_width - quit_text.get_width()) / 2,
+                      (self.screen_width - quit_text.get_width()) / 2 + quit_rect[0],
+                      self.screen_height / 2 - round(quit_text.get_height() / 2) + 200,
+                      self.screen_height / 2 - round(quit_text.get_height() / 2) + 200 + quit_rect[1]):
+            self.game_over = True
+        elif self.netplay is None and self.inner(event.pos, round((self.screen_width - retry_text.get_width()) / 2),
+                        round((self.screen_width - retry_text.get_width()) / 2) + retry_rect[0],
+                        self.screen_height / 2 - round(retry_text.get_height() / 2) + 100,
+                        self.screen_height / 2 - round(retry_text.get_height() / 2) + 100 + retry_rect[1]):
+            self.reset()
+
+    def draw_projectiles(self, alpha: float) -> list[pg.Rect]:
+        """
+        :return: the areas drawn, only collected in dirty-rect mode
+        """
+        projectiles = self.simulation.projectiles
+        slots, coords = projectiles.get_coords(alpha)
+        if len(slots) == 0:
+            return []
+        left = Direction.LEFT.value
+        frames = [sprites.get_fireball_frames() for sprites in self.fighter_sprites]
+        return self.screen.blits([
+            (frames[owner].flipped[frame] if direction == left else frames[owner][frame], coord)
+            for owner, frame, direction, coord in zip(projectiles.owner[slots].tolist(),
+                                                      projectiles.frame[slots].tolist(),
+                                                      projectiles.direction[slots].tolist(),
+                                                      coords.tolist())
+        ], self.dirty_rects) or []
+
+    def draw_fighters(self, alpha: float) -> list[pg.Rect]:
+        """
+        Draw the fireballs, the fighters and the debug boxes over the top bar
+        :return: the areas drawn
+        """
+        drawn = self.draw_projectiles(alpha)
 
-        self.screen.blit(
-            self.players[self.player_idx].get_sprite(),
-            self.players[self.player_idx].get_coord(),
-        )
-        self.screen.blit(
-            self.players[1 - self.player_idx].get_sprite(),
-            self.players[1 - self.player_idx].get_coord(),
-        )
+        for i in (self.player_idx, 1 - self.player_idx):
+            drawn.append(self.screen.blit(
+                self.fighter_sprites[i].get_sprite(self.players[i]),
+                self.players[i].get_coord(alpha),
+            ))
 
         if self.debug:
             # self.log()
             for player in self.players:
                 hurt_box = player.get_hurt_box()
                 if hurt_box:
-                    pg.draw.rect(self.screen, BLUE, hurt_box, 3)
+                    drawn.append(pg.draw.rect(self.screen, BLUE, hurt_box, 3))
                 hit_box, _ = player.get_hit_boxs_and_damage()
                 if hit_box:
                     for hb in hit_box:
-                        pg.draw.rect(self.screen, RED, hb, 3)
+                        drawn.append(pg.draw.rect(self.screen, RED, hb, 3))
+
+            for hb in self.simulation.projectiles.get_hit_boxes():
+                drawn.append(pg.draw.rect(self.screen, RED, hb, 3))
+
+            if self.profiler.enabled:
+                drawn.append(self.draw_profile_overlay())
+        return drawn
+
+    def draw_profile_overlay(self) -> pg.Rect:
+        """
+        Percentiles per phase in the bottom-left corner, rebuilt every 30 frames
+        :return: the area drawn
+        """
+        if self.profile_surface is None or self.profiler.recorded % 30 == 0:
+            summary = self.profiler.summary()
+            lines = [f'{"ms":<12}{"p50":>7}{"p95":>7}{"p99":>7}'] + [
+                f'{phase:<12}{stats["p50_ms"]:>7.2f}{stats["p95_ms"]:>7.2f}{stats["p99_ms"]:>7.2f}'
+                for phase, stats in summary.items()
+            ]
+            rendered = [self.font_profile.render(line, True, (255, 255, 255)) for line in lines]
+            height = self.font_profile.get_linesize()
+            self.profile_surface = pg.Surface((max(text.get_width() for text in rendered) + 8,
+                                               height * len(rendered) + 8)).convert()
+            for i, text in enumerate(rendered):
+                self.profile_surface.blit(text, (4, 4 + i * height))
+        return self.screen.blit(self.profile_surface,
+                                (10, self.screen_height - self.profile_surface.get_height() - 10))
+
+    def restore(self, background: Surface, rects: list[pg.Rect]):
+        self.screen.blits([(background, rect, rect) for rect in rects], False)
+
+    def update(self, alpha: float = 1.0, elapsed: float = 0.0):
+        """
+        :param alpha: interpolation factor between the previous and the current tick
+        :param elapsed: seconds since the last frame, for the background animation
+        """
+        # a fight started without the menu, by a replay or netplay, waits for its assets
+        if not self.poll_assets(block=not self.menu):
+            full = self.shown_screen != 'loading'
+            self.shown_screen = 'loading'
+            self.draw_menu_screen()
+            self.present(full or not self.dirty_rects, [])
+            return
+        self.bg_sprite.resize(self.screen.get_size())
+        background = self.bg_sprite.get_sprite(elapsed)
+        if not self.dirty_rects:
+            self.screen.blit(background, (0, 0))
+            self.draw_top_bar()
+            self.draw_fighters(alpha)
+            self.draw_menu_screen()
+            self.draw_game_over()
+            self.present(True, [])
+            return
 
-                for fb in player.fireballs:
-                    pg.draw.rect(self.screen, RED, fb.get_hit_box(), 3)
+        shown_screen = 'menu' if self.menu else 'game_over' if self.simulation.winner else 'fight'
+        # a new screen or a new background frame invalidates everything on the display
+        full = shown_screen != self.shown_screen or \
+            (shown_screen == 'fight' and background is not self.shown_background)
+        self.shown_screen = shown_screen
+        if shown_screen != 'fight':
+            # static screens: present them once, later frames only handle their clicks
+            self.draw_menu_screen()
+            self.draw_game_over()
+            self.shown_background = None
+            self.present(full, [])
+            return
 
-        self.draw_menu_screen()
-        self.draw_game_over()
+        self.shown_background = background
+        if full:
+            self.screen.blit(background, (0, 0))
+            self.hud_rects = self.draw_top_bar()
+            self.hud_key = self.get_hud_key()
+            self.drawn = self.draw_fighters(alpha)
+            self.present(True, [])
+            return
 
-        pg.display.update()
+        dirty = self.drawn
+        self.restore(background, dirty)
+        hud_key = self.get_hud_key()
+        if hud_key != self.hud_key or any(rect.collidelist(self.hud_rects) != -1 for rect in dirty):
+            # the values changed or restoring the background erased part of the bar
+            self.restore(background, self.hud_rects)
+            dirty = dirty + self.hud_rects
+            self.hud_rects = self.draw_top_bar()
+            self.hud_key = hud_key
+            dirty += self.hud_rects
+        self.drawn = self.draw_fighters(alpha)
+        self.present(False, dirty + self.drawn)
+
+    def present(self, full: bool, rects: list[pg.Rect]):
+        """
+        Push the whole screen or only ``rects`` to the display
+        """
+        if full:
+            pg.display.update()
+            self.count_presented(self.screen_width * self.screen_height, True)
+            return
+        screen_rect = self.screen.get_rect()
+        rects = [clipped for clipped in (rect.clip(screen_rect) for rect in rects) if clipped]
+        if rects:
+            pg.display.update(rects)
+        self.count_presented(sum(rect.w * rect.h for rect in rects), False)
+
+    def count_presented(self, pixels: int, full: bool):
+        self.presented_pixels = pixels
+        self.presented_total += pixels
+        self.rendered_frames += 1
+        self.full_redraws += full
+        self.latency.on_present()
 
     def log(self):
         # logs go here
@@ -933,18 +3456,63 @@ class GameManager:
 
 
 def main():
-    GameManager(True).run()
-
-
-def change_color(image: Surface, color):
-    coloured_image = pg.Surface(image.get_size())
-    coloured_image.fill(color)
-
-    final_image = image.copy()
-    final_image.blit(coloured_image, (0, 0), special_flags=pg.BLEND_MULT)
-    final_image.set_colorkey((0, 0, 0), pg.RLEACCEL)
-
-    return final_image
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='restore and present only the changed areas of the screen')
+    parser.add_argument('--latency', action='store_true',
+                        help='write key press to state change / presented frame histograms to latency.json at exit')
+    parser.add_argument('--profile', action='store_true',
+                        help='per-phase frame timings next to the debug boxes, F12 writes profile.json and profile.csv')
+    parser.add_argument('--search-ai', action='store_true', help='fight the lookahead search AI')
+    parser.add_argument('--record', metavar='PATH', help='save a recording of each round to PATH')
+    parser.add_argument('--replay', metavar='PATH', help='play a recorded round again')
+    parser.add_argument('--headless', action='store_true',
+                        help='with --replay: run the round at full speed without a window and verify it')
+    parser.add_argument('--costumes', nargs=2, metavar=('P1', 'P2'), choices=list(COSTUMES), default=['default', 'p2'],
+                        help=f'costumes of both players, from {", ".join(COSTUMES)}')
+    parser.add_argument('--fps', type=int, default=144,
+                        help='render frame cap, the game runs at the same speed at any; 0 renders as fast as possible')
+    parser.add_argument('--audio-buffer', metavar='FRAMES', type=int, default=256,
+                        help='mixer buffer in sample frames, larger if the sound crackles')
+    parser.add_argument('--no-atlas', action='store_true',
+                        help=f'process the sprites from the source images instead of the atlas cached in {ATLAS_DIR}')
+    parser.add_argument('--host', metavar='PORT', type=int, help='play player 1 against a --join on UDP PORT')
+    parser.add_argument('--join', metavar='HOST:PORT', help='play player 2 against the --host at HOST:PORT')
+    parser.add_argument('--net-delay', metavar='MS', type=float, default=0.0,
+                        help='with --host or --join: delay every packet sent by MS milliseconds')
+    parser.add_argument('--net-loss', metavar='FRACTION', type=float, default=0.0,
+                        help='with --host or --join: drop this fraction of the packets sent')
+    args = parser.parse_args()
+    if (args.host is not None or args.join) and (args.record or args.replay or args.search_ai):
+        parser.error('--host and --join do not combine with --record, --replay or --search-ai')
+
+    netplay = None
+    if args.host is not None:
+        netplay = RollbackSession(0, UdpTransport(args.host, delay_ms=args.net_delay, loss=args.net_loss))
+    elif args.join:
+        host, _, port = args.join.rpartition(':')
+        transport = UdpTransport(peer=(socket.gethostbyname(host), int(port)), delay_ms=args.net_delay,
+                                 loss=args.net_loss)
+        netplay = RollbackSession(1, transport)
+
+    replay = Recording.load(args.replay) if args.replay else None
+    if replay is not None and args.headless:
+        start = time.perf_counter()
+        simulation, diverged = replay.replay()
+        elapsed = time.perf_counter() - start
+        log.info(f'{len(replay)} ticks in {elapsed:.2f} s ({len(replay) / elapsed:,.0f} ticks/s), '
+                 f'winner {simulation.winner or "none"}')
+        if diverged is not None:
+            log.error(f'replay diverged from the recording at tick {diverged}')
+            sys.exit(1)
+        log.info('replay matches the recording tick for tick')
+        return
+
+    GameManager(True, tick_rate=replay.tick_rate if replay else 144, fps=args.fps, dirty_rects=args.dirty_rects,
+                latency_path='latency.json' if args.latency else None, profile=args.profile,
+                record_path=args.record, replay=replay, search_ai=args.search_ai, netplay=netplay,
+                costumes=tuple(args.costumes), atlas_dir=None if args.no_atlas else ATLAS_DIR,
+                audio_buffer=args.audio_buffer).run()
 
 
 if __name__ == '__main__':
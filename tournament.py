@@ -0,0 +1,192 @@
+"""
+Headless AI-vs-AI tournament. Every combination of the ``--grid`` values plays the opponent's AIController over
+``--matches`` seeds, once from each side, across a pool of worker processes. One JSON line per match is streamed
+to ``--output`` as matches finish; a table of win rates with Wilson confidence intervals goes to stderr at the end.
+
+    python tournament.py --matches 200 --grid engage_distance=100,150,200 --grid fireball_energy=50,100
+    python tournament.py --matches 500 --workers 8 --output results.jsonl --opponent attack_odds=72
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import main  # noqa: E402
+
+# one simulation per worker process, reused for every match it plays
+simulation: main.Simulation | None = None
+
+
+def parse_params(values: list[str], parser: argparse.ArgumentParser) -> dict[str, list[int]]:
+    """
+    :param values: ``name=v1,v2,...`` strings
+    :return: the values of each AIController tunable
+    """
+    params = {}
+    for value in values:
+        name, _, numbers = value.partition('=')
+        if name not in main.AIController.tunables:
+            parser.error(f'unknown AI parameter {name!r}, choose from {", ".join(main.AIController.tunables)}')
+        try:
+            params[name] = [int(number) for number in numbers.split(',')]
+        except ValueError:
+            parser.error(f'{value!r} is not name=integer[,integer...]')
+    return params
+
+
+def play_match(task: tuple[int, dict[str, int], dict[str, int], int, int, float]) -> dict:
+    """
+    Play one round between two AIControllers
+    :param task: combination index, challenger and opponent parameters, seed, challenger's side, round time
+    :return: the match record, per-side values in challenger, opponent order
+    """
+    global simulation
+    combo, params, opponent, seed, side, round_time = task
+    if simulation is None or simulation.round_time != round_time:
+        simulation = main.Simulation(round_time=round_time)
+    sides = (params, opponent) if side == 0 else (opponent, params)
+    simulation.ai_controllers = [main.AIController(simulation.tick_rate, **kwargs) for kwargs in sides]
+    simulation.reset(seed)
+    players = simulation.players
+    hits = [0, 0]
+    fireballs = [0, 0]
+    while not simulation.winner:
+        health = [player.health for player in players]
+        states = [player.state for player in players]
+        simulation.step((None, None))
+        for i, player in enumerate(players):
+            if player.health < health[i]:
+                hits[1 - i] += 1
+            if player.state == main.State.SHOOT_FIREBALL != states[i]:
+                fireballs[i] += 1
+
+    order = (side, 1 - side)
+    winner = {'PLAYER 1': 0, 'PLAYER 2': 1}.get(simulation.winner)
+    return {
+        'combo': combo,
+        'params': params,
+        'seed': seed,
+        'side': side,
+        'winner': 'draw' if winner is None else 'challenger' if winner == side else 'opponent',
+        'health': [players[i].health for i in order],
+        'seconds': round(simulation.tick / simulation.tick_rate, 3),
+        'hits': [hits[i] for i in order],
+        'fireballs': [fireballs[i] for i in order],
+    }
+
+
+def play(tasks: list[tuple], workers: int, output=None) -> list[dict]:
+    """
+    Play ``tasks`` across ``workers`` processes, in whatever order they finish
+    :param output: text file to stream the match records to as JSON lines
+    """
+    records = []
+    # closed and joined rather than terminated: SDL turns SIGTERM into a quit event in the workers
+    pool = multiprocessing.get_context('spawn').Pool(workers)
+    for record in pool.imap_unordered(play_match, tasks, chunksize=4):
+        records.append(record)
+        if output is not None:
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    pool.close()
+    pool.join()
+    return records
+
+
+def wilson(successes: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """
+    :return: Wilson score interval of a binomial proportion, 95% by default
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def summarize(combos: list[dict[str, int]], records: list[dict]) -> list[dict]:
+    summary = []
+    for i, params in enumerate(combos):
+        matches = [record for record in records if record['combo'] == i]
+        n = len(matches)
+        wins = sum(record['winner'] == 'challenger' for record in matches)
+        draws = sum(record['winner'] == 'draw' for record in matches)
+        low, high = wilson(wins, n)
+        summary.append({
+            'params': params,
+            'matches': n,
+            'wins': wins,
+            'draws': draws,
+            'losses': n - wins - draws,
+            'win_rate': wins / max(n, 1),
+            'win_rate_ci': (low, high),
+            'health_margin': sum(record['health'][0] - record['health'][1] for record in matches) / max(n, 1),
+            'seconds': sum(record['seconds'] for record in matches) / max(n, 1),
+        })
+    return summary
+
+
+def run(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Headless AI-vs-AI tournament and parameter sweep')
+    parser.add_argument('--matches', type=int, default=100, help='seeds per parameter combination')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2,...',
+                        help="challenger parameter values to sweep, repeat for a grid; unset ones keep their default")
+    parser.add_argument('--opponent', action='append', default=[], metavar='NAME=VALUE',
+                        help="the opponent's parameters, defaults otherwise")
+    parser.add_argument('--round-time', type=float, default=90.0, help='seconds per round')
+    parser.add_argument('--output', help='stream one JSON line per match to this file')
+    args = parser.parse_args(argv)
+    for name in ('matches', 'workers'):
+        if getattr(args, name) < 1:
+            parser.error(f'--{name} must be at least 1')
+
+    grid = parse_params(args.grid, parser)
+    opponent = {name: values[0] for name, values in parse_params(args.opponent, parser).items()}
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    # reject bad values here rather than in a worker once the pool is running
+    for params in combos + [opponent]:
+        try:
+            main.AIController(144, **params)
+        except ValueError as error:
+            parser.error(' '.join(f'{name}={value}' for name, value in params.items()) + f': {error}')
+    tasks = [(i, params, opponent, seed, side, args.round_time)
+             for i, params in enumerate(combos)
+             for seed in range(args.seed, args.seed + args.matches)
+             for side in (0, 1)]
+
+    start = time.perf_counter()
+    output = open(args.output, 'w') if args.output else None
+    try:
+        records = play(tasks, args.workers, output)
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    print(f'{len(records)} matches in {elapsed:.1f} s with {args.workers} workers, '
+          f'{len(records) / elapsed:.2f} matches/s', file=sys.stderr)
+    print(f'\n{"parameters":<48}{"matches":>8}{"win rate":>10}{"95% CI":>16}{"draws":>7}{"hp margin":>11}'
+          f'{"seconds":>9}', file=sys.stderr)
+    for row in sorted(summarize(combos, records), key=lambda row: row['win_rate'], reverse=True):
+        params = ' '.join(f'{name}={value}' for name, value in row['params'].items()) or 'defaults'
+        low, high = row['win_rate_ci']
+        print(f'{params:<48}{row["matches"]:>8}{row["win_rate"]:>10.1%}{f"{low:.1%}-{high:.1%}":>16}'
+              f'{row["draws"]:>7}{row["health_margin"]:>11.1f}{row["seconds"]:>9.1f}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())